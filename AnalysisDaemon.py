@@ -0,0 +1,649 @@
+import hmac
+import http.client
+import json
+import os
+import secrets
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from ScanProgress import ScanProgress
+
+# Address the daemon listens on; only local clients can reach the loopback interface
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Host headers of requests for the loopback interface; any other name may be a web page
+# whose domain was pointed at 127.0.0.1 (DNS rebinding)
+LOCAL_HOSTS = ("127.0.0.1", "localhost")
+
+# Addresses listening on every interface, whose clients use names the daemon can't know
+WILDCARD_HOSTS = ("", "0.0.0.0", "::")
+
+# Folder of the token files of the running daemons, one per port, readable only by the user
+TOKEN_FOLDER = os.path.join(os.path.expanduser("~"), ".log_analysis_daemon")
+
+# Header the clients send the daemon's token in
+TOKEN_HEADER = "X-Daemon-Token"
+
+# Jobs running at the same time; further jobs wait in the queue
+DEFAULT_JOB_WORKERS = 2
+
+# Finished jobs kept for their status and output; older ones are forgotten
+MAX_FINISHED_JOBS = 100
+
+# Console output kept per job; a report echoed with --verbosity full is cut off
+MAX_OUTPUT_CHARS = 1024 * 1024
+
+# Subcommands of cli.py that can be run as jobs
+JOB_COMMANDS = ("analyze-file", "analyze-folder", "index", "query")
+
+# Subcommands whose jobs can be cancelled while running, through their ScanProgress
+CANCELLABLE_COMMANDS = ("analyze-file", "analyze-folder")
+
+# Arguments of the job subcommands holding paths, resolved against the client's folder
+PATH_ARGUMENTS = ("file_path", "folder_path", "save_path", "cache_path", "index_path", "pstats")
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+# Seconds a status request of a waiting client is held until the job finishes; the
+# client streams the job's output in steps of this length
+WAIT_INTERVAL = 0.5
+
+
+class JobOutput:
+    """The console output of one job, kept up to MAX_OUTPUT_CHARS characters."""
+
+    def __init__(self, limit=MAX_OUTPUT_CHARS):
+        self.limit = limit
+        self.parts = []
+        self.size = 0
+        self.truncated = False
+
+    def write(self, text):
+        if self.truncated:
+            return len(text)
+        if self.size + len(text) > self.limit:
+            self.truncated = True
+            text = text[:self.limit - self.size] + "\n[Output truncated]\n"
+        self.parts.append(text)
+        self.size += len(text)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def text(self, offset=0):
+        """Returns the output from character offset on."""
+        return "".join(self.parts)[offset:]
+
+
+class ThreadOutput:
+    """
+    Stand-in for sys.stdout and sys.stderr sending each thread's output to its own stream.
+
+    The analyses print their progress and echo their reports to the console; in the
+    daemon, where several jobs run in threads at the same time, every job thread
+    captures its output into its JobOutput, and other threads write to the real stream.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+
+    def capture(self, target):
+        """Sends the output of the calling thread to target, or back to the real stream for None."""
+        self._local.target = target
+
+    def write(self, text):
+        return (getattr(self._local, "target", None) or self.stream).write(text)
+
+    def flush(self):
+        (getattr(self._local, "target", None) or self.stream).flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class AnalysisJob:
+    """One command line run by the daemon, with its status, progress and output."""
+
+    def __init__(self, job_id, argv, args):
+        """
+        Args:
+            job_id (int): Number of the job, counted from 1.
+            argv (list): The job's command line, as submitted.
+            args (argparse.Namespace): argv parsed by cli.build_parser, paths made absolute.
+        """
+        self.id = job_id
+        self.argv = argv
+        self.args = args
+        self.status = QUEUED
+        self.progress = ScanProgress()
+        self.output = JobOutput()
+        self.exit_code = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.future = None
+
+    @property
+    def cancellable(self):
+        return self.status == QUEUED or (self.status == RUNNING and self.args.command in CANCELLABLE_COMMANDS)
+
+    def to_dict(self, offset=None):
+        """
+        Returns the job as the JSON-ready dictionary sent to clients.
+
+        Args:
+            offset (int): Characters of output the client already has; the rest is
+                included as "output". None leaves the output out.
+        """
+        job = {
+            "id": self.id,
+            "argv": self.argv,
+            "status": self.status,
+            "exit_code": self.exit_code,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+            "progress": self.progress.snapshot() if self.status == RUNNING else None,
+        }
+        if offset is not None:
+            job["output"] = self.output.text(offset)
+            job["output_size"] = self.output.size
+        return job
+
+
+class AnalysisDaemon:
+    """
+    Runs analyses submitted as cli.py command lines, in a process that stays up.
+
+    A command line run by cli.py pays for starting Python, importing the analysis
+    modules and reading and compiling keywords.json before the first line is scanned,
+    which dominates the run time of small logs. The daemon imports the modules and
+    compiles the keywords once, and load_keywords keeps the compiled matcher until
+    keywords.json changes, so a job only pays for its scan and report. The ResultCache
+    of every --cache path stays open between jobs, so SQLite keeps its pages in memory;
+    jobs sharing a cache take turns using it.
+
+    Jobs run in a pool of job_workers threads, in the order they were submitted.
+    Analysis jobs get a ScanProgress, which reports their progress and lets them be
+    cancelled while running; every job's console output is kept for its clients.
+    """
+
+    def __init__(self, job_workers=DEFAULT_JOB_WORKERS):
+        self.job_workers = job_workers
+        self.started = time.time()
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._executor = ThreadPoolExecutor(job_workers, thread_name_prefix="AnalysisJob")
+        self._caches = {}  # Normalized --cache path -> (ResultCache, lock held by the job using it)
+        self.stdout = ThreadOutput(sys.stdout)
+        self.stderr = ThreadOutput(sys.stderr)
+
+    def warm_up(self):
+        """Imports the analysis modules and compiles keywords.json; returns False when it is invalid."""
+        import KeywordConfig
+        import LogAutomation  # noqa: F401
+        import LogFolderAutomation  # noqa: F401
+        import LogIndex  # noqa: F401
+
+        return KeywordConfig.read_keywords() is not None
+
+    def submit(self, argv, cwd=None):
+        """
+        Parses a command line and queues it as a job.
+
+        Args:
+            argv (list): Command line of cli.py without the program name, e.g.
+                ["analyze-file", "app.txt", "report.txt"].
+            cwd (str): Folder relative paths of the command line are resolved against.
+                None uses the daemon's folder.
+
+        Returns:
+            AnalysisJob: The queued job.
+
+        Raises:
+            ValueError: When the command line is invalid or can't run as a job.
+        """
+        args = self._parse(argv, cwd)
+        with self._lock:
+            job = AnalysisJob(self._next_id, list(argv), args)
+            self._next_id += 1
+            self.jobs[job.id] = job
+            job.future = self._executor.submit(self._run, job)
+        return job
+
+    def _parse(self, argv, cwd):
+        import cli
+
+        if not isinstance(argv, list) or not all(isinstance(arg, str) for arg in argv):
+            raise ValueError('"argv" must be a list of strings.')
+        if not argv or argv[0] not in JOB_COMMANDS:
+            raise ValueError(f"Jobs run one of the commands {', '.join(JOB_COMMANDS)}.")
+        errors = JobOutput()
+        self.stderr.capture(errors)
+        try:
+            args = cli.build_parser().parse_args(argv)
+        except SystemExit:
+            raise ValueError(errors.text().strip() or "Invalid command line.")
+        finally:
+            self.stderr.capture(None)
+
+        for name in ("file_path", "folder_path", "save_path"):
+            if name in vars(args) and getattr(args, name) is None and args.command != "query":
+                raise ValueError(f"Jobs need every path on the command line; {name} is missing.")
+        if getattr(args, "follow", False):
+            raise ValueError("--follow runs until interrupted and can't be run as a job.")
+        for name in PATH_ARGUMENTS:
+            path = getattr(args, name, None)
+            if path:
+                setattr(args, name, os.path.join(cwd or os.getcwd(), os.path.expanduser(path)))
+        if args.command in CANCELLABLE_COMMANDS:
+            args.progress = None  # Set to the job's ScanProgress when it starts
+        return args
+
+    def _run(self, job):
+        import cli
+
+        with self._lock:
+            if job.status != QUEUED:
+                return  # Cancelled while queued
+            job.status = RUNNING
+            job.started = time.time()
+        if job.args.command in CANCELLABLE_COMMANDS:
+            job.args.progress = job.progress
+        cache_lock = self._use_cache(job.args)
+        self.stdout.capture(job.output)
+        self.stderr.capture(job.output)
+        try:
+            job.exit_code = cli.run(job.args)
+        finally:
+            self.stdout.capture(None)
+            self.stderr.capture(None)
+            if cache_lock is not None:
+                job.args.cache = None
+                cache_lock.release()
+            job.args.progress = None
+            job.finished = time.time()
+            if job.progress.cancelled and job.exit_code != cli.EXIT_OK:
+                job.status = CANCELLED
+            else:
+                job.status = DONE if job.exit_code == cli.EXIT_OK else FAILED
+            self._forget_finished()
+
+    def _use_cache(self, args):
+        """
+        Hands the open ResultCache of an analyze-folder job's --cache path to the job.
+
+        Returns:
+            threading.Lock: The cache's lock, acquired for the job, or None when the job
+            has no cache or it can't be opened, in which case the job opens it itself.
+        """
+        from ResultCache import ResultCache
+
+        if args.command != "analyze-folder" or not args.cache_path:
+            return None
+        key = os.path.normcase(os.path.abspath(args.cache_path))
+        with self._lock:
+            if key not in self._caches:
+                try:
+                    self._caches[key] = (ResultCache(args.cache_path), threading.Lock())
+                except sqlite3.Error:
+                    return None  # Reported by the job when it opens the cache
+            cache, cache_lock = self._caches[key]
+        cache_lock.acquire()
+        cache.reset_stats()
+        args.cache = cache
+        return cache_lock
+
+    def _forget_finished(self):
+        with self._lock:
+            finished = [job_id for job_id, job in self.jobs.items() if job.status in FINISHED]
+            for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+                del self.jobs[job_id]
+
+    def cancel(self, job):
+        """
+        Cancels a queued job, or stops a running analysis at its next check.
+
+        Returns:
+            bool: False when the job has finished or can't be stopped while running.
+        """
+        with self._lock:
+            if not job.cancellable:
+                return False
+            if job.status == QUEUED:
+                job.status = CANCELLED
+                job.finished = time.time()
+                job.exit_code = 1
+        job.progress.cancel()
+        if job.status == CANCELLED:
+            self._forget_finished()
+        return True
+
+    def status(self):
+        """Returns the daemon's state as a JSON-ready dictionary."""
+        from KeywordConfig import KEYWORDS_FILE, resource_path
+
+        with self._lock:
+            jobs = list(self.jobs.values())
+            caches = [cache.db_path for cache, _ in self._caches.values()]
+        counts = {state: 0 for state in (QUEUED, RUNNING) + FINISHED}
+        for job in jobs:
+            counts[job.status] += 1
+        return {"pid": os.getpid(), "uptime": time.time() - self.started, "job_workers": self.job_workers,
+                "keywords": resource_path(KEYWORDS_FILE), "jobs": counts, "caches": caches}
+
+    def close(self):
+        """Cancels the queued and running jobs and waits for the running ones to stop."""
+        with self._lock:
+            jobs = list(self.jobs.values())
+        for job in jobs:
+            if job.status in (QUEUED, RUNNING):
+                self.cancel(job)
+        self._executor.shutdown(wait=True)
+        for cache, _ in self._caches.values():
+            cache.close()
+        self._caches.clear()
+
+
+def token_path(port):
+    """Returns the file holding the token of the daemon listening on port."""
+    return os.path.join(TOKEN_FOLDER, f"token_{port}")
+
+
+def write_token(path):
+    """Writes a new random token to a file only the user can read and returns it."""
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    token = secrets.token_hex(32)
+    with os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as f:
+        os.chmod(path, 0o600)  # A file left by an earlier daemon keeps its mode otherwise
+        f.write(token)
+    return token
+
+
+def read_token(port):
+    """
+    Returns the token of the daemon listening on port, written by serve_main.
+
+    Raises:
+        OSError: When no daemon of this user runs on the port.
+    """
+    try:
+        with open(token_path(port)) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        raise OSError(f"No analysis daemon of yours is running on port {port}; start one with 'cli.py serve'.")
+
+
+class DaemonRequestHandler(BaseHTTPRequestHandler):
+    """
+    The HTTP API of the daemon, JSON in and out:
+
+        GET  /status               State of the daemon and job counts
+        GET  /jobs                 All jobs, without their output
+        GET  /jobs/<id>?offset=N   One job with its output from character N; with &wait=S
+                                   the reply is held up to S seconds until the job finishes
+        POST /jobs                 {"argv": [...], "cwd": "..."} queues a job
+        POST /jobs/<id>/cancel     Cancels a job
+        POST /shutdown             Cancels all jobs and stops the daemon
+
+    Every request must carry the daemon's token in the X-Daemon-Token header, and POST
+    requests must be sent as application/json. Requests with an Origin header or a Host
+    other than the daemon's address are refused too, so a web page open in a browser on
+    the machine can neither send a form to the daemon nor read its replies.
+    """
+
+    server_version = "LogAnalysisDaemon"
+
+    def do_GET(self):
+        if self._refused():
+            return
+        url = urlsplit(self.path)
+        parts = url.path.strip("/").split("/")
+        daemon = self.server.daemon
+        if parts == ["status"]:
+            return self._reply(200, daemon.status())
+        if parts == ["jobs"]:
+            with daemon._lock:
+                jobs = list(daemon.jobs.values())
+            return self._reply(200, {"jobs": [job.to_dict() for job in jobs]})
+        if len(parts) == 2 and parts[0] == "jobs":
+            job = self._job(parts[1])
+            if job is not None:
+                query = parse_qs(url.query)
+                wait = query.get("wait", [""])[0]
+                if wait.replace(".", "", 1).isdigit() and job.future is not None:
+                    wait_futures([job.future], timeout=min(float(wait), WAIT_INTERVAL))
+                offset = query.get("offset", ["0"])[0]
+                self._reply(200, job.to_dict(int(offset) if offset.isdigit() else 0))
+            return
+        self._reply(404, {"error": f"Unknown path {url.path}"})
+
+    def do_POST(self):
+        if self._refused():
+            return
+        parts = urlsplit(self.path).path.strip("/").split("/")
+        daemon = self.server.daemon
+        if parts == ["jobs"]:
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                if not isinstance(request, dict):
+                    raise ValueError("The request must be a JSON object.")
+                job = daemon.submit(request.get("argv"), request.get("cwd"))
+            except ValueError as e:  # json.JSONDecodeError is a ValueError too
+                return self._reply(400, {"error": str(e)})
+            return self._reply(201, job.to_dict())
+        if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "cancel":
+            job = self._job(parts[1])
+            if job is None:
+                return
+            if not daemon.cancel(job):
+                return self._reply(409, {"error": f"Job {job.id} is {job.status} and can't be cancelled."})
+            return self._reply(200, job.to_dict())
+        if parts == ["shutdown"]:
+            self._reply(200, {"status": "stopping"})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+        self._reply(404, {"error": f"Unknown path {self.path}"})
+
+    def _refused(self):
+        """Replies 403 and returns True when the request may come from a web page or lacks the token."""
+        host = self.headers.get("Host", "").lower()
+        token = self.headers.get(TOKEN_HEADER, "")
+        if "Origin" in self.headers:
+            problem = "Requests from web pages are refused."
+        elif host not in self.server.allowed_hosts:
+            problem = f"Requests for host {host} are refused."
+        elif not hmac.compare_digest(token.encode("utf-8"), self.server.token.encode("utf-8")):
+            problem = f"The {TOKEN_HEADER} header doesn't hold the daemon's token."
+        elif self.command == "POST" and self.headers.get_content_type() != "application/json":
+            problem = "Requests must be sent as application/json."
+        else:
+            return False
+        self._reply(403, {"error": problem})
+        return True
+
+    def _job(self, job_id):
+        """Returns the job with the id, or replies 404 and returns None."""
+        job = self.server.daemon.jobs.get(int(job_id)) if job_id.isdigit() else None
+        if job is None:
+            self._reply(404, {"error": f"No job {job_id}"})
+        return job
+
+    def _reply(self, code, body):
+        data = json.dumps(body).encode("utf-8")
+        try:
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except ConnectionError:
+            pass  # The client stopped waiting, e.g. submit --wait interrupted with Ctrl+C
+
+    def log_message(self, format, *args):
+        pass  # Requests are not logged; every job's output is kept instead
+
+
+def create_server(daemon, host=DEFAULT_HOST, port=DEFAULT_PORT, allowed_hosts=()):
+    """
+    Listens on host:port for requests to the daemon and writes the token its clients must send.
+
+    Port 0 picks a free port, found in the server's server_address. Requests must name
+    the daemon as localhost, 127.0.0.1, host or one of allowed_hosts in their Host header.
+
+    Raises:
+        OSError: When the address is taken or the token file can't be written.
+    """
+    server = ThreadingHTTPServer((host, port), DaemonRequestHandler)
+    port = server.server_address[1]
+    server.daemon = daemon
+    names = LOCAL_HOSTS + (host,) + tuple(allowed_hosts)
+    server.allowed_hosts = {f"{name}:{port}".lower() for name in names if name not in WILDCARD_HOSTS}
+    try:
+        server.token = write_token(token_path(port))
+    except OSError:
+        server.server_close()
+        raise
+    return server
+
+
+def serve_main(host=DEFAULT_HOST, port=DEFAULT_PORT, job_workers=DEFAULT_JOB_WORKERS, allowed_hosts=()):
+    """
+    Runs the daemon until it is stopped with Ctrl+C or a shutdown request.
+
+    Args:
+        allowed_hosts (iterable): Further names or addresses of the machine its clients
+            connect to; required when host listens on every interface, e.g. 0.0.0.0.
+
+    Returns:
+        int: Exit code, 0 after a clean stop and 1 when it could not start.
+    """
+    if host in WILDCARD_HOSTS and not allowed_hosts:
+        print(f"Error: --host {host} listens on every address; name the ones clients connect to with --allow-host.")
+        return 1
+    daemon = AnalysisDaemon(job_workers)
+    if not daemon.warm_up():
+        return 1
+    try:
+        server = create_server(daemon, host, port, allowed_hosts)
+    except OSError as e:
+        print(f"Error: Unable to start the daemon on {host}:{port}. {e}")
+        return 1
+    port = server.server_address[1]
+    sys.stdout, sys.stderr = daemon.stdout, daemon.stderr
+    print(f"Analysis daemon listening on http://{host}:{port} with {job_workers} job workers. Press Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.remove(token_path(port))
+        except OSError:
+            pass
+        print("Stopping the analysis daemon...")
+        daemon.close()
+        sys.stdout, sys.stderr = daemon.stdout.stream, daemon.stderr.stream
+    return 0
+
+
+class DaemonClient:
+    """
+    Talks to a running daemon, for the cli.py client commands and other tools.
+
+    The token is read from the daemon's token file unless it is given, e.g. copied
+    from the machine running a daemon bound to another --host.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=10, token=None):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.token = token
+
+    def request(self, method, path, body=None):
+        """
+        Sends one request and returns the decoded JSON reply.
+
+        Raises:
+            OSError: When no daemon listens on the address.
+            ValueError: With the daemon's message when it refuses the request.
+        """
+        if self.token is None:
+            self.token = read_token(self.port)
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            data = json.dumps(body).encode("utf-8") if body is not None else None
+            connection.request(method, path, data, {"Content-Type": "application/json", TOKEN_HEADER: self.token})
+            response = connection.getresponse()
+            reply = json.loads(response.read() or b"{}")
+        except ConnectionRefusedError:
+            raise OSError(f"No analysis daemon is running on {self.host}:{self.port}; start one with 'cli.py serve'.")
+        finally:
+            connection.close()
+        if response.status >= 400:
+            raise ValueError(reply.get("error", f"HTTP {response.status}"))
+        return reply
+
+    def submit(self, argv, cwd=None):
+        return self.request("POST", "/jobs", {"argv": argv, "cwd": cwd or os.getcwd()})
+
+    def job(self, job_id, offset=0, wait=None):
+        return self.request("GET", f"/jobs/{job_id}?offset={offset}" + (f"&wait={wait}" if wait else ""))
+
+    def jobs(self):
+        return self.request("GET", "/jobs")["jobs"]
+
+    def cancel(self, job_id):
+        return self.request("POST", f"/jobs/{job_id}/cancel")
+
+    def status(self):
+        return self.request("GET", "/status")
+
+    def shutdown(self):
+        return self.request("POST", "/shutdown")
+
+    def wait(self, job_id, out=None):
+        """
+        Waits for a job to finish, writing its output to out as it arrives.
+
+        Returns:
+            dict: The finished job.
+        """
+        offset = 0
+        while True:
+            job = self.job(job_id, offset, wait=WAIT_INTERVAL)
+            if out is not None and job["output"]:
+                out.write(job["output"])
+                out.flush()
+            offset = job["output_size"]
+            if job["status"] in FINISHED:
+                return job
+
+
+def describe_job(job):
+    """Formats a job dictionary as one line for the console."""
+    line = f"Job {job['id']}: {job['status']}"
+    if job["exit_code"] is not None:
+        line += f" (exit code {job['exit_code']})"
+    progress = job.get("progress")
+    if progress and progress["total_bytes"]:
+        line += f", {progress['bytes_done'] * 100 // progress['total_bytes']}% of {progress['files_total']} files"
+    return f"{line} - {' '.join(job['argv'])}"
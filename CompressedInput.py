@@ -0,0 +1,182 @@
+import bz2
+import codecs
+import gzip
+import io
+import lzma
+import os
+import zipfile
+import zlib
+from contextlib import contextmanager
+
+# Decompressors for single-file compressed logs, by extension
+COMPRESSED_OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+ZIP_EXTENSION = ".zip"
+
+# Separates a zip bundle from one of its members, e.g. 'logs.zip::app.txt'
+MEMBER_SEPARATOR = "::"
+
+# Bytes read from the start of a zip member to tell a text log from the screenshots,
+# databases and other binary files bundled with it
+SNIFF_BYTES = 8192
+
+# Errors of zip members that are damaged or can't be read, e.g. encrypted ones
+MEMBER_ERRORS = (OSError, EOFError, RuntimeError, NotImplementedError, zipfile.BadZipFile, zlib.error,
+                 lzma.LZMAError)
+
+
+def member_path(archive_path, member):
+    """Returns the path addressing one member of a zip bundle."""
+    return f"{archive_path}{MEMBER_SEPARATOR}{member}"
+
+
+def split_member(log_path):
+    """
+    Splits a path into the file on disk and the zip member it addresses.
+
+    Returns:
+        tuple: (file_path, member) where member is None for plain and single-file
+        compressed logs.
+    """
+    # Found on a lowercased copy, as bundles are also called e.g. 'BUGREPORT.ZIP'
+    index = log_path.lower().find(ZIP_EXTENSION + MEMBER_SEPARATOR)
+    if index < 0:
+        return log_path, None
+    end = index + len(ZIP_EXTENSION)
+    return log_path[:end], log_path[end + len(MEMBER_SEPARATOR):]
+
+
+def is_zip(log_path):
+    return split_member(log_path)[1] is None and log_path.lower().endswith(ZIP_EXTENSION)
+
+
+def is_compressed(log_path):
+    """True for logs that can only be read as a stream: zip members and .gz/.bz2/.xz files."""
+    file_path, member = split_member(log_path)
+    return member is not None or os.path.splitext(file_path)[1].lower() in COMPRESSED_OPENERS
+
+
+def _opener(name):
+    """Returns the decompressor of a .gz/.bz2/.xz file or member name, or None for plain text."""
+    return COMPRESSED_OPENERS.get(os.path.splitext(name)[1].lower())
+
+
+def zip_members(archive_path):
+    """Lists the files in a zip bundle, skipping folders, in archive order."""
+    with zipfile.ZipFile(archive_path) as bundle:
+        return [info.filename for info in bundle.infolist() if not info.is_dir()]
+
+
+@contextmanager
+def open_log(log_path, errors='strict'):
+    """
+    Opens a plain, compressed or zipped log as a text stream of lines.
+
+    Compressed logs are decompressed block by block while the lines are read, so
+    nothing is written to disk and memory use doesn't grow with the size of the log.
+
+    Args:
+        log_path (str): Path of the log; 'bundle.zip::member.txt' opens a zip member.
+        errors (str): How invalid UTF-8 is handled, as in open().
+    """
+    file_path, member = split_member(log_path)
+    if member is not None:
+        opener = _opener(member)
+        with zipfile.ZipFile(file_path) as bundle, bundle.open(member) as raw:
+            if opener is None:
+                yield io.TextIOWrapper(raw, encoding='utf-8', errors=errors)
+            else:
+                # A compressed log inside the bundle, e.g. 'logs.zip::app.1.txt.gz'
+                with opener(raw, 'rt', encoding='utf-8', errors=errors) as log_file:
+                    yield log_file
+        return
+
+    opener = _opener(file_path)
+    if opener is None:
+        with open(file_path, 'r', encoding='utf-8', errors=errors) as log_file:
+            yield log_file
+        return
+
+    with opener(file_path, 'rt', encoding='utf-8', errors=errors) as log_file:
+        yield log_file
+
+
+def member_problem(bundle, member):
+    """
+    Tells why a zip member can't be analyzed as a log, from its first SNIFF_BYTES bytes.
+
+    Args:
+        bundle (zipfile.ZipFile): The open bundle.
+        member (str): Name of the member; .gz/.bz2/.xz members are decompressed first.
+
+    Returns:
+        str: The reason, e.g. that it is a binary file, or None for a readable text log.
+    """
+    opener = _opener(member)
+    try:
+        with bundle.open(member) as raw:
+            if opener is None:
+                head = raw.read(SNIFF_BYTES)
+            else:
+                with opener(raw, 'rb') as decompressed:
+                    head = decompressed.read(SNIFF_BYTES)
+    except MEMBER_ERRORS as e:
+        return f"it can't be read ({e})"
+    if b"\0" in head:
+        return "it is a binary file"
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(head)  # Not final: the sample may end inside a character
+    except UnicodeDecodeError:
+        return "it is not UTF-8 text"
+    return None
+
+
+def expand_archives(files, log_filter=None):
+    """
+    Replaces every zip bundle in a stream of logs by its members, so each member is
+    analyzed and reported as a log of its own.
+
+    Members are filtered by name like loose files (see LogFilter.accepts_member), and
+    members that are binary, not UTF-8 or damaged are skipped with a warning, so a
+    screenshot in a bug report bundle doesn't stop the analysis of the logs next to it.
+
+    Args:
+        files (iterable): (label, path) of the logs, as yielded by discover_logs.
+        log_filter (LogFilter): Which members to analyze. None analyzes every readable member.
+
+    Yields:
+        tuple: (label, path); a member of 'dev1/logs.zip' gets the label
+        'dev1/logs.zip/<member>' and a 'dev1/logs.zip::<member>' path.
+    """
+    for label, path in files:
+        if not is_zip(path):
+            yield label, path
+            continue
+        members = []
+        try:
+            with zipfile.ZipFile(path) as bundle:
+                for info in bundle.infolist():
+                    if info.is_dir():
+                        continue
+                    member_label = os.path.join(label, *info.filename.split("/"))
+                    name = info.filename.rsplit("/", 1)[-1]
+                    if log_filter is not None and not log_filter.accepts_member(name, member_label):
+                        continue
+                    problem = member_problem(bundle, info.filename)
+                    if problem is not None:
+                        print(f"Warning: Skipping '{member_path(path, info.filename)}' as {problem}.")
+                        continue
+                    members.append((member_label, member_path(path, info.filename)))
+        except (OSError, zipfile.BadZipFile) as e:
+            print(f"Warning: Skipping '{path}'. {e}")
+            continue
+        yield from members
+
+
+def log_size(log_path):
+    """Returns the bytes a log occupies on disk; for a zip member its compressed size."""
+    file_path, member = split_member(log_path)
+    if member is None:
+        return os.path.getsize(file_path)
+    with zipfile.ZipFile(file_path) as bundle:
+        return bundle.getinfo(member).compress_size
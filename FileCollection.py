@@ -0,0 +1,202 @@
+import errno
+import os
+import shutil
+import sys
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# Threads copying files at the same time; copies mostly wait on the disks or the
+# network share, so threads overlap well despite the GIL
+DEFAULT_COLLECT_WORKERS = 4
+
+# Bytes read and written at a time when a file has to be copied byte by byte
+COPY_BUFFER = 8 * 1024 * 1024
+
+# Ways of putting a log at its destination
+#   copy: an independent copy; a reflink (copy-on-write clone) where the file system
+#         supports it, a buffered byte copy otherwise
+#   link: a hard link when source and destination share a file system, a copy otherwise.
+#         Takes no space or time, but both names share the data, so editing one edits both.
+#   move: the file itself is moved; a copy followed by a delete across file systems
+COLLECT_MODES = ("copy", "link", "move")
+
+# ioctl cloning a whole file on Linux file systems with copy-on-write (Btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+# One planned file operation
+Operation = namedtuple("Operation", ["source", "destination", "size"])
+
+
+def renamed_log(folder_name, filename, today_date):
+    """
+    Returns the name a log of a device folder is collected under, or None to skip it.
+
+    app.txt becomes '<folder>.<date>.txt' and app.<n>.txt becomes '<folder>.<n>.txt'.
+    """
+    if filename == "app.txt":
+        return f"{folder_name}.{today_date}.txt"
+    if filename.startswith("app.") and filename.endswith(".txt"):
+        return filename.replace("app.", f"{folder_name}.", 1)
+    return None
+
+
+def plan_folder(folder_path, save_path, today_date, folder_name=None):
+    """
+    Plans collecting the app*.txt logs of one folder into save_path, without touching anything.
+
+    Args:
+        folder_path (str): Folder containing the logs.
+        save_path (str): Folder the renamed logs go to.
+        today_date (str): Date given to app.txt, e.g. '2024-05-01'.
+        folder_name (str): Name used in the new file names. None uses the folder's name.
+
+    Returns:
+        list: An Operation for every log, in directory order.
+    """
+    folder_name = folder_name or os.path.basename(os.path.normpath(folder_path))
+    operations = []
+    for filename in os.listdir(folder_path):
+        new_filename = renamed_log(folder_name, filename, today_date)
+        if new_filename is None:
+            print(f"Skipping file (does not match pattern): {filename}")
+            continue
+        source = os.path.join(folder_path, filename)
+        operations.append(Operation(source, os.path.join(save_path, new_filename), os.path.getsize(source)))
+    return operations
+
+
+def find_collisions(operations):
+    """
+    Returns the problems that would make the operations overwrite files.
+
+    A destination that already exists, e.g. from an earlier run on the same day, or that
+    two operations share is reported; nothing is ever overwritten silently.
+
+    Returns:
+        list: One message per colliding destination, empty when the plan is safe.
+    """
+    collisions = []
+    sources = {}
+    for operation in operations:
+        key = os.path.normcase(os.path.abspath(operation.destination))
+        if key in sources:
+            collisions.append(f'"{operation.destination}" would be written from both "{sources[key]}" '
+                              f'and "{operation.source}".')
+        elif os.path.lexists(operation.destination):
+            collisions.append(f'"{operation.destination}" already exists.')
+        sources.setdefault(key, operation.source)
+    return collisions
+
+
+def print_plan(operations, mode):
+    """Prints what a dry run would do and the bytes it would copy."""
+    for operation in operations:
+        print(f'Would {mode}: "{operation.source}" → "{operation.destination}" ({operation.size} bytes)')
+    total = sum(operation.size for operation in operations)
+    print(f"Dry run: {len(operations)} files, {total / 1024 ** 2:.1f} MB would be {mode_verb(mode)}.")
+
+
+def mode_verb(mode):
+    return {"copy": "copied", "link": "linked", "move": "moved"}[mode]
+
+
+def _reflink(src, dst):
+    """Clones open file src into the new, empty dst on copy-on-write file systems; False when not supported."""
+    if not sys.platform.startswith("linux"):
+        return False
+    import fcntl
+
+    try:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except OSError:
+        return False
+
+
+def _copy(source, destination):
+    """
+    Copies a file with its timestamps, cloning it where possible. Returns how it was copied.
+
+    A copy that fails part way, e.g. on a full disk, is removed again, as a partial file
+    at the destination would make every later run stop on it as a collision.
+    """
+    with open(source, 'rb') as src, open(destination, 'xb') as dst:
+        try:
+            cloned = _reflink(src, dst)
+            if not cloned:
+                shutil.copyfileobj(src, dst, COPY_BUFFER)
+            dst.close()
+            shutil.copystat(source, destination)
+        except BaseException:
+            dst.close()
+            os.remove(destination)
+            raise
+    return "cloned" if cloned else "copied"
+
+
+def apply_operation(operation, mode):
+    """
+    Puts one log at its destination.
+
+    Returns:
+        str: What was done: 'cloned', 'copied', 'linked' or 'moved'.
+    """
+    source, destination = operation.source, operation.destination
+    if mode == "move":
+        try:
+            os.rename(source, destination)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            _copy(source, destination)
+            os.remove(source)
+        return "moved"
+    if mode == "link" and os.stat(source).st_dev == os.stat(os.path.dirname(destination) or ".").st_dev:
+        try:
+            os.link(source, destination)
+            return "linked"
+        except OSError:
+            pass  # E.g. a file system without hard links; copy instead
+    return _copy(source, destination)
+
+
+def execute_plan(operations, mode="copy", workers=DEFAULT_COLLECT_WORKERS):
+    """
+    Carries out planned operations, several files at a time.
+
+    Args:
+        operations (list): Operations from plan_folder, checked with find_collisions.
+        mode (str): One of COLLECT_MODES.
+        workers (int): Files handled at the same time; 1 handles them one by one.
+
+    Yields:
+        tuple: (operation, how) as every file is done, in plan order.
+    """
+    if workers is None or workers <= 1 or len(operations) <= 1:
+        for operation in operations:
+            yield operation, apply_operation(operation, mode)
+        return
+    with ThreadPoolExecutor(min(workers, len(operations))) as executor:
+        yield from zip(operations, executor.map(apply_operation, operations, [mode] * len(operations)))
+
+
+def collect(operations, mode="copy", workers=DEFAULT_COLLECT_WORKERS, dry_run=False):
+    """
+    Checks a plan for collisions, then carries it out or, in a dry run, prints it.
+
+    Returns:
+        bool: True when the plan was carried out or printed, False when it collides.
+    """
+    collisions = find_collisions(operations)
+    if collisions:
+        print("Error: Nothing was changed because files would be overwritten:")
+        for collision in collisions:
+            print(f"  {collision}")
+        return False
+    if dry_run:
+        print_plan(operations, mode)
+        return True
+    for operation, how in execute_plan(operations, mode, workers):
+        print(f'{how.capitalize()}: "{os.path.basename(operation.source)}" → '
+              f'"{os.path.basename(operation.destination)}"')
+    return True
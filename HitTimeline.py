@@ -0,0 +1,173 @@
+import csv
+from array import array
+
+from TimeWindow import LINE_TIME
+
+# Days of a (leap) year in front of every month, to number logcat dates, which carry no year
+DAYS_BEFORE_MONTH = (0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335)
+DAYS_IN_MONTH = (31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+# Minutes numbered by minute_of; a minute more than half of them away from the timeline's
+# first minute is taken to be in the next or previous year, e.g. a log crossing New Year
+YEAR_MINUTES = 366 * 1440
+
+# Minutes averaged into the baseline a minute is compared with
+SPIKE_BASELINE_MINUTES = 30
+
+# A minute with this many times its baseline, and at least SPIKE_MIN_HITS hits, is a spike
+SPIKE_FACTOR = 3.0
+SPIKE_MIN_HITS = 10
+
+# Name of the series summing all categories
+TOTAL = "All"
+
+# Bytes of one bucket
+BUCKET_SIZE = array('I').itemsize
+
+
+def minute_of(date, clock):
+    """Returns the minute of the year of a logcat 'MM-DD' date and 'HH:MM:SS' time, or None for an invalid one."""
+    month, day, hour, minute = int(date[:2]), int(date[3:5]), int(clock[:2]), int(clock[3:5])
+    if not 1 <= month <= 12 or not 1 <= day <= DAYS_IN_MONTH[month - 1] or hour > 23 or minute > 59:
+        return None
+    return (DAYS_BEFORE_MONTH[month - 1] + day - 1) * 1440 + hour * 60 + minute
+
+
+def minute_label(minute):
+    """Formats a minute_of value back as 'MM-DD HH:MM', also one moved into the next or previous year."""
+    day, minute = divmod(minute % YEAR_MINUTES, 1440)
+    month = max(index for index, days in enumerate(DAYS_BEFORE_MONTH) if days <= day)
+    return f"{month + 1:02d}-{day - DAYS_BEFORE_MONTH[month] + 1:02d} {minute // 60:02d}:{minute % 60:02d}"
+
+
+class HitTimeline:
+    """
+    Hits per keyword category and logcat minute, of one log or of a whole folder.
+
+    Every category is one array of 32-bit counts, one per minute from the first to the
+    last minute with a hit, so a day of hits takes under 6 KB per category however many
+    hits there are, and merging the timelines of many logs costs one addition per minute.
+    Instances are passed to the scan engines as their on_hit callback. Hits on lines
+    without a logcat timestamp, like stack trace lines without the prefix, are only
+    counted as untimed. Logcat dates carry no year, so minutes far from the first one
+    are moved by a year (see YEAR_MINUTES) to keep a log crossing New Year in order.
+    """
+
+    def __init__(self, categories):
+        """
+        Args:
+            categories (iterable): Categories of keywords.json, in report order.
+        """
+        self.categories = list(categories)
+        self.start = None  # Minute of the first bucket
+        self.counts = {error_type: array('I') for error_type in self.categories}
+        self.untimed = 0
+        self._last_key = None
+        self._last_minute = None
+
+    def __len__(self):
+        return len(self.counts[self.categories[0]]) if self.categories else 0
+
+    def __call__(self, line_num, hits, stripped):
+        match = LINE_TIME.match(stripped)
+        if match is None:
+            self.untimed += len(hits)
+            return
+        key = match.group(1, 2)
+        if key != self._last_key:
+            self._last_key = key
+            self._last_minute = self._unwrapped(minute_of(*key))
+        if self._last_minute is None:
+            self.untimed += len(hits)
+            return
+        offset = self._offset(self._last_minute)
+        counts = self.counts
+        for error_type in hits:
+            counts[error_type][offset] += 1
+
+    def _unwrapped(self, minute):
+        """Moves a minute of the year by a year when it lies closer to the timeline's start that way."""
+        if minute is None or self.start is None:
+            return minute
+        if minute - self.start > YEAR_MINUTES // 2:
+            return minute - YEAR_MINUTES
+        if self.start - minute > YEAR_MINUTES // 2:
+            return minute + YEAR_MINUTES
+        return minute
+
+    def _offset(self, minute):
+        """Returns the bucket of a minute, growing the arrays at either end to reach it."""
+        if self.start is None:
+            self.start = minute
+        length = len(self)
+        if minute < self.start:
+            padding = array('I', bytes(BUCKET_SIZE * (self.start - minute)))
+            for error_type, counts in self.counts.items():
+                self.counts[error_type] = padding + counts
+            self.start = minute
+        elif minute >= self.start + length:
+            padding = bytes(BUCKET_SIZE * (minute - self.start - length + 1))
+            for counts in self.counts.values():
+                counts.frombytes(padding)
+        return minute - self.start
+
+    def merge(self, other):
+        """Adds the counts of another timeline, e.g. of the next log of a folder."""
+        self.untimed += other.untimed
+        if other.start is None:
+            return
+        other_start = self._unwrapped(other.start)
+        self._offset(other_start)
+        self._offset(other_start + len(other) - 1)
+        base = other_start - self.start
+        for error_type, other_counts in other.counts.items():
+            counts = self.counts.get(error_type)
+            if counts is None:
+                continue
+            for index, count in enumerate(other_counts):
+                if count:
+                    counts[base + index] += count
+
+    def total(self):
+        """Returns the counts of all categories summed per minute."""
+        return array('I', map(sum, zip(*self.counts.values()))) if self.categories else array('I')
+
+    def series(self):
+        """Returns (name, counts) of the TOTAL series followed by every category."""
+        return [(TOTAL, self.total())] + list(self.counts.items())
+
+    def spikes(self, window=SPIKE_BASELINE_MINUTES, factor=SPIKE_FACTOR, min_hits=SPIKE_MIN_HITS):
+        """
+        Finds the minutes with far more hits than the minutes before them.
+
+        The baseline of a minute is the average of the `window` minutes before it, kept
+        as a running sum, so finding the spikes costs one pass over the buckets. The
+        first `window` minutes have no baseline yet and are never spikes.
+
+        Returns:
+            list: (minute, series name, hits, baseline) in time order, TOTAL first within a minute.
+        """
+        series = self.series()
+        spikes = []
+        for position, (name, counts) in enumerate(series):
+            running = sum(counts[:window])
+            for index in range(window, len(counts)):
+                count = counts[index]
+                baseline = running / window
+                if count >= min_hits and count > factor * baseline:
+                    spikes.append((self.start + index, position, name, count, baseline))
+                running += count - counts[index - window]
+        spikes.sort()
+        return [(minute, name, count, baseline) for minute, _, name, count, baseline in spikes]
+
+    def write_csv(self, path):
+        """Writes one row per minute with its hits per category and in total, for charting."""
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            series = self.series()
+            writer.writerow(["minute"] + [name for name, _ in series[1:]] + [TOTAL])
+            if self.start is None:
+                return
+            columns = [counts for _, counts in series[1:]] + [series[0][1]]
+            for index, row in enumerate(zip(*columns)):
+                writer.writerow([minute_label(self.start + index), *row])
@@ -0,0 +1,147 @@
+import json
+import os
+import sys
+import threading
+
+from KeywordMatcher import PATTERN_FIELDS, compile_keywords
+
+# Keyword dictionary shipped next to the program
+KEYWORDS_FILE = 'keywords.json'
+
+# Keys a category of keywords.json may have
+CATEGORY_FIELDS = ("description", "keywords", "patterns", "crash")
+
+# Loaded configurations by absolute path, kept for the lifetime of the process
+_loaded = {}
+_lock = threading.Lock()
+
+
+def resource_path(relative_path):
+    """ Get the absolute path to a resource, works for both development and PyInstaller bundled mode """
+    if getattr(sys, 'frozen', False):  # Check if running as a PyInstaller bundle
+        base_path = sys._MEIPASS  # Temporary folder used by PyInstaller
+    else:
+        base_path = os.path.abspath(".")  # Current working directory during development
+    return os.path.join(base_path, relative_path)
+
+
+def validate_keywords(error_data):
+    """
+    Checks the structure of a parsed keywords.json before anything is scanned.
+
+    Every category is an object with a "keywords" list of strings and/or a "patterns"
+    list of regex strings or field objects; "description" is a string and "crash" a
+    boolean. The patterns themselves are checked when the matcher is compiled.
+
+    Args:
+        error_data (dict): Parsed keywords.json.
+
+    Raises:
+        ValueError: Naming the first category that doesn't fit.
+    """
+    if not isinstance(error_data, dict):
+        raise ValueError("The file must hold an object with one entry per category.")
+    for error_type, details in error_data.items():
+        if not isinstance(details, dict):
+            raise ValueError(f"Category '{error_type}' must be an object with a \"keywords\" list.")
+        unknown = [key for key in details if key not in CATEGORY_FIELDS]
+        if unknown:
+            raise ValueError(f"Category '{error_type}' has unknown keys {', '.join(unknown)}; "
+                             f"use {', '.join(CATEGORY_FIELDS)}.")
+        if "keywords" not in details and "patterns" not in details:
+            raise ValueError(f"Category '{error_type}' needs a \"keywords\" or \"patterns\" list.")
+        keywords = details.get("keywords", [])
+        if not isinstance(keywords, list) or not all(isinstance(keyword, str) for keyword in keywords):
+            raise ValueError(f"Category '{error_type}': \"keywords\" must be a list of strings.")
+        patterns = details.get("patterns", [])
+        if not isinstance(patterns, list) or not all(isinstance(pattern, (str, dict)) for pattern in patterns):
+            raise ValueError(f"Category '{error_type}': \"patterns\" must be a list of regexes or objects "
+                             f"with {', '.join(PATTERN_FIELDS)}.")
+        if not isinstance(details.get("description", ""), str):
+            raise ValueError(f"Category '{error_type}': \"description\" must be a string.")
+        if not isinstance(details.get("crash", False), bool):
+            raise ValueError(f"Category '{error_type}': \"crash\" must be true or false.")
+
+
+class KeywordConfig:
+    """
+    A validated keywords.json with its compiled KeywordMatcher.
+
+    Instances are shared between analyses by load_keywords, so neither the object nor
+    its error_data may be modified; scans that need fewer categories build new
+    dictionaries from it instead.
+    """
+
+    __slots__ = ("path", "fingerprint", "error_data", "matcher")
+
+    def __init__(self, path, fingerprint, error_data):
+        """
+        Args:
+            path (str): File the configuration was read from.
+            fingerprint (tuple): (mtime_ns, size) of the file when it was read.
+            error_data (dict): Parsed keywords.json.
+
+        Raises:
+            ValueError: When the structure or a pattern is invalid.
+        """
+        validate_keywords(error_data)
+        for name, value in (("path", path), ("fingerprint", fingerprint), ("error_data", error_data),
+                            ("matcher", compile_keywords(error_data))):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("KeywordConfig is read-only")
+
+
+def load_keywords(path=None):
+    """
+    Returns the configuration of a keywords file, parsing and compiling it only when it
+    changed since the last call.
+
+    Long-running processes, like the GUI, analyze many times with the same file; they
+    pay for the parse and the matcher compile once, and pick up edits to the file on
+    the next analysis.
+
+    Args:
+        path (str): Keywords file. None uses the keywords.json shipped with the program.
+
+    Returns:
+        KeywordConfig: The validated and compiled configuration.
+
+    Raises:
+        OSError: When the file can't be read.
+        ValueError: When it isn't valid JSON or doesn't fit the keywords.json structure.
+    """
+    path = os.path.abspath(path or resource_path(KEYWORDS_FILE))
+    with _lock:
+        stat = os.stat(path)
+        fingerprint = (stat.st_mtime_ns, stat.st_size)
+        config = _loaded.get(path)
+        if config is None or config.fingerprint != fingerprint:
+            with open(path, 'r', encoding='utf-8') as f:
+                try:
+                    error_data = json.load(f)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Invalid JSON. {e}")
+            config = _loaded[path] = KeywordConfig(path, fingerprint, error_data)
+        return config
+
+
+def read_keywords(path=None):
+    """
+    Loads a keywords file like load_keywords, printing what is wrong instead of raising.
+
+    Returns:
+        KeywordConfig: The configuration, or None when it can't be used.
+    """
+    path = path or resource_path(KEYWORDS_FILE)
+    name = os.path.basename(path)
+    try:
+        return load_keywords(path)
+    except FileNotFoundError:
+        print(f"Error: Could not find the file '{name}' at {path}.")
+    except OSError as e:
+        print(f"Error: Unable to read '{name}'. {e}")
+    except ValueError as e:
+        print(f"Error: Invalid '{name}'. {e}")
+    return None
@@ -0,0 +1,462 @@
+import re
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+# Below this many distinct keywords a plain substring loop beats walking the automaton
+SMALL_DICTIONARY = 64
+
+# Shortest literal a regex pattern is prefiltered on; shorter ones would pass most lines
+MIN_LITERAL_LENGTH = 3
+
+# Fields of a pattern object in keywords.json
+PATTERN_FIELDS = ("name", "regex", "keyword", "level", "tag", "pid", "tid", "time")
+
+# Logcat priorities, from verbose to silent
+LOGCAT_LEVELS = "vdiwefas"
+
+
+def crash_category(error_data):
+    """
+    Returns the category of keywords.json marked with "crash": true, or None.
+
+    Every line of the crash category is listed in the reports, and its count ranks the
+    files in the summary report.
+    """
+    for error_type, details in error_data.items():
+        if details.get("crash"):
+            return error_type
+    return None
+
+
+def _glob_regex(glob, star):
+    """Translates a lowercased glob with * and ? into regex source, `star` matching one character of *."""
+    return "".join(star + "*" if ch == "*" else star if ch == "?" else re.escape(ch) for ch in glob)
+
+
+def _glob_literal(glob):
+    """Returns the longest run of a glob without wildcards."""
+    return max(re.split(r"[*?]", glob), key=len)
+
+
+def _header_regex(rule):
+    """
+    Builds regex source matching the columns of a lowercased logcat line that satisfy
+    the field conditions of a pattern, e.g. '10-18 12:00:00.000  1234  5678 e tag: '.
+
+    The source only uses ASCII and never crosses a newline, so it also works on the
+    lowercased bytes of a whole mapped window.
+    """
+    def number(field):
+        value = rule.get(field)
+        return "[0-9]+" if value is None else re.escape(str(int(value)))
+
+    time = rule.get("time")
+    level = rule.get("level")
+    tag = rule.get("tag")
+    if level is None:
+        levels = LOGCAT_LEVELS
+    else:
+        levels = "".join(level) if isinstance(level, list) else level
+        levels = levels.lower()
+        if not levels or any(ch not in LOGCAT_LEVELS for ch in levels):
+            raise ValueError(f"Invalid level '{level}'. Use logcat levels like \"E\" or [\"E\", \"F\"].")
+    return (
+        "^[ \\t]*"
+        + ("[0-9]{2}-[0-9]{2}[ \\t]+[0-9:.]+" if time is None else _glob_regex(time.lower(), "[0-9:. -]"))
+        + "[ \\t]+" + number("pid")
+        + "[ \\t]+" + number("tid")
+        + "[ \\t]+[" + levels + "]"
+        + "[ \\t]+" + ("[^:\\n]*?" if tag is None else _glob_regex(tag.lower(), "[^:\\n]"))
+        + "[ \\t]*:"
+    )
+
+
+def _regex_literal(parsed):
+    """
+    Returns the longest lowercased ASCII string that every match of a parsed regex
+    contains, or "" when there is none.
+    """
+    best = ""
+    run = []
+    for op, av in parsed:
+        if op is sre_constants.LITERAL and av < 128:
+            run.append(chr(av).lower())
+            continue
+        if op is sre_constants.AT:
+            continue  # Anchors are zero-width, the literals around them stay adjacent
+        candidates = ["".join(run)]
+        run = []
+        if op is sre_constants.SUBPATTERN:
+            candidates.append(_regex_literal(av[-1]))
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and av[0] >= 1:
+            candidates.append(_regex_literal(av[2]))
+        best = max([best, *candidates], key=len)
+    return max(best, "".join(run), key=len)
+
+
+def _has_group_reference(parsed):
+    """True when a parsed regex refers back to its own groups, so it can't join an alternation."""
+    for op, av in parsed:
+        if op in (sre_constants.GROUPREF, sre_constants.GROUPREF_EXISTS):
+            return True
+        for item in av if isinstance(av, (tuple, list)) else ():
+            items = item if isinstance(item, list) else [item]
+            if any(isinstance(sub, sre_parse.SubPattern) and _has_group_reference(sub) for sub in items):
+                return True
+    return False
+
+
+def _turns_off_ignorecase(parsed):
+    """True when a parsed regex switches case-insensitivity off for a group, e.g. (?-i:ANR)."""
+    for op, av in parsed:
+        if op is sre_constants.SUBPATTERN and av[2] & sre_constants.SRE_FLAG_IGNORECASE:
+            return True
+        for item in av if isinstance(av, (tuple, list)) else ():
+            items = item if isinstance(item, list) else [item]
+            if any(isinstance(sub, sre_parse.SubPattern) and _turns_off_ignorecase(sub) for sub in items):
+                return True
+    return False
+
+
+def _compile_pattern(pattern):
+    """
+    Compiles one entry of a category's "patterns" list.
+
+    Args:
+        pattern (str or dict): A regex, or an object combining a "regex" or "keyword"
+            with logcat field conditions ("level", "tag", "pid", "tid", "time").
+
+    Returns:
+        tuple: (name, literal, checks, gate, bytes_gate) where every regex in checks has
+        to match the lowercased line, literal is a string every matching line contains
+        (or ""), and gate is regex source matching at least every matching line.
+        bytes_gate tells whether gate can also search raw bytes.
+    """
+    if isinstance(pattern, str):
+        pattern = {"regex": pattern}
+    if not isinstance(pattern, dict):
+        raise ValueError(f"Invalid pattern {pattern!r}. Use a regex or an object.")
+    unknown = [field for field in pattern if field not in PATTERN_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown pattern field '{unknown[0]}'. Use {', '.join(PATTERN_FIELDS)}.")
+    has_fields = any(field in pattern for field in ("level", "tag", "pid", "tid", "time"))
+    if not has_fields and "regex" not in pattern and "keyword" not in pattern:
+        raise ValueError(f"Pattern {pattern!r} matches nothing. Give a regex, keyword or field.")
+
+    checks = []
+    literals = []
+    gate = None
+    bytes_gate = False
+    if has_fields:
+        gate = _header_regex(pattern)
+        bytes_gate = True
+        checks.append(re.compile(gate))
+        if pattern.get("tag"):
+            literals.append(_glob_literal(pattern["tag"].lower()))
+    if "keyword" in pattern:
+        keyword = pattern["keyword"].lower()
+        checks.append(re.compile(re.escape(keyword)))
+        literals.append(keyword)
+    if "regex" in pattern:
+        source = pattern["regex"]
+        try:
+            compiled = re.compile(source, re.IGNORECASE)
+            parsed = sre_parse.parse(source, re.IGNORECASE)
+        except re.error as e:
+            raise ValueError(f"Invalid regex '{source}'. {e}")
+        if _turns_off_ignorecase(parsed):
+            # Lines are lowercased before matching, so a case-sensitive part could never match uppercase text
+            raise ValueError(f"Invalid regex '{source}'. Patterns are matched case-insensitively, remove (?-i:...).")
+        checks.append(compiled)
+        literals.append(_regex_literal(parsed))
+        if gate is None and not _has_group_reference(parsed):
+            gate = f"(?i:{source})"
+
+    literal = max(literals, key=len, default="")
+    if "keyword" not in pattern and len(literal) < MIN_LITERAL_LENGTH:
+        literal = ""
+    name = pattern.get("name") or " ".join(
+        f"{field}={pattern[field]}" if field != "regex" else pattern[field]
+        for field in PATTERN_FIELDS if field in pattern and field != "name")
+    return name, literal, tuple(checks), gate, bytes_gate
+
+
+def _trie_pattern(strings):
+    """
+    Builds a regex source that matches as soon as any of the strings occurs.
+
+    The alternation is shaped like a trie so the regex engine only follows branches
+    whose first character matches, instead of trying every keyword at every position.
+
+    Args:
+        strings (iterable): Non-empty lowercased strings.
+
+    Returns:
+        str: Regex source for the prefilter.
+    """
+    end = None  # Marks the node where a keyword ends
+    trie = {}
+    for string in strings:
+        node = trie
+        for ch in string:
+            if end in node:
+                break  # A shorter keyword already ends here, longer ones add nothing
+            node = node.setdefault(ch, {})
+        else:
+            node.clear()  # Any extension of this keyword is redundant for a prefilter
+            node[end] = {}
+
+    def build(node):
+        if end in node:
+            return ""
+        branches = []
+        single_chars = []
+        for ch in sorted(node):
+            tail = build(node[ch])
+            if tail:
+                branches.append(re.escape(ch) + tail)
+            else:
+                single_chars.append(re.escape(ch))
+        if len(single_chars) == 1:
+            branches.append(single_chars[0])
+        elif single_chars:
+            branches.append("[" + "".join(single_chars) + "]")
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Single-pass matcher for every keyword and pattern of every category in keywords.json.
+
+    All keywords are lowercased once and compiled into an Aho-Corasick automaton, so a
+    line is walked once no matter how many keywords the dictionary holds. A trie-shaped
+    regex is used as a prefilter so lines without any hit never reach the automaton;
+    small dictionaries check candidate lines with plain substring tests instead.
+
+    Regex and logcat field patterns join the same automaton through a literal every
+    match has to contain, so their regexes only run on lines holding that literal.
+    Patterns without such a literal are combined into one alternation that is searched
+    once per candidate line before any of them runs on its own.
+    """
+
+    def __init__(self, error_data):
+        """
+        Args:
+            error_data (dict): Parsed keywords.json ({category: {"keywords": [...],
+                "patterns": [...], "crash": bool}}).
+
+        Raises:
+            ValueError: When a pattern is invalid or several categories set "crash".
+        """
+        self.categories = list(error_data)
+        crash_categories = [error_type for error_type, details in error_data.items() if details.get("crash")]
+        if len(crash_categories) > 1:
+            raise ValueError(f"Only one category can set \"crash\", not {', '.join(crash_categories)}.")
+        self.crash_category = crash_categories[0] if crash_categories else None
+
+        # One entry per (category, keyword or pattern position) so duplicates keep their own slot
+        self.patterns = []
+        lowered = {}
+        checks = {}  # pattern id -> regexes a line has to match as well
+        ungated = []  # Ids of patterns without a literal, tried on every candidate line
+        gates = []
+        for error_type, details in error_data.items():
+            for keyword in details.get("keywords", ()):
+                lowered.setdefault(keyword.lower(), []).append(len(self.patterns))
+                self.patterns.append((error_type, keyword))
+            for pattern in details.get("patterns", ()):
+                try:
+                    name, literal, pattern_checks, gate, bytes_gate = _compile_pattern(pattern)
+                except ValueError as e:
+                    raise ValueError(f"Category '{error_type}': {e}")
+                pattern_id = len(self.patterns)
+                self.patterns.append((error_type, name))
+                checks[pattern_id] = pattern_checks
+                if literal:
+                    lowered.setdefault(literal, []).append(pattern_id)
+                else:
+                    ungated.append(pattern_id)
+                    gates.append((gate, bytes_gate))
+
+        # Empty keywords match every line, exactly like `"" in line_lower`
+        self._always = tuple(lowered.pop("", ()))
+        self._strings = tuple(lowered)
+        self._small = tuple(lowered.items()) if len(lowered) < SMALL_DICTIONARY else None
+        self._build_automaton(lowered)
+        self._checks = checks
+        self._ungated = tuple(ungated)
+        self._gates = gates
+        self._ungated_gate = self._compile_gates([gate for gate, _ in gates]) if gates else None
+
+        if self._always or (not lowered and not gates):
+            self._prefilter = None
+        else:
+            sources = [gate for gate, _ in gates]
+            if lowered:
+                sources.insert(0, _trie_pattern(lowered))
+            self._prefilter = self._compile_gates(sources)
+
+    @staticmethod
+    def _compile_gates(sources):
+        """Compiles an alternation of gate sources, or returns None when some line can't be gated."""
+        if None in sources:
+            return None
+        try:
+            return re.compile("|".join(sources), re.MULTILINE)
+        except re.error:  # e.g. two patterns defining the same group name
+            return None
+
+    def _build_automaton(self, lowered):
+        goto = [{}]
+        output = [()]
+        for string, pattern_ids in lowered.items():
+            state = 0
+            for ch in string:
+                next_state = goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][ch] = next_state
+                    goto.append({})
+                    output.append(())
+                state = next_state
+            output[state] = tuple(pattern_ids)
+
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and ch not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(ch, 0)
+                # Inherit the keywords that end on the fallback state (suffix matches)
+                output[next_state] = output[next_state] + output[fail[next_state]]
+
+        self._goto = goto
+        self._fail = fail
+        self._output = output
+
+    def _walk(self, line_lower):
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        found = set(self._always)
+        state = 0
+        for ch in line_lower:
+            transitions = goto[state]
+            while ch not in transitions and state:
+                state = fail[state]
+                transitions = goto[state]
+            state = transitions.get(ch, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+    def literals(self):
+        """
+        Returns the lowercased strings of which every matching line contains at least one,
+        e.g. to look up candidate lines in a full-text index.
+
+        Returns:
+            tuple: The keywords and pattern literals, or None when some keyword or pattern
+            can match a line without containing any of them.
+        """
+        if self._always or self._ungated:
+            return None
+        return self._strings
+
+    def bytes_prefilter(self):
+        """
+        Builds a bytes regex that finds candidate lines in UTF-8 log data lowercased
+        with bytes.lower().
+
+        bytes.lower() only folds ASCII letters, so keywords with non-ASCII characters
+        are prefiltered on their longest ASCII run, and every hit still has to be
+        confirmed with find() on the decoded line.
+
+        Returns:
+            re.Pattern: Pattern over bytes; it matches everywhere when lines can't be
+            prefiltered and nowhere when there are no keywords.
+        """
+        if self._always or any(not bytes_gate for _, bytes_gate in self._gates):
+            return re.compile(b"")
+        if not self._strings and not self._gates:
+            return re.compile(b"(?!)")
+
+        fragments = []
+        for string in self._strings:
+            if not string.isascii():
+                runs = re.findall(r"[\x00-\x7f]+", string)
+                if not runs:
+                    return re.compile(b"")
+                string = max(runs, key=len)
+            fragments.append(string)
+        # ASCII-only fragments map one character to one byte, so latin-1 round-trips the regex
+        sources = [_trie_pattern(fragments)] if fragments else []
+        sources.extend(gate for gate, _ in self._gates)
+        return re.compile("|".join(sources).encode("latin-1"), re.MULTILINE)
+
+    def find(self, line_lower):
+        """
+        Finds every keyword and pattern matching an already lowercased line.
+
+        Args:
+            line_lower (str): The log line, lowercased.
+
+        Returns:
+            dict: {category: [keywords]} with keywords and pattern names in keywords.json
+            order, or an empty dict when nothing matched.
+        """
+        prefilter = self._prefilter
+        if prefilter is not None and prefilter.search(line_lower) is None:
+            return {}
+
+        if self._small is not None:
+            found = set(self._always)
+            for string, pattern_ids in self._small:
+                if string in line_lower:
+                    found.update(pattern_ids)
+        else:
+            found = self._walk(line_lower)
+        if self._ungated:
+            gate = self._ungated_gate
+            if gate is None or gate.search(line_lower) is not None:
+                found.update(self._ungated)
+        if not found:
+            return {}
+        checks = self._checks
+        if checks:
+            found = [pattern_id for pattern_id in found if pattern_id not in checks
+                     or all(check.search(line_lower) is not None for check in checks[pattern_id])]
+
+        hits = {}
+        patterns = self.patterns
+        for pattern_id in sorted(found):
+            error_type, keyword = patterns[pattern_id]
+            hits.setdefault(error_type, []).append(keyword)
+        return hits
+
+
+def compile_keywords(error_data):
+    """
+    Compiles the keyword dictionary into a reusable KeywordMatcher.
+
+    Args:
+        error_data (dict): Parsed keywords.json.
+
+    Returns:
+        KeywordMatcher: Matcher to pass to search_errors.
+    """
+    return KeywordMatcher(error_data)
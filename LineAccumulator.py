@@ -0,0 +1,124 @@
+from array import array
+
+# Number of line numbers joined into one string at a time when writing a report
+TEXT_BATCH = 4096
+
+
+class LineAccumulator:
+    """
+    Compact, optionally capped store for the line numbers a category matched.
+
+    Line numbers arrive in ascending order, so they are kept as run-length encoded
+    ranges in two array('I') buffers (4 bytes per run instead of a Python int per line).
+    With a limit only the first `limit` lines are kept and the rest are just counted,
+    so memory stays flat no matter how many lines match.
+    """
+
+    def __init__(self, limit=None):
+        """
+        Args:
+            limit (int): Maximum number of line numbers to keep. None keeps all of them.
+        """
+        self.limit = limit
+        self.total = 0
+        self.stored = 0
+        self._starts = array('I')
+        self._lengths = array('I')
+
+    def append(self, line_num):
+        self.total += 1
+        if self.limit is not None and self.stored >= self.limit:
+            return
+        self.stored += 1
+        if self._starts and self._starts[-1] + self._lengths[-1] == line_num:
+            self._lengths[-1] += 1  # Extends the current run of consecutive lines
+        else:
+            self._starts.append(line_num)
+            self._lengths.append(1)
+
+    def extend(self, line_nums):
+        for line_num in line_nums:
+            self.append(line_num)
+
+    @property
+    def truncated(self):
+        """Number of matched lines that were counted but not kept."""
+        return self.total - self.stored
+
+    def __iter__(self):
+        for start, length in zip(self._starts, self._lengths):
+            yield from range(start, start + length)
+
+    def __len__(self):
+        return self.stored
+
+    def __bool__(self):
+        return self.total > 0
+
+    def __eq__(self, other):
+        if isinstance(other, LineAccumulator):
+            return self.total == other.total and list(self) == list(other)
+        if isinstance(other, list):
+            return self.truncated == 0 and list(self) == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"LineAccumulator(total={self.total}, stored={self.stored}, runs={len(self._starts)})"
+
+    def iter_text(self, separator=", "):
+        """
+        Yields the kept line numbers as text in batches, for streaming into a report.
+
+        Joining all batches gives the same text as `separator.join(map(str, lines))`,
+        followed by a note with the number of lines left out when the store is capped.
+        """
+        batch = []
+        first = True
+        for line_num in self:
+            batch.append(line_num)
+            if len(batch) == TEXT_BATCH:
+                yield ("" if first else separator) + separator.join(map(str, batch))
+                batch = []
+                first = False
+        if batch:
+            yield ("" if first else separator) + separator.join(map(str, batch))
+        if self.truncated:
+            yield f" (+{self.truncated} more lines)"
+
+
+class BoundedList(list):
+    """
+    List that keeps at most `limit` items and counts the ones it drops.
+
+    Used for crashed_occurrences, where every item holds a full line of text.
+    """
+
+    def __init__(self, limit=None):
+        super().__init__()
+        self.limit = limit
+        self.total = 0
+
+    def append(self, item):
+        self.total += 1
+        if self.limit is None or len(self) < self.limit:
+            super().append(item)
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    @property
+    def truncated(self):
+        """Number of items that were counted but not kept."""
+        return self.total - len(self)
+
+    def __reduce__(self):
+        # The default list pickling appends items before `limit` is restored
+        return _restore_bounded_list, (self.limit, self.total, list(self))
+
+
+def _restore_bounded_list(limit, total, items):
+    bounded = BoundedList(limit)
+    list.extend(bounded, items)
+    bounded.total = total
+    return bounded
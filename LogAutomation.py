@@ -1,19 +1,23 @@
-import json
 import os
-from tkinter import Tk
-from tkinter.filedialog import askopenfilename, asksaveasfilename
 from datetime import datetime
 import sys
-
-def resource_path(relative_path):
-    """ Get the absolute path to a resource, works for both development and PyInstaller bundled mode """
-    if getattr(sys, 'frozen', False):  # Check if running as a PyInstaller bundle
-        base_path = sys._MEIPASS  # Temporary folder used by PyInstaller
-    else:
-        base_path = os.path.abspath(".")  # Current working directory during development
-    return os.path.join(base_path, relative_path)
+import zipfile
+from CompressedInput import MEMBER_SEPARATOR, is_compressed, is_zip, member_path, zip_members
+from KeywordConfig import read_keywords
+from KeywordMatcher import crash_category
+from LogFollower import LogFollower
+from LogScanner import get_engine, search_errors_chunked
+from LogTemplates import TemplateMiner
+from ReportWriter import PROGRESS, ReportWriter, write_results, write_signatures, write_templates
+from ScanProfile import ScanProfile, stage
+from ScanProgress import ScanCancelled
+from StackTraces import collect_traces
 
 def browse_file():
+    # tkinter is only loaded when a dialog is needed, so headless runs never import it
+    from tkinter import Tk
+    from tkinter.filedialog import askopenfilename
+
     Tk().withdraw()  # Hide the main tkinter window
     file_path = askopenfilename(
         title="Select a log file",
@@ -22,6 +26,9 @@ def browse_file():
     return file_path
 
 def prompt_save_file():
+    from tkinter import Tk
+    from tkinter.filedialog import asksaveasfilename
+
     Tk().withdraw()  # Hide the main tkinter window
     current_date = datetime.now().strftime("%Y-%m-%d")
     default_name = f"exceptionAnalysis_{current_date}.txt"
@@ -33,100 +40,201 @@ def prompt_save_file():
     )
     return file_path
 
-def search_errors(log_file, error_data):
-    results = {}
-    unique_lines_per_error = {}
-    crashed_occurrences = []
-
-    for error_type in error_data:
-        results[error_type] = {"count": 0, "lines": []}
-        unique_lines_per_error[error_type] = {}
-
-    with open(log_file, 'r', encoding='utf-8') as log_file:
-        for line_num, line in enumerate(log_file, start=1):
-            line_lower = line.lower()
-            
-            for error_type, details in error_data.items():
-                if error_type == "Crashed":
-                    if "crashed" in line_lower:
-                        results[error_type]["count"] += 1
-                        results[error_type]["lines"].append(line_num)
-                        crashed_occurrences.append((line_num, line.strip()))
-                else:
-                    matched = False  # Flag to prevent multiple counts for the same line
-                    for keyword in details["keywords"]:
-                        if keyword.lower() in line_lower:
-                            if not matched:
-                                results[error_type]["count"] += 1  # Count only once per line
-                                results[error_type]["lines"].append(line_num)
-                                matched = True  # Prevent further increments for this line
-                            if keyword not in unique_lines_per_error[error_type]:
-                                unique_lines_per_error[error_type][keyword] = line.strip()
-
-    return results, unique_lines_per_error, crashed_occurrences
-
-def main(file_path=None, save_path=None):
-    json_file_path = resource_path('keywords.json')  # Locate the JSON file
-    try:
-        with open(json_file_path, 'r') as f:
-            error_data = json.load(f)
-    except FileNotFoundError:
-        print(f"Error: Could not find the file 'keywords.json' at {json_file_path}.")
-        return
-    except json.JSONDecodeError as e:
-        print(f"Error: Invalid JSON in 'keywords.json'. {e}")
-        return
+def write_report(save_path, file_path, found_errors_line, unique_lines_per_error, crashed_occurrences,
+                 verbosity="progress", extra_sinks=(), crash_category=None, signatures=None, window=None,
+                 templates=None):
+    """
+    Writes the analysis report of one log file.
+
+    Args:
+        save_path (str): Path of the report file.
+        file_path (str): Path of the analyzed log, shown in the header.
+        found_errors_line (dict): Per category {"count", "lines"} from search_errors.
+        unique_lines_per_error (dict): Per category {keyword: first line seen}.
+        crashed_occurrences (list): (line_num, line) tuples for the crash category.
+        verbosity (str): Console output, 'summary', 'progress' or 'full'.
+        extra_sinks (iterable): Additional ReportWriter sinks.
+        crash_category (str): Category listed line by line, see KeywordMatcher.crash_category.
+        signatures (TraceSignatures): Crash signatures ranked below the results, or None.
+        window (TimeWindow): Time window the log was limited to, shown in the header, or None.
+        templates (TemplateMiner): Templates of the unmatched error lines, listed as
+            candidate new keywords below the results, or None.
+    """
+    with ReportWriter.open(save_path, verbosity, extra_sinks) as writer:
+        writer.line(f"Consolidated Error Analysis Report\n")
+        writer.line(f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        writer.line(f"File: {file_path}\n", level=PROGRESS)
+        if window is not None:
+            writer.line(f"Time window: {window}\n")
+        writer.line("=" * 50 + "\n")
+
+        write_results(writer, found_errors_line, unique_lines_per_error, crashed_occurrences, crash_category)
+        if signatures is not None:
+            write_signatures(writer, signatures)
+        if templates is not None:
+            write_templates(writer, templates)
+
+        writer.line("=" * 50 + "\n")
+
+def follow_log(file_path, save_path, error_data, continuous=False, interval=1.0, max_lines=None,
+               verbosity="progress", engine="text"):
+    """
+    Analyzes only what was appended to a log since the last run and rewrites the report.
+
+    Args:
+        file_path (str): Log file to follow.
+        save_path (str): Path of the analysis report.
+        error_data (dict): Parsed keywords.json.
+        continuous (bool): Keep watching the log like `tail -f` until interrupted.
+        interval (float): Seconds between checks in continuous mode.
+        max_lines (int): Line numbers and crash lines kept per category. None keeps all.
+        verbosity (str): Console output, 'summary', 'progress' or 'full'.
+        engine (str): "text" or "mmap", the engine scanning the appended lines.
+    """
+    def on_update(follower):
+        if follower.rotated is not None:
+            rotated_path, rotated_results = follower.rotated
+            if rotated_path is not None:
+                base, extension = os.path.splitext(save_path)
+                rotated_name = os.path.splitext(os.path.basename(rotated_path))[0]
+                write_report(f"{base}_{rotated_name}{extension}", rotated_path, *rotated_results, verbosity=verbosity,
+                             crash_category=crash_category(error_data))
+            print(f"Log was rotated or truncated; restarted analysis of {file_path}")
+        write_report(save_path, file_path, *follower.results, verbosity=verbosity,
+                     crash_category=crash_category(error_data))
+
+    follower = LogFollower(file_path, error_data, max_lines=max_lines, engine=engine)
+    follower.update()
+    on_update(follower)
+    if continuous:
+        try:
+            follower.follow(on_update, interval)
+        except KeyboardInterrupt:
+            print("Stopped following.")
+
+def main(file_path=None, save_path=None, workers=None, engine="text", max_lines=None,
+         incremental=False, follow=False, interval=1.0, verbosity="progress", progress=None, traces=False,
+         window=None, profile=False, discover=False, pstats_path=None):
+    """
+    Analyzes one log file and writes its report, prompting for missing paths.
+
+    Args:
+        progress (ScanProgress): Receives the progress of the scan; cancelling it stops
+            the scan without writing a report.
+        traces (bool): Group the Java stack traces of the log into ranked crash signatures.
+        window (TimeWindow): Only analyze the lines inside this time window; a plain log
+            with ordered timestamps is only read inside the window.
+        profile (bool): Time the stages and keyword categories of the analysis and save
+            them as <report>_profile.json, see ScanProfile.
+        pstats_path (str): Where the cProfile stats of the run are saved (cli.py --pstats),
+            named in the profile.
+        discover (bool): Mine the error lines no keyword matched into templates, listed as
+            candidate new keywords at the end of the report; done during the scan's read.
+
+    Returns:
+        int: Exit code, 0 when the report was written and 1 otherwise.
+    """
+    config = read_keywords()  # Validated and compiled before anything is scanned
+    if config is None:
+        return 1
+    error_data = config.error_data
 
     # Use the provided file_path or prompt the user if it is not provided
     if file_path is None:
         file_path = browse_file()
     if not file_path:
         print("No file selected. Exiting...")
-        return
+        return 1
+
+    # A zip bundle can be analyzed directly when it holds a single log
+    if is_zip(file_path):
+        try:
+            members = zip_members(file_path)
+        except (OSError, zipfile.BadZipFile) as e:
+            print(f"Error: Unable to read '{file_path}'. {e}")
+            return 1
+        if len(members) != 1:
+            print(f"Error: '{file_path}' holds {len(members)} logs. Analyze its folder instead, "
+                  f"or pick one log as '{file_path}{MEMBER_SEPARATOR}<member>'.")
+            return 1
+        file_path = member_path(file_path, members[0])
+    if (incremental or follow) and is_compressed(file_path):
+        print("Error: --incremental and --follow need an uncompressed log.")
+        return 1
+    if (incremental or follow) and traces:
+        print("Error: --traces can't be combined with --incremental or --follow.")
+        return 1
+    if window is not None and (incremental or follow or traces):
+        print("Error: --since and --until can't be combined with --incremental, --follow or --traces.")
+        return 1
+    if profile and (incremental or follow):
+        print("Error: --profile can't be combined with --incremental or --follow.")
+        return 1
+    if discover and (incremental or follow):
+        print("Error: --discover can't be combined with --incremental or --follow.")
+        return 1
 
     # Use the provided save_path or prompt the user if it is not provided
     if save_path is None:
         save_path = prompt_save_file()
     if not save_path:
         print("No save location selected. Exiting...")
-        return
+        return 1
 
     try:
-        with open(save_path, 'w') as output_file:
-            def write_and_print(line):
-                print(line)
-                output_file.write(line + '\n')
-
-            write_and_print(f"Consolidated Error Analysis Report\n")
-            write_and_print(f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            write_and_print(f"File: {file_path}\n")
-            write_and_print("=" * 50 + "\n")
-
-            found_errors_line, unique_lines_per_error, crashed_occurrences = search_errors(file_path, error_data)
-
-            for error_type, data in found_errors_line.items():
-                write_and_print(f"\n{error_type}:")
-                write_and_print(f"  Total Occurrences: {data['count']}")
-                if data['lines']:
-                    write_and_print(f"  Found on Lines: {', '.join(map(str, data['lines']))}\n")
-                    if error_type == "Crashed":
-                        write_and_print("  Errors Found:")
-                        for line_num, line_content in crashed_occurrences:
-                            write_and_print(f"    Line {line_num}: {line_content}")
-                    else:
-                        write_and_print("  Known Errors:")
-                        for keyword, line_content in unique_lines_per_error[error_type].items():
-                            write_and_print(f"    - {keyword}: {line_content}")
-                else:
-                    write_and_print("  No occurrences found.\n")
-
-            write_and_print("=" * 50 + "\n")
-
+        if incremental or follow:
+            # Resume from the byte offset saved by the previous run
+            follow_log(file_path, save_path, error_data, continuous=follow, interval=interval, max_lines=max_lines,
+                       verbosity=verbosity, engine=engine)
+            print(f"\nAnalysis complete. Consolidated report saved to {save_path}")
+            return 0
+
+        if progress is not None:
+            progress.add_file(file_path)
+            progress.discovery_done = True
+        scan_profile = ScanProfile(error_data, config.matcher) if profile else None
+        templates = TemplateMiner() if discover else None
+        on_miss = templates.feed if templates is not None else None
+        with stage(scan_profile, "scan"):
+            if window is not None:
+                # Only the window's bytes are scanned, which a split across processes wouldn't speed up
+                scan = get_engine(engine, window)(file_path, error_data, config.matcher, max_lines,
+                                                  progress=progress, on_miss=on_miss)
+            elif workers and workers > 1:
+                # Split the file into byte ranges scanned by several processes
+                scan = search_errors_chunked(file_path, error_data, workers, max_lines=max_lines,
+                                             progress=progress, templates=templates, engine=engine)
+            else:
+                search_errors = get_engine(engine)
+                scan = search_errors(file_path, error_data, config.matcher, max_lines, progress=progress,
+                                     on_miss=on_miss)
+        if scan_profile is not None:
+            scan_profile.add_file(file_path, file_path, scan_profile.stages["scan"], scan)
+        signatures = None
+        if traces:
+            with stage(scan_profile, "traces"):
+                signatures = collect_traces(file_path, progress)
+        if progress is not None:
+            progress.file_done(file_path, scan)
+
+        with stage(scan_profile, "report"):
+            write_report(save_path, file_path, *scan, verbosity=verbosity, crash_category=crash_category(error_data),
+                         signatures=signatures, window=window, templates=templates)
+        if scan_profile is not None:
+            scan_profile.save(f"{os.path.splitext(save_path)[0]}_profile.json", pstats_path)
         print(f"\nAnalysis complete. Consolidated report saved to {save_path}")
+        return 0
+    except ScanCancelled:
+        print("Analysis cancelled. No report was written.")
     except IOError as e:
         print(f"Error: Unable to write to file {save_path}. {e}")
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
+    return 1
 
 if __name__ == "__main__":
-    main()
+    import multiprocessing
+    import cli
+
+    multiprocessing.freeze_support()  # Needed for the worker pool in the PyInstaller build
+    sys.exit(cli.main(["analyze-file", *sys.argv[1:]]))
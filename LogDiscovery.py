@@ -0,0 +1,175 @@
+import fnmatch
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from CompressedInput import ZIP_EXTENSION
+
+# File names picked up when no include globs are given
+DEFAULT_INCLUDE = ("*.txt",)
+
+# Threads listing directories ahead of the walk; directory listings mostly wait on the
+# file system (often a network share), so threads overlap well despite the GIL
+DEFAULT_WALK_WORKERS = 8
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(text):
+    """Parses a size like '500', '64K', '10M' or '2G' into bytes."""
+    text = text.strip().upper().rstrip("B")
+    unit = text[-1:] if text[-1:] in _SIZE_UNITS else ""
+    try:
+        return int(float(text[:len(text) - len(unit)]) * _SIZE_UNITS[unit])
+    except ValueError:
+        raise ValueError(f"Invalid size '{text}'. Use bytes or a K/M/G suffix, e.g. 10M.")
+
+
+def parse_time(text):
+    """Parses an ISO date or date-time like '2024-05-01' or '2024-05-01T13:00' into a timestamp."""
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        raise ValueError(f"Invalid date '{text}'. Use YYYY-MM-DD or YYYY-MM-DDTHH:MM.")
+
+
+class LogFilter:
+    """
+    Decides which files of a log tree are analyzed.
+
+    Include globs are matched against file names, exclude globs against both the name
+    and the path relative to the root, so 'tmp' or 'device1/old/*' prune whole folders.
+    Size and modification time filters are optional.
+    """
+
+    def __init__(self, include=DEFAULT_INCLUDE, exclude=(), min_size=None, max_size=None,
+                 newer_than=None, older_than=None):
+        """
+        Args:
+            include (iterable): Globs a file name has to match, e.g. ('*.txt', '*.log').
+            exclude (iterable): Globs of files and folders to skip.
+            min_size (int): Smallest file size in bytes, or None.
+            max_size (int): Largest file size in bytes, or None.
+            newer_than (float): Only files modified at or after this timestamp, or None.
+            older_than (float): Only files modified before this timestamp, or None.
+        """
+        self.include = tuple(include) or DEFAULT_INCLUDE
+        self.exclude = tuple(exclude)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.newer_than = newer_than
+        self.older_than = older_than
+        self._needs_stat = any(value is not None for value in (min_size, max_size, newer_than, older_than))
+
+    def _excluded(self, name, relative_path):
+        return any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relative_path, pattern)
+                   for pattern in self.exclude)
+
+    def accepts_dir(self, name, relative_path):
+        return not self._excluded(name, relative_path)
+
+    def accepts_member(self, name, relative_path):
+        """
+        Whether a member of a zip bundle is analyzed, by its name and its path below the root.
+
+        Include globs selecting the bundles themselves, like '*.zip', are not asked of
+        their members; when there are no others, members must match DEFAULT_INCLUDE.
+        Exclude globs also prune the folders inside the bundle. Size and time filters
+        apply to the bundle only.
+        """
+        include = tuple(pattern for pattern in self.include if not pattern.lower().endswith(ZIP_EXTENSION))
+        if not any(fnmatch.fnmatch(name, pattern) for pattern in include or DEFAULT_INCLUDE):
+            return False
+        parts = relative_path.split(os.sep)
+        return not any(self._excluded(part, os.sep.join(parts[:depth]))
+                       for depth, part in enumerate(parts, start=1))
+
+    def accepts_file(self, entry, relative_path):
+        if not any(fnmatch.fnmatch(entry.name, pattern) for pattern in self.include):
+            return False
+        if self._excluded(entry.name, relative_path):
+            return False
+        if not self._needs_stat:
+            return True
+        stat = entry.stat()
+        if self.min_size is not None and stat.st_size < self.min_size:
+            return False
+        if self.max_size is not None and stat.st_size > self.max_size:
+            return False
+        if self.newer_than is not None and stat.st_mtime < self.newer_than:
+            return False
+        if self.older_than is not None and stat.st_mtime >= self.older_than:
+            return False
+        return True
+
+
+def _list_dir(path, relative_path, log_filter, skip):
+    """Lists one directory, returning its matching files and subfolders as (relative, full) paths."""
+    files = []
+    folders = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                relative = os.path.join(relative_path, entry.name) if relative_path else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    skipped = os.path.normcase(os.path.abspath(entry.path)) in skip
+                    if not skipped and log_filter.accepts_dir(entry.name, relative):
+                        folders.append((relative, entry.path))
+                elif entry.is_file() and log_filter.accepts_file(entry, relative):
+                    files.append((relative, entry.path))
+    except OSError as e:
+        print(f"Warning: Skipping folder '{path}'. {e}")
+    # Sorted by name, so every machine walks the same folder in the same order
+    files.sort()
+    folders.sort()
+    return files, folders
+
+
+def discover_logs(folder_path, log_filter=None, recursive=False, skip=(), walk_workers=DEFAULT_WALK_WORKERS):
+    """
+    Yields the log files of a folder, streaming them while the walk is still going.
+
+    Files come in name order: the files of a folder first, then its subfolders one
+    by one. In recursive mode subfolders are listed by a thread pool ahead of the walk,
+    so a slow file system listing many device folders doesn't hold up the scans.
+
+    Args:
+        folder_path (str): Folder to search.
+        log_filter (LogFilter): Which files to yield. None yields all *.txt files.
+        recursive (bool): Also search all subfolders.
+        skip (iterable): Folders never entered, e.g. the analysis output folder.
+        walk_workers (int): Threads listing folders ahead; 1 lists them one at a time.
+
+    Yields:
+        tuple: (relative_path, path) of every matching file.
+    """
+    if log_filter is None:
+        log_filter = LogFilter()
+    skip = {os.path.normcase(os.path.abspath(path)) for path in skip}
+
+    executor = ThreadPoolExecutor(walk_workers) if recursive and walk_workers > 1 else None
+
+    def listing(path, relative_path):
+        """Returns a function giving the listing, which already runs in the background with threads."""
+        if executor is None:
+            return lambda: _list_dir(path, relative_path, log_filter, skip)
+        return executor.submit(_list_dir, path, relative_path, log_filter, skip).result
+
+    stack = deque([listing(folder_path, "")])
+    try:
+        while stack:
+            files, folders = stack.pop()()
+            yield from files
+            if recursive:
+                # Listings of all subfolders start now; they are walked in listing order
+                stack.extend(reversed([listing(path, relative) for relative, path in folders]))
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def device_of(relative_path, default):
+    """Returns the device a log belongs to: its top-level subfolder, or default for top-level files."""
+    head, _, rest = relative_path.partition(os.sep)
+    return head if rest else default
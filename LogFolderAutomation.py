@@ -1,27 +1,39 @@
-import json
 import os
-from tkinter import Tk
-from tkinter.filedialog import askdirectory
 from datetime import datetime
 import sys
-
-
-def resource_path(relative_path):
-    """ Get the absolute path to a resource, works for both development and PyInstaller bundled mode """
-    if getattr(sys, 'frozen', False):  # Check if running as a PyInstaller bundle
-        base_path = sys._MEIPASS  # Temporary folder used by PyInstaller
-    else:
-        base_path = os.path.abspath(".")  # Current working directory during development
-    return os.path.join(base_path, relative_path)
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, count
+from CompressedInput import expand_archives
+from KeywordConfig import read_keywords
+from KeywordMatcher import crash_category
+from HitTimeline import HitTimeline
+from LogDiscovery import LogFilter, device_of, discover_logs
+from LogScanner import get_engine, init_scan_worker, scan_categories, scan_file_in_worker, trace_file_in_worker
+from LogTemplates import TemplateMiner
+from ReportWriter import PROGRESS, ReportWriter, write_results, write_signatures, write_templates, write_timeline
+from ResultCache import ResultCache, assemble_results, file_fingerprint
+from ScanProfile import ScanProfile, stage
+from ScanProgress import ScanCancelled
+from ShardResults import SHARD_EXTENSION, ShardPartial, ShardSelector, merge_partials, shard_settings
+from StackTraces import TraceSignatures, collect_traces
+from StructuredOutput import SummaryCsv, append_hits
 
 
 def browse_folder():
+    # tkinter is only loaded when a dialog is needed, so headless runs never import it
+    from tkinter import Tk
+    from tkinter.filedialog import askdirectory
+
     Tk().withdraw()  # Hide the main tkinter window
     folder_path = askdirectory(title="Select a folder containing log files")
     return folder_path
 
 
 def choose_save_location():
+    from tkinter import Tk
+    from tkinter.filedialog import askdirectory
+
     Tk().withdraw()  # Hide the main tkinter window
     folder_path = askdirectory(title="Select a location to save the analysis folder")
     return folder_path
@@ -36,82 +48,246 @@ def create_analysis_folder(base_path, folder_name):
     return full_path
 
 
-def search_errors(log_file, error_data):
-    results = {}
-    unique_lines_per_error = {}
-    crashed_occurrences = []
-
-    for error_type in error_data:
-        results[error_type] = {"count": 0, "lines": []}
-        unique_lines_per_error[error_type] = {}
-
-    with open(log_file, 'r', encoding='utf-8') as log_file:
-        for line_num, line in enumerate(log_file, start=1):
-            line_lower = line.lower()
-
-            for error_type, details in error_data.items():
-                if error_type == "Crashed":
-                    if "crashed" in line_lower:
-                        results[error_type]["count"] += 1
-                        results[error_type]["lines"].append(line_num)
-                        crashed_occurrences.append((line_num, line.strip()))
-                else:
-                    matched = False  # Prevent multiple counts per line
-                    for keyword in details["keywords"]:
-                        if keyword.lower() in line_lower:
-                            if not matched:
-                                results[error_type]["count"] += 1  # Count only once per line
-                                results[error_type]["lines"].append(line_num)
-                                matched = True  # Prevent further increments for this line
-                            if keyword not in unique_lines_per_error[error_type]:
-                                unique_lines_per_error[error_type][keyword] = line.strip()
-
-    return results, unique_lines_per_error, crashed_occurrences
+def scan_files(files, error_data, workers=None, engine="text", max_lines=None, cache=None, hits_path=None,
+               progress=None, traces=None, window=None, matcher=None, templates=None, timeline=None):
+    """
+    Runs search_errors on every file and yields the results in the order of `files`.
+
+    Files are taken from `files` as scans finish, so scanning starts while discovery is
+    still walking the folder tree. With workers, a few files per worker are scanned
+    ahead of the one being reported.
+
+    Args:
+        files (iterable): (label, path) of the log files to scan; the label names the
+            file in the reports, e.g. its path relative to the analyzed folder.
+        error_data (dict): Parsed keywords.json.
+        workers (int): Number of worker processes. None or 1 scans serially in this process.
+        engine (str): Scan engine, "text" or "mmap".
+        max_lines (int): Line numbers and crash lines kept per category. None keeps all.
+        cache (ResultCache): Serves unchanged files and categories without rescanning.
+        hits_path (str): JSON Lines file receiving every hit, in file order. Cached results
+            carry no hits, so with it every file is rescanned (and the cache refreshed).
+        progress (ScanProgress): Receives the bytes and files scanned and can cancel the scan.
+        traces (TraceSignatures): Receives the stack trace signatures of every file, merged
+            in file order. Traces are never cached, so they are collected for cached files too.
+        window (TimeWindow): Only scan the lines inside this time window. Not combined with
+            the cache, whose results cover whole files.
+        matcher (KeywordMatcher): error_data already compiled, e.g. KeywordConfig.matcher.
+        templates (TemplateMiner): Receives the templates mined from the error lines without
+            a hit of every file, merged in file order. They are mined while the file is
+            scanned, so like with hits_path every file is rescanned.
+        timeline (HitTimeline): Receives the hits per minute of every file; also rescans
+            every file, as the cache keeps no hit times.
+
+    Yields:
+        tuple: (label, (results, unique_lines_per_error, crashed_occurrences)) for each file.
+    """
+    parallel = workers is not None and workers > 1
+    executor = None
+    search_errors = get_engine(engine, window)
+    matchers = {} if matcher is None else {tuple(error_data): matcher}  # Compiled once for every file
+    part_numbers = count()
+    queue = deque()
+
+    def start(label, file_path):
+        # Work out which categories of the file still have to be scanned
+        cached, missing, fingerprint = [], None, None
+        if cache is not None:
+            if hits_path is not None or templates is not None or timeline is not None:
+                fingerprint = file_fingerprint(file_path)
+            else:
+                cached, missing, fingerprint = cache.lookup(file_path, error_data, engine, max_lines)
+                missing = missing if cached else None
+        job = {"label": label, "path": file_path, "cached": cached, "missing": missing,
+               "fingerprint": fingerprint, "hits": None, "future": None, "size": None, "traces": None}
+        if progress is not None:
+            job["size"] = progress.add_file(file_path)
+        if traces is not None and parallel:
+            job["traces"] = pool().submit(trace_file_in_worker, file_path)
+        if cached and not missing:
+            return job
+
+        if hits_path is not None:
+            # Serial scans append to the JSON Lines file directly, workers to one part file each
+            job["hits"] = (f"{hits_path}.part{next(part_numbers)}" if parallel else hits_path, label)
+        if parallel:
+            job["future"] = pool().submit(scan_file_in_worker, file_path, missing, job["hits"], templates is not None,
+                                          timeline is not None)
+        return job
+
+    def pool():
+        nonlocal executor
+        if executor is None:
+            channel = progress.worker_channel() if progress is not None else None
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=init_scan_worker,
+                                           initargs=(error_data, engine, max_lines, channel, window))
+        return executor
+
+    def finish(job):
+        file_path, cached = job["path"], job["cached"]
+        scan = file_templates = file_timeline = None
+        if not cached or job["missing"]:
+            future = job["future"]
+            if future is not None:
+                scan, file_templates, file_timeline = future.result() if progress is None else progress.wait(future)
+                if job["hits"] is not None:
+                    append_hits(hits_path, job["hits"][0])
+            else:
+                file_templates = TemplateMiner() if templates is not None else None
+                file_timeline = HitTimeline(error_data) if timeline is not None else None
+                scan = scan_categories(file_path, error_data, job["missing"], search_errors, matchers, max_lines,
+                                       job["hits"], progress, file_templates, file_timeline)
+        elif progress is not None:
+            progress.advance(job["size"])  # Served from the cache without scanning
+
+        if cache is not None:
+            if scan is not None:
+                cache.store(file_path, job["fingerprint"], error_data, scan, engine, max_lines)
+            if cached:
+                scan = assemble_results(error_data, cache.load(file_path, error_data, cached, engine, max_lines),
+                                        scan)
+        if traces is not None:
+            future = job["traces"]
+            if future is None:
+                file_traces = collect_traces(file_path, progress)
+            else:
+                file_traces = future.result() if progress is None else progress.wait(future)
+            traces.merge(file_traces, job["label"])
+        if file_templates is not None:
+            templates.merge(file_templates, job["label"])
+        if file_timeline is not None:
+            timeline.merge(file_timeline)
+        if progress is not None:
+            progress.file_done(job["label"], scan)
+        return job["label"], scan
+
+    # Results are handed back in submission order, so reports match a serial run
+    ahead = workers * 2 if parallel else 0
+    try:
+        for label, file_path in files:
+            queue.append(start(label, file_path))
+            if len(queue) > ahead:
+                yield finish(queue.popleft())
+        if progress is not None:
+            progress.discovery_done = True
+        while queue:
+            yield finish(queue.popleft())
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+            # Parts of files that were never appended, e.g. after an error
+            for job in queue:
+                if job["hits"] is not None and os.path.exists(job["hits"][0]):
+                    os.remove(job["hits"][0])
+
+
+def write_priority_files(priority_file, sorted_files):
+    for file_name, data in sorted_files:
+        priority_file.write(f"File: {file_name}\n")
+        priority_file.write("_" * 50 + "\n")
+        priority_file.write(f"  Crashed Errors: {data['Crashed']}\n")
+        priority_file.write(f"  New Errors: {data['New Errors']}\n")
+        priority_file.write(f"  Known Errors: {data['Known Errors']}\n\n")
+        priority_file.write("=" * 50 + "\n\n")
 
 
 def save_priority_report(file_data, folder_name, analysis_folder):
+    """
+    Writes the summary report with the files with the most crashes first.
+
+    When logs come from subfolders (one per device), files are grouped per device, with
+    the devices with the most crashes first and their totals in the group header.
+    """
     current_date = datetime.now().strftime("%Y-%m-%d")
     priority_file_name = os.path.join(analysis_folder, f"{folder_name}_ReportSummary_{current_date}.txt")
 
     sorted_files = sorted(file_data.items(), key=lambda x: x[1]['Crashed'], reverse=True)
 
+    devices = {}
+    for file_name, data in sorted_files:
+        devices.setdefault(device_of(file_name, folder_name), []).append((file_name, data))
+
     with open(priority_file_name, 'w') as priority_file:
         priority_file.write(f"Priority Analysis Report\n")
         priority_file.write(f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
         priority_file.write(f"Folder: {folder_name}\n")
         priority_file.write("=" * 500 + "\n")
 
-        for file_name, data in sorted_files:
-            priority_file.write(f"File: {file_name}\n")
-            priority_file.write("_" * 50 + "\n")
-            priority_file.write(f"  Crashed Errors: {data['Crashed']}\n")
-            priority_file.write(f"  New Errors: {data['New Errors']}\n")
-            priority_file.write(f"  Known Errors: {data['Known Errors']}\n\n")
-            priority_file.write("=" * 50 + "\n\n")
+        if list(devices) == [folder_name]:
+            write_priority_files(priority_file, sorted_files)
+        else:
+            totals = {
+                device: {key: sum(data[key] for _, data in files) for key in ("Crashed", "New Errors", "Known Errors")}
+                for device, files in devices.items()
+            }
+            for device in sorted(devices, key=lambda device: totals[device]['Crashed'], reverse=True):
+                total = totals[device]
+                priority_file.write(f"Device: {device} ({len(devices[device])} files)\n")
+                priority_file.write(f"  Crashed Errors: {total['Crashed']}\n")
+                priority_file.write(f"  New Errors: {total['New Errors']}\n")
+                priority_file.write(f"  Known Errors: {total['Known Errors']}\n")
+                priority_file.write("=" * 50 + "\n\n")
+                write_priority_files(priority_file, devices[device])
 
     print(f"Priority report saved to {priority_file_name}")
 
 
-def main(folder_path=None, save_path=None):
-    json_file_path = resource_path('keywords.json')  # Locate the JSON file
-    try:
-        with open(json_file_path, 'r') as f:
-            error_data = json.load(f)
-    except FileNotFoundError:
-        print(f"Error: Could not find the file 'keywords.json' at {json_file_path}.")
-        return
+def main(folder_path=None, save_path=None, workers=None, engine="text", max_lines=None, cache_path=None,
+         verbosity="progress", extra_sinks=(), jsonl=False, csv_summary=False, recursive=False, log_filter=None,
+         progress=None, traces=False, window=None, profile=False, discover=False, timeline=False, shard=None,
+         cache=None, pstats_path=None):
+    """
+    Analyzes the logs in a folder and writes the reports, prompting for missing paths.
+
+    Args:
+        recursive (bool): Also analyze the logs in all subfolders, grouped per device
+            (top-level subfolder) in the summary report.
+        log_filter (LogFilter): Which files to analyze. None analyzes all *.txt files.
+        progress (ScanProgress): Receives the progress of the scans; cancelling it stops
+            the analysis before the summary report is written.
+        traces (bool): Group the Java stack traces of all files into crash signatures,
+            ranked at the end of the consolidated report.
+        window (TimeWindow): Only analyze the lines inside this time window.
+        profile (bool): Time the stages, logs and keyword categories of the analysis and
+            save them as a JSON file next to the summary report, see ScanProfile.
+        pstats_path (str): Where the cProfile stats of the run are saved (cli.py --pstats),
+            named in the profile.
+        discover (bool): Mine the error lines no keyword matched into templates, ranked as
+            candidate new keywords at the end of the consolidated report.
+        timeline (bool): Count the hits of all files per logcat minute, list the spikes at
+            the end of the consolidated report and save the series as a CSV file.
+        shard (tuple): (i, N) to only analyze the i-th of N shards of the logs and save
+            their results as a partial for merge_main instead of writing the reports.
+        cache (ResultCache): Open cache of cache_path, used instead of opening it and left
+            open, e.g. the one the analysis daemon keeps between jobs.
+
+    Returns:
+        int: Exit code, 0 when the reports were written and 1 otherwise.
+    """
+    config = read_keywords()  # Validated and compiled before anything is scanned
+    if config is None:
+        return 1
+    error_data = config.error_data
+    crash = crash_category(error_data)
+    if window is not None and (cache_path or traces):
+        print("Error: --since and --until can't be combined with --cache or --traces.")
+        return 1
+    if shard is not None and (jsonl or csv_summary or traces or discover or timeline):
+        print("Error: --shard can't be combined with --jsonl, --csv, --traces, --discover or --timeline; "
+              "pass --csv to merge instead.")
+        return 1
 
     # If folder_path is not provided, prompt the user to select a folder
     if folder_path is None:
         folder_path = browse_folder()
         if not folder_path:
             print("No folder selected. Exiting...")
-            return
+            return 1
 
     # Validate that folder_path is a valid directory
     if not os.path.isdir(folder_path):
         print(f"Error: '{folder_path}' is not a valid directory. Exiting...")
-        return
+        return 1
 
     # Extract the folder name from the folder_path
     folder_name = os.path.basename(folder_path)
@@ -121,77 +297,253 @@ def main(folder_path=None, save_path=None):
         save_path = choose_save_location()
         if not save_path:
             print("No save location selected. Exiting...")
-            return
+            return 1
 
     # Validate that save_path is a valid directory
     if not os.path.isdir(save_path):
         print(f"Error: '{save_path}' is not a valid directory. Exiting...")
-        return
+        return 1
 
     # Create an analysis folder in the save location
     analysis_folder = create_analysis_folder(save_path, folder_name)
 
-    # Find all .txt files in the selected folder
-    txt_files = [f for f in os.listdir(folder_path) if f.endswith('.txt')]
-
-    if not txt_files:
-        print("No .txt files found in the selected folder. Exiting...")
-        return
+    # Log files are found while the first ones are already being scanned; zip bundles
+    # are replaced by their members, each analyzed as a log of its own
+    if log_filter is None:
+        log_filter = LogFilter()
+    files = expand_archives(discover_logs(folder_path, log_filter, recursive, skip=(analysis_folder,)), log_filter)
+    first_file = next(files, None)
+    if first_file is None:
+        print(f"No {', '.join(log_filter.include)} files found in the selected folder. Exiting...")
+        return 1
 
     current_date = datetime.now().strftime("%Y-%m-%d")
     output_file_path = os.path.join(analysis_folder, f"{folder_name}_ExceptionAnalysis_{current_date}.txt")
 
-    file_error_data = {}
+    own_cache = cache is None and bool(cache_path)
+    if own_cache:
+        cache = ResultCache(cache_path)
+
+    # Machine-readable outputs next to the text reports, streamed while the scans run
+    hits_path = None
+    if jsonl:
+        hits_path = os.path.join(analysis_folder, f"{folder_name}_Hits_{current_date}.jsonl")
+        open(hits_path, 'w').close()  # Hits are appended file by file
+    summary_csv = None
+    if csv_summary:
+        summary_csv = SummaryCsv(os.path.join(analysis_folder, f"{folder_name}_FileSummary_{current_date}.csv"),
+                                 error_data)
+
+    # Scans run ahead in the worker pool while the report is written in file order
+    signatures = TraceSignatures() if traces else None
+    templates = TemplateMiner() if discover else None
+    hit_timeline = HitTimeline(error_data) if timeline else None
+    scan_profile = ScanProfile(error_data, config.matcher) if profile else None
+    files = chain([first_file], files)
+    selector = None
+    if shard is not None:
+        selector = ShardSelector(*shard)
+        files = selector.select(files)
+    if scan_profile is not None:
+        files = scan_profile.track_files(files)
+    scans = scan_files(files, error_data, workers, engine, max_lines, cache, hits_path, progress, signatures, window,
+                       config.matcher, templates, hit_timeline)
+    if scan_profile is not None:
+        scans = scan_profile.timed_scans(scans)
+
+    if shard is not None:
+        code = save_shard(scans, shard, selector, folder_path, folder_name, analysis_folder, current_date, error_data,
+                          shard_settings(error_data, engine, max_lines, window, recursive, log_filter), verbosity)
+        if code == 0 and scan_profile is not None:
+            scan_profile.save(os.path.join(analysis_folder,
+                                           f"{folder_name}_Shard{shard[0]}of{shard[1]}_Profile_{current_date}.json"),
+                              pstats_path)
+        if cache is not None:
+            if code == 0:
+                cache.evict()
+                print(cache.summary())
+            if own_cache:
+                cache.close()
+        return code
 
-    # Write the analysis to the output file
-    with open(output_file_path, 'w') as output_file:
-        def write_and_print(line):
-            print(line)
-            output_file.write(line + '\n')
+    try:
+        # Write the analysis to the output file while the scans are still running
+        file_error_data = write_analysis(output_file_path, folder_path, scans, crash, verbosity, extra_sinks, window,
+                                         summary_csv, signatures, templates, hit_timeline, scan_profile)
+    except ScanCancelled:
+        if summary_csv is not None:
+            summary_csv.close()
+        if own_cache:
+            cache.close()
+        print(f"\nAnalysis cancelled. The report in {output_file_path} only covers the files finished so far.")
+        return 1
+
+    with stage(scan_profile, "summary"):
+        save_priority_report(file_error_data, folder_name, analysis_folder)
+    if scan_profile is not None:
+        scan_profile.save(os.path.join(analysis_folder, f"{folder_name}_Profile_{current_date}.json"), pstats_path)
+    if hit_timeline is not None:
+        timeline_path = os.path.join(analysis_folder, f"{folder_name}_Timeline_{current_date}.csv")
+        hit_timeline.write_csv(timeline_path)
+    print(f"\nAnalysis complete. Consolidated report saved to {output_file_path}")
+    if hits_path is not None:
+        print(f"Hits saved to {hits_path}")
+    if summary_csv is not None:
+        summary_csv.close()
+        print(f"File summary saved to {summary_csv.path}")
+    if hit_timeline is not None:
+        print(f"Hits per minute saved to {timeline_path}")
+    if cache is not None:
+        cache.evict()
+        print(cache.summary())
+        if own_cache:
+            cache.close()
+
+    print(f"Folder Path: {folder_path}")
+    print(f"Save Path: {save_path}")
+    return 0
 
-        write_and_print(f"Consolidated Error Analysis Report\n")
-        write_and_print(f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        write_and_print(f"Folder: {folder_path}\n")
-        write_and_print("=" * 500 + "\n")
 
-        for file_name in txt_files:
-            file_path = os.path.join(folder_path, file_name)
-            write_and_print(f"Analyzing File: {file_name}\n")
-            write_and_print("=" * 500)
+def write_analysis(output_file_path, folder_path, scans, crash, verbosity="progress", extra_sinks=(), window=None,
+                   summary_csv=None, signatures=None, templates=None, hit_timeline=None, scan_profile=None):
+    """
+    Writes the consolidated report of a folder from the results of its logs.
 
-            found_errors_line, unique_lines_per_error, crashed_occurrences = search_errors(file_path, error_data)
+    Args:
+        output_file_path (str): Path of the consolidated report.
+        folder_path (str): Analyzed folder, shown in the header.
+        scans (iterable): (label, (results, unique_lines_per_error, crashed_occurrences))
+            of every log, in report order, e.g. from scan_files.
+        crash (str): Category listed line by line, see KeywordMatcher.crash_category.
+
+    Returns:
+        dict: The priority data of every log for save_priority_report.
+    """
+    file_error_data = {}
+    with ReportWriter.open(output_file_path, verbosity, extra_sinks) as writer:
+        writer.line(f"Consolidated Error Analysis Report\n")
+        writer.line(f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        writer.line(f"Folder: {folder_path}\n")
+        if window is not None:
+            writer.line(f"Time window: {window}\n")
+        writer.line("=" * 500 + "\n")
+
+        for file_name, (found_errors_line, unique_lines_per_error, crashed_occurrences) in scans:
+            writer.line(f"Analyzing File: {file_name}\n", level=PROGRESS)
+            writer.line("=" * 500)
 
             file_error_data[file_name] = {
-                "Crashed": found_errors_line.get("Crashed", {}).get("count", 0),
-                "New Errors": sum([found_errors_line[et]["count"] for et in found_errors_line if et != "Crashed"]),
+                "Crashed": found_errors_line.get(crash, {}).get("count", 0),
+                "New Errors": sum([found_errors_line[et]["count"] for et in found_errors_line if et != crash]),
                 "Known Errors": sum(1 for et in unique_lines_per_error if unique_lines_per_error[et])  # Only count non-empty errors
             }
+            if summary_csv is not None:
+                summary_csv.write_row(file_name, file_error_data[file_name], found_errors_line)
+
+            with stage(scan_profile, "report"):
+                write_results(writer, found_errors_line, unique_lines_per_error, crashed_occurrences, crash)
+
+            writer.line("=" * 500 + "\n")
+
+        if signatures is not None:
+            with stage(scan_profile, "report"):
+                write_signatures(writer, signatures, per_file=True)
+        if templates is not None:
+            with stage(scan_profile, "report"):
+                write_templates(writer, templates, per_file=True)
+        if hit_timeline is not None:
+            with stage(scan_profile, "report"):
+                write_timeline(writer, hit_timeline)
+    return file_error_data
+
+
+def save_shard(scans, shard, selector, folder_path, folder_name, analysis_folder, current_date, error_data,
+               settings, verbosity="progress"):
+    """
+    Collects the results of one shard's logs and saves them for merge_main instead of writing reports.
+
+    Args:
+        scans (iterable): (label, scan) of the shard's logs from scan_files.
+        shard (tuple): (i, N) of the shard.
+        selector (ShardSelector): The selector that picked the logs from the folder.
+        settings (str): shard_settings of the analysis.
+
+    Returns:
+        int: Exit code, 0 when the partial result was saved and 1 otherwise.
+    """
+    partial = ShardPartial(shard, folder_path, folder_name, settings, error_data)
+    try:
+        for label, scan in scans:
+            if verbosity != "summary":
+                print(f"Analyzed File: {label}")
+            partial.files.append((selector.positions[label], label, scan))
+    except ScanCancelled:
+        print("\nAnalysis cancelled. No partial result was written.")
+        return 1
+    partial.files_total = selector.files_total
+    partial.fingerprint = selector.fingerprint
+    partial_path = os.path.join(analysis_folder,
+                                f"{folder_name}_Shard{shard[0]}of{shard[1]}_{current_date}{SHARD_EXTENSION}")
+    try:
+        partial.save(partial_path)
+    except OSError as e:
+        print(f"Error: Unable to write to file {partial_path}. {e}")
+        return 1
+    print(f"\nShard {shard[0]}/{shard[1]} analyzed {len(partial.files)} of {partial.files_total} files. "
+          f"Partial result saved to {partial_path}")
+    return 0
+
+
+def merge_main(partial_paths, save_path, verbosity="progress", csv_summary=False):
+    """
+    Merges the partial results of all shards of a folder analysis into its reports.
+
+    The consolidated and summary reports are the ones a single analyze-folder run on
+    the whole folder writes, apart from their dates.
+
+    Args:
+        partial_paths (list): Files written by analyze-folder --shard, one per shard.
+        save_path (str): Folder where the analysis folder is created.
+        verbosity (str): Console output, 'summary', 'progress' or 'full'.
+        csv_summary (bool): Also write a CSV with the error counts of every file.
+
+    Returns:
+        int: Exit code, 0 when the reports were written and 1 otherwise.
+    """
+    if not os.path.isdir(save_path):
+        print(f"Error: '{save_path}' is not a valid directory. Exiting...")
+        return 1
+    try:
+        merged = merge_partials([ShardPartial.load(path) for path in partial_paths])
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
 
-            for error_type, data in found_errors_line.items():
-                write_and_print(f"\n{error_type}:")
-                write_and_print(f"  Total Occurrences: {data['count']}")
-                if data['lines']:
-                    write_and_print(f"  Found on Lines: {', '.join(map(str, data['lines']))}\n")
-                    if error_type == "Crashed":
-                        write_and_print("  Errors Found:")
-                        for line_num, line_content in crashed_occurrences:
-                            write_and_print(f"    Line {line_num}: {line_content}")
-                    else:
-                        write_and_print("  Known Errors:")
-                        for keyword, line_content in unique_lines_per_error[error_type].items():
-                            write_and_print(f"    - {keyword}: {line_content}")
-                else:
-                    write_and_print("  No occurrences found.\n")
-
-            write_and_print("=" * 500 + "\n")
-
+    folder_path = merged.folder_path
+    folder_name = merged.folder_name
+    analysis_folder = create_analysis_folder(save_path, folder_name)
+    current_date = datetime.now().strftime("%Y-%m-%d")
+    output_file_path = os.path.join(analysis_folder, f"{folder_name}_ExceptionAnalysis_{current_date}.txt")
+    summary_csv = None
+    if csv_summary:
+        summary_csv = SummaryCsv(os.path.join(analysis_folder, f"{folder_name}_FileSummary_{current_date}.csv"),
+                                 merged.error_data)
+
+    scans = ((label, scan) for _, label, scan in merged.files)
+    file_error_data = write_analysis(output_file_path, folder_path, scans, crash_category(merged.error_data),
+                                     verbosity, summary_csv=summary_csv)
     save_priority_report(file_error_data, folder_name, analysis_folder)
-    print(f"\nAnalysis complete. Consolidated report saved to {output_file_path}")
-
-    print(f"Folder Path: {folder_path}")
-    print(f"Save Path: {save_path}")
+    print(f"\nMerged {len(partial_paths)} shards with {merged.files_total} files. "
+          f"Consolidated report saved to {output_file_path}")
+    if summary_csv is not None:
+        summary_csv.close()
+        print(f"File summary saved to {summary_csv.path}")
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    import multiprocessing
+    import cli
 
+    multiprocessing.freeze_support()  # Needed for the worker pool in the PyInstaller build
+    sys.exit(cli.main(["analyze-folder", *sys.argv[1:]]))
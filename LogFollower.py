@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import pickle
+import time
+
+from KeywordMatcher import compile_keywords
+from LogScanner import merge_results, new_results, scan_byte_range
+
+# Bump when the state layout changes so older state files are ignored
+STATE_VERSION = 1
+
+# Bytes from the start of the log used to recognise it after a rotation or truncation
+HEAD_SIZE = 256
+
+
+def default_state_path(log_file):
+    """Returns the sidecar file that keeps the follow state of a log, e.g. '.app.txt.follow'."""
+    folder, name = os.path.split(os.path.abspath(log_file))
+    return os.path.join(folder, f".{name}.follow")
+
+
+def _keywords_hash(error_data, max_lines, engine):
+    key = json.dumps([error_data, max_lines, engine], sort_keys=True)
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def read_head(file_path):
+    """Returns the first bytes of a file, which stay the same while it is only appended to."""
+    with open(file_path, 'rb') as raw_file:
+        return raw_file.read(HEAD_SIZE)
+
+
+def _complete_lines_end(file_path, start, size):
+    """Returns the offset after the last newline between start and size, or start if none."""
+    with open(file_path, 'rb') as raw_file:
+        position = size
+        while position > start:
+            block_start = max(start, position - 64 * 1024)
+            raw_file.seek(block_start)
+            block = raw_file.read(position - block_start)
+            newline = block.rfind(b'\n')
+            if newline != -1:
+                return block_start + newline + 1
+            position = block_start
+    return start
+
+
+def rotated_candidates(log_file):
+    """
+    Lists the files a log may have been rotated to, using the naming Rename.py understands.
+
+    For 'app.txt' these are the other 'app.*.txt' files in the same folder, newest first.
+    """
+    folder, name = os.path.split(os.path.abspath(log_file))
+    stem, extension = os.path.splitext(name)
+    candidates = [
+        os.path.join(folder, file_name) for file_name in os.listdir(folder)
+        if file_name != name and file_name.startswith(f"{stem}.") and file_name.endswith(extension)
+    ]
+    return sorted(candidates, key=os.path.getmtime, reverse=True)
+
+
+class LogFollower:
+    """
+    Incrementally analyzes a log that keeps growing, like `tail -f`.
+
+    The byte offset and line number reached so far are saved in a state file together
+    with the running results, so each run only scans the bytes appended since the last
+    one. Only complete lines are scanned; a line still being written is picked up on the
+    next run. When the log was rotated (e.g. app.txt renamed to app.1.txt) the rest of
+    the old file is scanned from the rotated copy and the new log starts from line 1;
+    when it was truncated in place, the analysis restarts from the beginning.
+    """
+
+    def __init__(self, log_file, error_data, state_path=None, max_lines=None, engine="text"):
+        """
+        Args:
+            log_file (str): Path of the log to follow.
+            error_data (dict): Parsed keywords.json.
+            state_path (str): Where to keep the follow state. Defaults to a sidecar file.
+            max_lines (int): Line numbers and crash lines kept per category. None keeps all.
+            engine (str): "text" or "mmap", see scan_byte_range; results of the other engine
+                are not extended but rescanned.
+        """
+        self.log_file = log_file
+        self.error_data = error_data
+        self.state_path = state_path or default_state_path(log_file)
+        self.max_lines = max_lines
+        self.engine = engine
+        self.matcher = compile_keywords(error_data)
+        # (path, results) of the log generation that ended on the last update; path is
+        # None when the rotated copy couldn't be found or the log was truncated in place
+        self.rotated = None
+        self.state = self._load_state()
+
+    def _new_state(self):
+        return {
+            "version": STATE_VERSION,
+            "keywords": _keywords_hash(self.error_data, self.max_lines, self.engine),
+            "identity": None,
+            "head": b"",
+            "offset": 0,
+            "line_count": 0,
+            "results": new_results(self.error_data, self.max_lines),
+        }
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, 'rb') as state_file:
+                state = pickle.load(state_file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return self._new_state()
+        # Results collected with other keywords can't be extended incrementally
+        if (state.get("version") != STATE_VERSION
+                or state.get("keywords") != _keywords_hash(self.error_data, self.max_lines, self.engine)):
+            return self._new_state()
+        return state
+
+    def save_state(self):
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, 'wb') as state_file:
+            pickle.dump(self.state, state_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self.state_path)  # Never leave a half-written state behind
+
+    @property
+    def results(self):
+        """The running (results, unique_lines_per_error, crashed_occurrences) of the log."""
+        return self.state["results"]
+
+    def _is_same_file(self, stat):
+        state = self.state
+        if state["identity"] is None:
+            return True
+        if state["identity"] != (stat.st_dev, stat.st_ino) or stat.st_size < state["offset"]:
+            return False
+        head = state["head"]
+        return read_head(self.log_file)[:len(head)] == head
+
+    def _find_rotated(self):
+        state = self.state
+        for candidate in rotated_candidates(self.log_file):
+            stat = os.stat(candidate)
+            if (stat.st_dev, stat.st_ino) == state["identity"]:
+                return candidate
+        # Copy-based rotation gives the old log a new inode, so fall back to its first bytes
+        for candidate in rotated_candidates(self.log_file):
+            if os.path.getsize(candidate) >= state["offset"] and read_head(candidate).startswith(state["head"]):
+                return candidate
+        return None
+
+    def _scan(self, file_path, end):
+        state = self.state
+        if end <= state["offset"]:
+            return 0
+        line_count, *partial = scan_byte_range(
+            file_path, state["offset"], end, self.error_data, self.matcher, self.max_lines, engine=self.engine)
+        merge_results(state["results"], partial, state["line_count"])
+        state["line_count"] += line_count
+        state["offset"] = end
+        return line_count
+
+    def update(self):
+        """
+        Scans whatever was appended to the log since the last update and saves the state.
+
+        Returns:
+            int: Number of new lines scanned, including the rest of a rotated log.
+        """
+        self.rotated = None
+        if not os.path.exists(self.log_file):
+            return 0  # Between the rotation and the creation of the new log
+
+        scanned = 0
+        stat = os.stat(self.log_file)
+        if not self._is_same_file(stat):
+            rotated_path = self._find_rotated()
+            if rotated_path is not None:
+                # The rotated log is complete, so its last line is scanned even without a newline
+                scanned += self._scan(rotated_path, os.path.getsize(rotated_path))
+            self.rotated = (rotated_path, self.state["results"])
+            self.state = self._new_state()
+            stat = os.stat(self.log_file)
+
+        state = self.state
+        state["identity"] = (stat.st_dev, stat.st_ino)
+        scanned += self._scan(self.log_file, _complete_lines_end(self.log_file, state["offset"], stat.st_size))
+        state["head"] = read_head(self.log_file)[:min(HEAD_SIZE, state["offset"])]
+        self.save_state()
+        return scanned
+
+    def follow(self, on_update=None, interval=1.0, should_stop=None):
+        """
+        Keeps updating until should_stop() returns True (or forever), like `tail -f`.
+
+        Args:
+            on_update (function): Called with the follower after every update that found
+                new lines or a rotation.
+            interval (float): Seconds to wait between checks for new data.
+            should_stop (function): Returns True to end the loop.
+        """
+        while should_stop is None or not should_stop():
+            if self.update() or self.rotated:
+                if on_update is not None:
+                    on_update(self)
+            time.sleep(interval)
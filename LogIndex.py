@@ -0,0 +1,381 @@
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+from CompressedInput import expand_archives, is_compressed, member_path, open_log, split_member
+from KeywordConfig import read_keywords, validate_keywords
+from KeywordMatcher import compile_keywords, crash_category
+from LogDiscovery import LogFilter, discover_logs
+from LogFollower import HEAD_SIZE, read_head
+from LogScanner import new_results, record_hits
+from ReportWriter import PROGRESS, ReportWriter, write_results
+from ResultCache import file_fingerprint
+
+# Bump when the index layout changes so older indexes are rebuilt
+INDEX_VERSION = 1
+
+# A line's rowid is (file id << LINE_BITS) | line number, so a file's lines are one rowid range
+LINE_BITS = 32
+
+# Trigram queries need at least this many characters
+MIN_QUERY_LENGTH = 3
+
+
+def _file_rows(file_id):
+    """Returns the rowid range (first, after last) of a file's lines."""
+    return file_id << LINE_BITS, (file_id + 1) << LINE_BITS
+
+
+def index_key(file_path):
+    """Returns the absolute path a log is indexed under; zip members keep their '::member' part."""
+    archive, member = split_member(file_path)
+    path = os.path.abspath(archive)
+    return path if member is None else member_path(path, member)
+
+
+def _phrase(literal):
+    """Quotes a literal as an FTS5 phrase, which the trigram tokenizer matches as a substring."""
+    return '"' + literal.replace('"', '""') + '"'
+
+
+class LogIndex:
+    """
+    On-disk full-text index of log lines, stored in SQLite FTS5 with the trigram tokenizer.
+
+    Every line is stored once with its file and line number, and its trigrams are
+    indexed, so any keyword of 3 or more characters is looked up as a case-insensitive
+    substring without reading the logs again. Keywords and patterns are confirmed with
+    the same KeywordMatcher as a scan, on the candidate lines only, so a query returns
+    exactly what search_errors would return for the indexed lines.
+
+    Logs that only grew since they were indexed get just their new lines added; logs
+    that were rewritten, and changed compressed logs, are indexed again.
+    """
+
+    def __init__(self, db_path):
+        """
+        Args:
+            db_path (str): Path of the SQLite database file; created when missing.
+        """
+        self.db_path = db_path
+        self._connection = sqlite3.connect(db_path)
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY,
+                path TEXT NOT NULL UNIQUE,
+                label TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                line_count INTEGER NOT NULL,
+                partial INTEGER NOT NULL,
+                head BLOB NOT NULL
+            );
+        """)
+        version = self._connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if version is not None and version[0] != str(INDEX_VERSION):
+            with self._connection:
+                self._connection.execute("DROP TABLE IF EXISTS lines")
+                self._connection.execute("DELETE FROM files")
+        with self._connection:
+            self._connection.execute("CREATE VIRTUAL TABLE IF NOT EXISTS lines USING fts5(text, tokenize='trigram')")
+            self._connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+                                     (str(INDEX_VERSION),))
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    def update(self, file_path, label):
+        """
+        Brings the index of one log up to date.
+
+        Args:
+            file_path (str): Path of a plain, compressed or zipped log.
+            label (str): Name of the log in query results.
+
+        Returns:
+            int: Number of lines indexed, 0 when the log is unchanged.
+        """
+        path = index_key(file_path)
+        row = self._connection.execute(
+            "SELECT id, size, mtime_ns, offset, line_count, partial, head FROM files WHERE path = ?",
+            (path,)).fetchone()
+        size, mtime_ns = file_fingerprint(file_path)
+        if row is not None and (row[1], row[2]) == (size, mtime_ns):
+            return 0
+
+        with self._connection:
+            if row is None:
+                file_id = self._connection.execute(
+                    "INSERT INTO files (path, label, size, mtime_ns, offset, line_count, partial, head) "
+                    "VALUES (?, ?, 0, 0, 0, 0, 0, x'')", (path, label)).lastrowid
+                offset, line_count, partial, head = 0, 0, False, b""
+            else:
+                file_id, _, _, offset, line_count, partial, head = row
+            first_row, end_row = _file_rows(file_id)
+
+            appended = (row is not None and not is_compressed(file_path) and size >= offset
+                        and read_head(file_path)[:len(head)] == head)
+            if appended:
+                if partial:
+                    # The unfinished last line is indexed again together with the rest of it
+                    self._connection.execute("DELETE FROM lines WHERE rowid = ?", (first_row + line_count + 1,))
+            else:
+                self._connection.execute("DELETE FROM lines WHERE rowid >= ? AND rowid < ?", (first_row, end_row))
+                offset, line_count = 0, 0
+
+            if is_compressed(file_path):
+                offset, new_lines, partial = self._insert_stream(file_id, file_path)
+            else:
+                offset, new_lines, partial = self._insert_range(file_id, file_path, offset, line_count)
+            line_count += new_lines
+            head = b"" if is_compressed(file_path) else read_head(file_path)[:min(HEAD_SIZE, offset)]
+            self._connection.execute(
+                "UPDATE files SET label = ?, size = ?, mtime_ns = ?, offset = ?, line_count = ?, partial = ?, "
+                "head = ? WHERE id = ?",
+                (label, size, mtime_ns, offset, line_count - partial, partial, head, file_id))
+        return new_lines
+
+    def _insert_range(self, file_id, file_path, offset, line_count):
+        """
+        Indexes the lines of a plain log from a byte offset on.
+
+        Lines are split like the text scan ('\\r\\n' read as '\\n') and decoded like the
+        mmap scan (invalid UTF-8 replaced). A last line without a newline is indexed as well, but marked partial so
+        the next update replaces it once it is complete.
+
+        Returns:
+            tuple: (offset after the last complete line, lines indexed, partial)
+        """
+        first_row = _file_rows(file_id)[0]
+        partial = False
+
+        def rows():
+            nonlocal offset, line_count, partial
+            with open(file_path, 'rb') as raw_file:
+                raw_file.seek(offset)
+                for raw_line in raw_file:
+                    line_count += 1
+                    if raw_line.endswith(b"\n"):
+                        offset += len(raw_line)
+                        if raw_line.endswith(b"\r\n"):
+                            raw_line = raw_line[:-2] + b"\n"
+                    else:
+                        partial = True
+                    yield first_row + line_count, raw_line.decode('utf-8', errors='replace')
+
+        start_count = line_count
+        self._connection.executemany("INSERT INTO lines (rowid, text) VALUES (?, ?)", rows())
+        return offset, line_count - start_count, partial
+
+    def _insert_stream(self, file_id, file_path):
+        """Indexes every line of a compressed log. Returns (0, lines indexed, False)."""
+        first_row = _file_rows(file_id)[0]
+        with open_log(file_path, errors='replace') as lines:
+            cursor = self._connection.executemany(
+                "INSERT INTO lines (rowid, text) VALUES (?, ?)",
+                ((first_row + line_num, line) for line_num, line in enumerate(lines, start=1)))
+        return 0, cursor.rowcount, False
+
+    def remove(self, path):
+        """Drops a log from the index."""
+        with self._connection:
+            row = self._connection.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+            if row is not None:
+                self._connection.execute("DELETE FROM lines WHERE rowid >= ? AND rowid < ?", _file_rows(row[0]))
+                self._connection.execute("DELETE FROM files WHERE id = ?", (row[0],))
+
+    def files(self):
+        """Returns (id, path, label) of every indexed log, in indexing order."""
+        return self._connection.execute("SELECT id, path, label FROM files ORDER BY id").fetchall()
+
+    def query(self, error_data, max_lines=None, matcher=None):
+        """
+        Evaluates a keyword dictionary against the index.
+
+        Only lines containing one of the matcher's literals are read from the index; when
+        some keyword is shorter than 3 characters or a pattern has no literal, every
+        indexed line is checked instead, still without touching the logs.
+
+        Args:
+            error_data (dict): Parsed keywords.json.
+            max_lines (int): Line numbers and crash lines kept per category. None keeps all.
+            matcher (KeywordMatcher): Pre-compiled keywords; compiled from error_data when omitted.
+
+        Yields:
+            tuple: (label, (results, unique_lines_per_error, crashed_occurrences)) for every
+            indexed log, like scan_files.
+        """
+        if matcher is None:
+            matcher = compile_keywords(error_data)
+        literals = matcher.literals()
+        if literals is not None and all(len(literal) >= MIN_QUERY_LENGTH for literal in literals):
+            if not literals:
+                rows = iter(())
+            else:
+                rows = self._connection.execute(
+                    "SELECT rowid, text FROM lines WHERE lines MATCH ? ORDER BY rowid",
+                    (" OR ".join(_phrase(literal) for literal in literals),))
+        else:
+            rows = self._connection.execute("SELECT rowid, text FROM lines ORDER BY rowid")
+
+        find = matcher.find
+        crash = matcher.crash_category
+        row = next(rows, None)
+        for file_id, _, label in self.files():
+            scan = new_results(error_data, max_lines)
+            end_row = _file_rows(file_id)[1]
+            while row is not None and row[0] < end_row:
+                rowid, line = row
+                hits = find(line.lower())
+                if hits:
+                    record_hits(hits, rowid & ((1 << LINE_BITS) - 1), line.strip(), *scan, crash)
+                row = next(rows, None)
+            yield label, scan
+
+
+def index_folder(index, folder_path, log_filter=None, recursive=False, verbosity="progress"):
+    """
+    Adds new and changed logs of a folder to an index and drops the ones that are gone.
+
+    Args:
+        index (LogIndex): Index to update.
+        folder_path (str): Folder with the logs.
+        log_filter (LogFilter): Which files to index. None indexes all *.txt files.
+        recursive (bool): Also index the logs in all subfolders.
+        verbosity (str): 'summary' prints only the totals.
+
+    Returns:
+        tuple: (logs updated, lines added, logs removed)
+    """
+    root = os.path.abspath(folder_path)
+    seen = set()
+    updated = added = 0
+    for label, file_path in expand_archives(discover_logs(folder_path, log_filter, recursive), log_filter):
+        try:
+            new_lines = index.update(file_path, label)
+        except (OSError, sqlite3.Error, ValueError) as e:
+            print(f"Warning: Skipping '{file_path}'. {e}")
+            continue
+        seen.add(index_key(file_path))
+        if new_lines:
+            updated += 1
+            added += new_lines
+            if verbosity != "summary":
+                print(f"Indexed {label}: {new_lines} new lines")
+
+    removed = 0
+    for _, path, _ in index.files():
+        if path.startswith(root + os.sep) and path not in seen:
+            index.remove(path)
+            removed += 1
+    return updated, added, removed
+
+
+def index_main(folder_path, index_path, log_filter=None, recursive=False, verbosity="progress"):
+    """
+    Builds or updates the index of a log folder.
+
+    Returns:
+        int: Exit code, 0 when the index was updated and 1 otherwise.
+    """
+    if not os.path.isdir(folder_path):
+        print(f"Error: '{folder_path}' is not a valid directory. Exiting...")
+        return 1
+    if log_filter is None:
+        log_filter = LogFilter()
+
+    start = time.perf_counter()
+    try:
+        with LogIndex(index_path) as index:
+            updated, added, removed = index_folder(index, folder_path, log_filter, recursive, verbosity)
+            total = len(index.files())
+    except sqlite3.Error as e:
+        print(f"Error: Unable to update the index {index_path}. {e}")
+        return 1
+    print(f"\nIndex updated in {time.perf_counter() - start:.1f} s: {updated} logs with {added} new lines, "
+          f"{removed} removed, {total} logs indexed in {index_path}")
+    return 0
+
+
+def query_main(index_path, error_data=None, save_path=None, max_lines=None, verbosity="progress"):
+    """
+    Answers a keyword dictionary from the index, listing the logs with hits.
+
+    Args:
+        index_path (str): Index built by index_main.
+        error_data (dict): Keywords and patterns to look up. None uses keywords.json.
+        save_path (str): Path of a report in the format of the consolidated analysis, or None.
+        max_lines (int): Line numbers and crash lines kept per category. None keeps all.
+        verbosity (str): Console output, 'summary', 'progress' or 'full'.
+
+    Returns:
+        int: Exit code, 0 when the query ran and 1 otherwise.
+    """
+    if not os.path.isfile(index_path):
+        print(f"Error: No index at '{index_path}'. Build it with the index command first.")
+        return 1
+    if error_data is None:
+        config = read_keywords()
+        if config is None:
+            return 1
+        error_data, matcher = config.error_data, config.matcher
+    else:
+        try:
+            validate_keywords(error_data)
+            matcher = compile_keywords(error_data)  # Reports invalid patterns before the index is read
+        except ValueError as e:
+            print(f"Error: Invalid pattern. {e}")
+            return 1
+
+    start = time.perf_counter()
+    files_with_hits = 0
+    crash = crash_category(error_data)
+    writer = ReportWriter.open(save_path, verbosity) if save_path else None
+    try:
+        with LogIndex(index_path) as index:
+            if writer is not None:
+                writer.line("Index Query Report\n")
+                writer.line(f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+                writer.line(f"Index: {index_path}\n")
+                writer.line("=" * 500 + "\n")
+            for label, (found_errors_line, unique_lines_per_error, crashed_occurrences) in index.query(
+                    error_data, max_lines, matcher):
+                counts = {error_type: data["count"] for error_type, data in found_errors_line.items() if data["count"]}
+                if counts:
+                    files_with_hits += 1
+                    if writer is None:
+                        print(f"{label}: " + ", ".join(f"{error_type} {count}" for error_type, count in counts.items()))
+                if writer is not None:
+                    writer.line(f"Analyzing File: {label}\n", level=PROGRESS)
+                    writer.line("=" * 500)
+                    write_results(writer, found_errors_line, unique_lines_per_error, crashed_occurrences, crash)
+                    writer.line("=" * 500 + "\n")
+    except sqlite3.Error as e:
+        print(f"Error: Unable to read the index {index_path}. {e}")
+        return 1
+    finally:
+        if writer is not None:
+            writer.close()
+
+    print(f"\n{files_with_hits} logs with hits, answered from the index in "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms")
+    if save_path:
+        print(f"Query report saved to {save_path}")
+    return 0
+
+
+def query_keywords(keywords=(), patterns=()):
+    """Builds a one-category dictionary for ad-hoc queries from the command line."""
+    return {"Query": {"description": "Command line query", "keywords": list(keywords),
+                      "patterns": [json.loads(pattern) if pattern.startswith("{") else pattern
+                                   for pattern in patterns]}}
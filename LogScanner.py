@@ -0,0 +1,683 @@
+import io
+import mmap
+import os
+import re
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from CompressedInput import is_compressed, open_log
+from HitTimeline import HitTimeline
+from KeywordMatcher import compile_keywords
+from LineAccumulator import BoundedList, LineAccumulator
+from LogTemplates import ERROR_LINE_BYTES, TemplateMiner
+from ScanProgress import PROGRESS_LINES, FileProgress, WorkerProgress
+from StackTraces import collect_traces
+from StructuredOutput import HitWriter
+from TimeWindow import contains, find_window, in_order, line_time
+
+# Byte size of the ranges a single huge log is split into for parallel scanning
+DEFAULT_CHUNK_SIZE = 32 * 1024 * 1024
+
+# Size of the window mapped at a time by the mmap engine, so resident memory stays bounded
+MMAP_WINDOW = 8 * 1024 * 1024
+
+# Bytes read at a time when counting the lines in front of a time window
+COUNT_BLOCK = 1024 * 1024
+
+# Per-process state for scan pools, set once by init_scan_worker
+_worker_error_data = None
+_worker_matcher = None
+_worker_engine = None
+_worker_engine_name = "text"
+_worker_max_lines = None
+_worker_matchers = {}
+_worker_progress = None
+
+
+def new_results(error_data, max_lines=None):
+    """
+    Creates the empty result structures filled in by search_errors.
+
+    Args:
+        error_data (dict): Parsed keywords.json.
+        max_lines (int): Line numbers and crash lines kept per category; the rest are
+            only counted. None keeps everything.
+
+    Returns:
+        tuple: (results, unique_lines_per_error, crashed_occurrences)
+    """
+    results = {}
+    unique_lines_per_error = {}
+    crashed_occurrences = BoundedList(max_lines)
+
+    for error_type in error_data:
+        results[error_type] = {"count": 0, "lines": LineAccumulator(max_lines)}
+        unique_lines_per_error[error_type] = {}
+
+    return results, unique_lines_per_error, crashed_occurrences
+
+
+def record_hits(hits, line_num, stripped, results, unique_lines_per_error, crashed_occurrences, crash_category=None):
+    """
+    Records the keyword hits of one line in the result structures.
+
+    Args:
+        hits (dict): {category: [keywords]} as returned by KeywordMatcher.find.
+        line_num (int): Line number of the line.
+        stripped (str): The stripped line text.
+        results (dict): Per category {"count", "lines"} to update.
+        unique_lines_per_error (dict): Per category {keyword: first line seen} to update.
+        crashed_occurrences (list): (line_num, line) tuples for the crash category.
+        crash_category (str): Category whose every line goes to crashed_occurrences, or None.
+    """
+    for error_type, keywords in hits.items():
+        data = results[error_type]
+        data["count"] += 1  # Count only once per line
+        data["lines"].append(line_num)
+        if error_type == crash_category:
+            crashed_occurrences.append((line_num, stripped))
+        else:
+            first_seen = unique_lines_per_error[error_type]
+            for keyword in keywords:
+                if keyword not in first_seen:
+                    first_seen[keyword] = stripped
+
+
+def scan_lines(lines, matcher, results, unique_lines_per_error, crashed_occurrences, start_line=1, on_hit=None,
+               progress=None, on_miss=None):
+    """
+    Scans an iterable of lines and records every keyword hit in the result structures.
+
+    Args:
+        lines (iterable): Lines of the log, including their line endings.
+        matcher (KeywordMatcher): Compiled keyword dictionary.
+        results (dict): Per category {"count", "lines"} to update.
+        unique_lines_per_error (dict): Per category {keyword: first line seen} to update.
+        crashed_occurrences (list): (line_num, line) tuples for the crash category.
+        start_line (int): Line number of the first line in `lines`.
+        on_hit (function): Called as on_hit(line_num, hits, stripped_line) for every line
+            with at least one hit, e.g. to stream hits to a JSON Lines file.
+        progress (FileProgress): Advanced every PROGRESS_LINES lines, which is also where
+            a cancelled scan stops.
+        on_miss (function): Called as on_miss(line_num, line, lowered_line) for every line
+            without a hit, e.g. TemplateMiner.feed.
+
+    Returns:
+        int: Number of lines scanned.
+    """
+    if progress is not None:
+        # Scan in batches so the per-line loop below stays free of progress bookkeeping
+        lines = iter(lines)
+        line_count = 0
+        while True:
+            batch = list(islice(lines, PROGRESS_LINES))
+            if not batch:
+                return line_count
+            line_count += scan_lines(batch, matcher, results, unique_lines_per_error, crashed_occurrences,
+                                     start_line + line_count, on_hit, on_miss=on_miss)
+            progress.advance(sum(map(len, batch)))
+
+    find = matcher.find
+    crash_category = matcher.crash_category
+    line_num = start_line - 1
+    for line_num, line in enumerate(lines, start=start_line):
+        lowered = line.lower()
+        hits = find(lowered)
+        if hits:
+            stripped = line.strip()
+            record_hits(hits, line_num, stripped, results, unique_lines_per_error, crashed_occurrences,
+                        crash_category)
+            if on_hit is not None:
+                on_hit(line_num, hits, stripped)
+        elif on_miss is not None:
+            on_miss(line_num, line, lowered)
+
+    return line_num - start_line + 1
+
+
+def search_errors(log_file, error_data, matcher=None, max_lines=None, on_hit=None, progress=None, on_miss=None):
+    """
+    Searches a log file for every keyword category defined in keywords.json.
+
+    Compressed logs (.gz, .bz2, .xz and 'bundle.zip::member' paths) are decompressed
+    while they are scanned.
+
+    Args:
+        log_file (str): Path to the log file.
+        error_data (dict): Parsed keywords.json.
+        matcher (KeywordMatcher): Pre-compiled keywords; compiled from error_data when omitted.
+        max_lines (int): Line numbers and crash lines kept per category. None keeps all.
+        on_hit (function): Called as on_hit(line_num, hits, stripped_line) for every hit line.
+        progress (ScanProgress): Receives the bytes scanned and can cancel the scan.
+        on_miss (function): Called as on_miss(line_num, line, lowered_line) for every line
+            without a hit.
+
+    Returns:
+        tuple: (results, unique_lines_per_error, crashed_occurrences)
+    """
+    if matcher is None:
+        matcher = compile_keywords(error_data)
+
+    results, unique_lines_per_error, crashed_occurrences = new_results(error_data, max_lines)
+    file_progress = FileProgress(progress, log_file) if progress is not None else None
+
+    with open_log(log_file) as lines:
+        scan_lines(lines, matcher, results, unique_lines_per_error, crashed_occurrences, on_hit=on_hit,
+                   progress=file_progress, on_miss=on_miss)
+
+    if file_progress is not None:
+        file_progress.finish()
+
+    return results, unique_lines_per_error, crashed_occurrences
+
+
+def search_errors_mmap(log_file, error_data, matcher=None, max_lines=None, on_hit=None, progress=None,
+                       on_miss=None, start=0, end=None):
+    """
+    Searches a log file by memory-mapping it and scanning the raw bytes.
+
+    Each mapped window is lowercased as bytes and searched with a bytes prefilter; only
+    the candidate lines are decoded, lowercased and confirmed with the matcher. Invalid
+    UTF-8 is replaced instead of aborting the scan, which makes this engine usable on
+    corrupted device logs. Lines end at "\n" only and case folding on the raw bytes is
+    ASCII-only, so non-ASCII characters that lowercase to ASCII letters (e.g. the Kelvin
+    sign) are not matched the way the text-mode search_errors matches them.
+
+    Args:
+        log_file (str): Path to the log file.
+        error_data (dict): Parsed keywords.json.
+        matcher (KeywordMatcher): Pre-compiled keywords; compiled from error_data when omitted.
+        max_lines (int): Line numbers and crash lines kept per category. None keeps all.
+        on_hit (function): Called as on_hit(line_num, hits, stripped_line) for every hit line.
+        progress (ScanProgress): Receives the bytes scanned and can cancel the scan.
+        on_miss (function): Called as on_miss(line_num, line, lowered_line) for the lines
+            without a hit that contain ERROR_LINE_BYTES of LogTemplates; the other lines are never
+            decoded.
+        start (int): Offset of the first byte scanned, at the start of a line; lines are
+            numbered from 1 there. Ignored for compressed logs, which are read whole.
+        end (int): Offset after the last byte scanned. None scans to the end of the file.
+
+    Returns:
+        tuple: (results, unique_lines_per_error, crashed_occurrences)
+    """
+    if matcher is None:
+        matcher = compile_keywords(error_data)
+
+    results, unique_lines_per_error, crashed_occurrences = new_results(error_data, max_lines)
+    file_progress = FileProgress(progress, log_file) if progress is not None else None
+    if is_compressed(log_file):
+        # A compressed log can't be mapped, so it is decompressed as a stream instead,
+        # still replacing invalid UTF-8 like the mapped scan does
+        with open_log(log_file, errors='replace') as lines:
+            scan_lines(lines, matcher, results, unique_lines_per_error, crashed_occurrences, on_hit=on_hit,
+                       progress=file_progress, on_miss=on_miss)
+        if file_progress is not None:
+            file_progress.finish()
+        return results, unique_lines_per_error, crashed_occurrences
+
+    prefilter = matcher.bytes_prefilter()
+    if on_miss is not None:
+        # Error lines without a hit are candidates too, for the template miner
+        prefilter = re.compile(prefilter.pattern + b"|" + ERROR_LINE_BYTES)
+    search = prefilter.search
+    find = matcher.find
+    crash_category = matcher.crash_category
+
+    with open(log_file, 'rb') as raw_file:
+        size = os.fstat(raw_file.fileno()).st_size if end is None else end
+        line_num = 1  # Line number of the line starting at `position`
+        position = start
+        window = MMAP_WINDOW
+        while position < size:
+            # Map offsets must be multiples of the allocation granularity
+            offset = position - position % mmap.ALLOCATIONGRANULARITY
+            length = min(size - offset, window)
+            with mmap.mmap(raw_file.fileno(), length, offset=offset, access=mmap.ACCESS_READ) as view:
+                start = position - offset
+                if offset + length < size:
+                    limit = view.rfind(b'\n', start) + 1  # Stop after the last complete line
+                    if not limit:
+                        window *= 2  # A single line is longer than the window
+                        continue
+                else:
+                    limit = length
+
+                # bytes.lower() folds ASCII only and keeps every byte offset unchanged
+                lowered = view[start:limit].lower()
+                end = len(lowered)
+                pos = counted = 0
+                while pos < end:
+                    match = search(lowered, pos)
+                    if match is None:
+                        break
+                    line_start = lowered.rfind(b'\n', pos, match.start()) + 1 or pos
+                    line_end = lowered.find(b'\n', match.end())
+                    line_end = end if line_end == -1 else line_end + 1
+
+                    line_num += lowered.count(b'\n', counted, line_start)
+                    counted = line_start
+                    line = view[start + line_start:start + line_end].decode('utf-8', errors='replace')
+                    lowered_line = line.lower()
+                    hits = find(lowered_line)
+                    if hits:
+                        stripped = line.strip()
+                        record_hits(hits, line_num, stripped, results, unique_lines_per_error, crashed_occurrences,
+                                    crash_category)
+                        if on_hit is not None:
+                            on_hit(line_num, hits, stripped)
+                    elif on_miss is not None:
+                        on_miss(line_num, line, lowered_line)
+                    pos = line_end
+
+                line_num += lowered.count(b'\n', counted)
+                del lowered  # Release this window's copy before mapping the next one
+            if file_progress is not None:
+                file_progress.advance(offset + limit - position)
+            position = offset + limit
+            window = MMAP_WINDOW
+
+    return results, unique_lines_per_error, crashed_occurrences
+
+
+def _count_lines(raw_file, end, universal):
+    """
+    Counts the lines in front of a byte offset at a line start.
+
+    With universal, a lone '\r' also ends a line, like in the text engine.
+    """
+    raw_file.seek(0)
+    line_count = 0
+    remaining = end
+    while remaining > 0:
+        block = raw_file.read(min(COUNT_BLOCK, remaining))
+        if universal and block.endswith(b"\r") and len(block) < remaining:
+            block += raw_file.read(1)  # Keep a '\r\n' in one block
+        remaining -= len(block)
+        line_count += block.count(b"\n")
+        if universal:
+            line_count += block.count(b"\r") - block.count(b"\r\n")
+    return line_count
+
+
+def search_errors_window(log_file, error_data, matcher=None, max_lines=None, on_hit=None, progress=None,
+                         window=None, engine="text", on_miss=None):
+    """
+    Searches only the lines of a log inside a time window.
+
+    The window's bytes are located by binary search on the logcat timestamps (see
+    TimeWindow.find_window), its lines are numbered by counting the newlines in front of
+    it and only they are decoded and scanned. Logs whose timestamps are missing or out of
+    order, including inside the located bytes, and compressed logs, are read line by
+    line and filtered on the timestamps instead. Either way the hits and line numbers
+    are those of a full scan that keeps the lines inside the window.
+
+    Args:
+        log_file (str): Path to the log file.
+        error_data (dict): Parsed keywords.json.
+        matcher (KeywordMatcher): Pre-compiled keywords; compiled from error_data when omitted.
+        max_lines (int): Line numbers and crash lines kept per category. None keeps all.
+        on_hit (function): Called as on_hit(line_num, hits, stripped_line) for every hit line.
+        progress (ScanProgress): Receives the bytes scanned and can cancel the scan.
+        window (TimeWindow): Times to scan.
+        engine (str): "text" decodes strictly and also ends lines at a lone '\r'; "mmap"
+            replaces invalid UTF-8 and ends lines at '\n' only.
+        on_miss (function): Called as on_miss(line_num, line, lowered_line) for every line
+            inside the window without a hit.
+
+    Returns:
+        tuple: (results, unique_lines_per_error, crashed_occurrences)
+    """
+    if matcher is None:
+        matcher = compile_keywords(error_data)
+
+    results, unique_lines_per_error, crashed_occurrences = new_results(error_data, max_lines)
+    file_progress = FileProgress(progress, log_file) if progress is not None else None
+    errors, newline = ('replace', '\n') if engine == "mmap" else ('strict', None)
+
+    byte_range = find_window(log_file, window)
+    data = None
+    if byte_range is not None:
+        start, end = byte_range
+        with open(log_file, 'rb') as raw_file:
+            raw_file.seek(start)
+            data = raw_file.read(end - start)
+            if in_order(data):
+                start_line = _count_lines(raw_file, start, newline is None) + 1
+            else:
+                data = None  # Out of order between the probes; filter line by line instead
+    if data is not None:
+        lines = io.TextIOWrapper(io.BytesIO(data), encoding='utf-8', errors=errors, newline=newline)
+        scan_lines(lines, matcher, results, unique_lines_per_error, crashed_occurrences, start_line, on_hit,
+                   file_progress, on_miss)
+    else:
+        with open_log(log_file, errors=errors) as lines:
+            since, until = window.bounds(None)
+            time = None
+            run, run_start = [], 1  # Consecutive lines inside the window, scanned together
+            for line_num, line in enumerate(lines, start=1):
+                line_time_key = line_time(line)
+                if line_time_key is not None:
+                    if time is None:
+                        since, until = window.bounds(line_time_key)
+                    time = line_time_key
+                inside = contains(since, until, time)
+                if inside:
+                    if not run:
+                        run_start = line_num
+                    run.append(line)
+                if run and (not inside or len(run) >= PROGRESS_LINES):
+                    scan_lines(run, matcher, results, unique_lines_per_error, crashed_occurrences, run_start,
+                               on_hit, on_miss=on_miss)
+                    run = []
+                if file_progress is not None and not line_num % PROGRESS_LINES:
+                    file_progress.progress.check()
+            if run:
+                scan_lines(run, matcher, results, unique_lines_per_error, crashed_occurrences, run_start, on_hit,
+                           on_miss=on_miss)
+
+    if file_progress is not None:
+        file_progress.finish()
+
+    return results, unique_lines_per_error, crashed_occurrences
+
+
+def get_engine(name, window=None):
+    """
+    Returns the search_errors function for a scan engine name.
+
+    Args:
+        name (str): "text" for line-by-line decoding, "mmap" for the bytes engine.
+        window (TimeWindow): Only scan the lines inside this time window, see search_errors_window.
+
+    Returns:
+        function: Function with the search_errors signature.
+    """
+    if window is not None:
+        get_engine(name)  # Validates the name
+        return partial(search_errors_window, window=window, engine=name)
+    if name == "mmap":
+        return search_errors_mmap
+    if name in (None, "text"):
+        return search_errors
+    raise ValueError(f"Unknown scan engine '{name}'. Use 'text' or 'mmap'.")
+
+
+def scan_categories(file_path, error_data, categories, search_errors, matchers, max_lines=None, hits=None,
+                    progress=None, templates=None, timeline=None):
+    """
+    Runs a scan engine over some or all categories of keywords.json.
+
+    Args:
+        file_path (str): Path to the log file.
+        error_data (dict): Parsed keywords.json.
+        categories (list): Only scan these categories. None scans all of them.
+        search_errors (function): Scan engine from get_engine.
+        matchers (dict): Compiled matchers by category tuple, reused between calls.
+        max_lines (int): Line numbers and crash lines kept per category. None keeps all.
+        hits (tuple): (jsonl_path, file_label) to stream every hit of the scan to, or None.
+        progress (ScanProgress): Receives the bytes scanned and can cancel the scan.
+        templates (TemplateMiner): Mines the error lines without a hit, or None. Only
+            meaningful when all categories are scanned.
+        timeline (HitTimeline): Counts the hits per minute, or None.
+
+    Returns:
+        tuple: (results, unique_lines_per_error, crashed_occurrences) for the categories.
+    """
+    if categories is not None:
+        error_data = {error_type: error_data[error_type] for error_type in categories}
+    key = tuple(error_data)
+    matcher = matchers.get(key)
+    if matcher is None:
+        matcher = matchers[key] = compile_keywords(error_data)
+    on_miss = templates.feed if templates is not None else None
+    if hits is None:
+        return search_errors(file_path, error_data, matcher, max_lines, on_hit=timeline, progress=progress,
+                             on_miss=on_miss)
+
+    hits_path, file_label = hits
+    with HitWriter(hits_path, file_label) as hit_writer:
+        on_hit = hit_writer if timeline is None else chain_hits(hit_writer, timeline)
+        return search_errors(file_path, error_data, matcher, max_lines, on_hit=on_hit, progress=progress,
+                             on_miss=on_miss)
+
+
+def chain_hits(*callbacks):
+    """Returns an on_hit callback passing every hit line on to each of the callbacks."""
+    def on_hit(line_num, hits, stripped):
+        for callback in callbacks:
+            callback(line_num, hits, stripped)
+    return on_hit
+
+
+def init_scan_worker(error_data, engine="text", max_lines=None, progress_channel=None, window=None):
+    """
+    Compiles the keyword dictionary once per worker process.
+
+    progress_channel is the ScanProgress.worker_channel() the worker reports to, or None;
+    window is the TimeWindow the scans are limited to, or None.
+    """
+    global _worker_error_data, _worker_matcher, _worker_engine, _worker_engine_name, _worker_max_lines
+    global _worker_progress
+    _worker_error_data = error_data
+    _worker_matcher = compile_keywords(error_data)
+    _worker_matchers[tuple(error_data)] = _worker_matcher
+    _worker_engine = get_engine(engine, window)
+    _worker_engine_name = engine
+    _worker_max_lines = max_lines
+    _worker_progress = WorkerProgress(progress_channel) if progress_channel is not None else None
+
+
+def scan_file_in_worker(file_path, categories=None, hits=None, discover=False, timeline=False):
+    """
+    Runs search_errors in a pool worker set up by init_scan_worker.
+
+    Args:
+        file_path (str): Path to the log file.
+        categories (list): Only scan these categories. None scans all of them.
+        hits (tuple): (jsonl_path, file_label) to stream every hit of the scan to, or None.
+        discover (bool): Also mine the error lines without a hit into templates.
+        timeline (bool): Also count the hits per minute.
+
+    Returns:
+        tuple: (scan, TemplateMiner or None, HitTimeline or None)
+    """
+    templates = TemplateMiner() if discover else None
+    hit_timeline = HitTimeline(_worker_error_data) if timeline else None
+    scan = scan_categories(file_path, _worker_error_data, categories, _worker_engine,
+                           _worker_matchers, _worker_max_lines, hits, _worker_progress, templates, hit_timeline)
+    return scan, templates, hit_timeline
+
+
+def trace_file_in_worker(file_path):
+    """Runs collect_traces in a pool worker set up by init_scan_worker."""
+    return collect_traces(file_path, _worker_progress)
+
+
+def split_ranges(log_file, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Splits a file into byte ranges that each start right after a newline.
+
+    Args:
+        log_file (str): Path to the log file.
+        chunk_size (int): Approximate size of each range in bytes.
+
+    Returns:
+        list: (start, end) byte offsets covering the whole file.
+    """
+    size = os.path.getsize(log_file)
+    ranges = []
+    start = 0
+    with open(log_file, 'rb') as raw_file:
+        while start < size:
+            end = start + chunk_size
+            if end >= size:
+                end = size
+            else:
+                raw_file.seek(end)
+                raw_file.readline()  # Move the boundary to the end of the current line
+                end = raw_file.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def scan_byte_range(log_file, start, end, error_data, matcher, max_lines=None, progress=None, templates=None,
+                    engine="text"):
+    """
+    Scans the lines between two byte offsets of a log, numbering them from 1.
+
+    Args:
+        log_file (str): Path to the log file.
+        start (int): Offset of the first byte, at the start of a line.
+        end (int): Offset after the last byte, at the end of a line or of the file.
+        error_data (dict): Parsed keywords.json.
+        matcher (KeywordMatcher): Compiled keyword dictionary.
+        max_lines (int): Line numbers and crash lines kept per category. None keeps all.
+        progress: ScanProgress or WorkerProgress receiving the bytes scanned.
+        templates (TemplateMiner): Mines the error lines without a hit, numbered from 1, or None.
+        engine (str): "text" decodes the range like search_errors, "mmap" scans its raw
+            bytes like search_errors_mmap.
+
+    Returns:
+        tuple: (line_count, results, unique_lines_per_error, crashed_occurrences)
+    """
+    on_miss = templates.feed if templates is not None else None
+    if engine == "mmap":
+        scan = search_errors_mmap(log_file, error_data, matcher, max_lines, progress=progress, on_miss=on_miss,
+                                  start=start, end=end)
+        return (_range_line_count(log_file, start, end), *scan)
+
+    results, unique_lines_per_error, crashed_occurrences = new_results(error_data, max_lines)
+    file_progress = FileProgress(progress, log_file, end - start) if progress is not None else None
+    with open(log_file, 'rb') as raw_file:
+        raw_file.seek(start)
+        # Decoded as a stream like open(..., encoding='utf-8'), so line splitting is identical
+        # to a serial scan and a range of gigabytes isn't read into memory at once
+        lines = io.TextIOWrapper(io.BufferedReader(_RangeReader(raw_file, end - start), COUNT_BLOCK),
+                                 encoding='utf-8')
+        line_count = scan_lines(lines, matcher, results, unique_lines_per_error, crashed_occurrences,
+                                progress=file_progress, on_miss=on_miss)
+    if file_progress is not None:
+        file_progress.finish()
+    return line_count, results, unique_lines_per_error, crashed_occurrences
+
+
+class _RangeReader(io.RawIOBase):
+    """Reads an open binary file from its current position up to a number of bytes, leaving it open."""
+
+    def __init__(self, raw_file, size):
+        self.raw_file = raw_file
+        self.remaining = size
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.raw_file.read(min(len(buffer), self.remaining))
+        self.remaining -= len(data)
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _range_line_count(log_file, start, end):
+    """Counts the '\n'-terminated lines between two byte offsets, plus an unterminated last line."""
+    line_count = 0
+    last = b"\n"
+    with open(log_file, 'rb') as raw_file:
+        raw_file.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = raw_file.read(min(COUNT_BLOCK, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            line_count += block.count(b"\n")
+            last = block[-1:]
+    return line_count + (last != b"\n")
+
+
+def _scan_range_in_worker(byte_range):
+    log_file, start, end, discover = byte_range
+    templates = TemplateMiner() if discover else None
+    scan = scan_byte_range(log_file, start, end, _worker_error_data, _worker_matcher, _worker_max_lines,
+                           _worker_progress, templates, _worker_engine_name)
+    return scan, templates
+
+
+def merge_results(merged, partial, line_offset):
+    """
+    Appends the results of a later part of a log to the results of the earlier parts.
+
+    Args:
+        merged (tuple): (results, unique_lines_per_error, crashed_occurrences) to update.
+        partial (tuple): Results of the next part, with line numbers starting at 1.
+        line_offset (int): Number of lines that precede the part in the log.
+    """
+    results, unique_lines_per_error, crashed_occurrences = merged
+    part_results, part_unique_lines, part_crashed = partial
+
+    for error_type, data in part_results.items():
+        lines = results[error_type]["lines"]
+        results[error_type]["count"] += data["count"]
+        lines.extend(line_num + line_offset for line_num in data["lines"])
+        lines.total += data["lines"].truncated  # Lines the part only counted
+
+    for error_type, first_seen in part_unique_lines.items():
+        merged_first_seen = unique_lines_per_error[error_type]
+        for keyword, line_content in first_seen.items():
+            if keyword not in merged_first_seen:  # Earlier parts keep the first line seen
+                merged_first_seen[keyword] = line_content
+
+    crashed_occurrences.extend((line_num + line_offset, line_content) for line_num, line_content in part_crashed)
+    crashed_occurrences.total += part_crashed.truncated
+
+
+def search_errors_chunked(log_file, error_data, workers, chunk_size=DEFAULT_CHUNK_SIZE, max_lines=None,
+                          progress=None, templates=None, engine="text"):
+    """
+    Searches a single large log by scanning newline-aligned byte ranges in parallel.
+
+    Each range is scanned with local line numbers; the ranges are merged back in file
+    order and shifted by the number of lines before them, so the output is the same as
+    search_errors. Compressed logs can't be split at byte offsets and are scanned
+    serially.
+
+    Args:
+        log_file (str): Path to the log file.
+        error_data (dict): Parsed keywords.json.
+        workers (int): Number of worker processes.
+        chunk_size (int): Approximate size of each byte range.
+        max_lines (int): Line numbers and crash lines kept per category. None keeps all.
+        progress (ScanProgress): Receives the bytes scanned and can cancel the scan.
+        templates (TemplateMiner): Receives the templates of the error lines without a hit,
+            mined per range and merged in file order, or None.
+        engine (str): Scan engine of every range, "text" or "mmap", see get_engine.
+
+    Returns:
+        tuple: (results, unique_lines_per_error, crashed_occurrences)
+    """
+    on_miss = templates.feed if templates is not None else None
+    serial = get_engine(engine)  # Also validates the name before any worker starts
+    if is_compressed(log_file):
+        return serial(log_file, error_data, max_lines=max_lines, progress=progress, on_miss=on_miss)
+
+    ranges = split_ranges(log_file, chunk_size)
+    if not workers or workers <= 1 or len(ranges) <= 1:
+        return serial(log_file, error_data, max_lines=max_lines, progress=progress, on_miss=on_miss)
+
+    merged = new_results(error_data, max_lines)
+    line_offset = 0
+    channel = progress.worker_channel() if progress is not None else None
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges)),
+                             initializer=init_scan_worker,
+                             initargs=(error_data, engine, max_lines, channel)) as executor:
+        futures = [executor.submit(_scan_range_in_worker, (log_file, start, end, templates is not None))
+                   for start, end in ranges]
+        for future in futures:
+            (line_count, *partial), part_templates = future.result() if progress is None else progress.wait(future)
+            merge_results(merged, partial, line_offset)
+            if templates is not None:
+                templates.merge(part_templates, line_offset=line_offset)
+            line_offset += line_count
+
+    return merged
@@ -0,0 +1,180 @@
+import re
+
+from StackTraces import FRAME, MORE_FRAMES, split_logcat
+
+# Lines mined for templates, found in the lowercased line: logcat errors and fatals (the
+# level column) and lines mentioning an error, exception or fatal. The bytes pattern lets
+# the mmap engine find the same lines without decoding the others; see is_error_line.
+ERROR_LINE_BYTES = rb" e | f |exception|error|fatal"
+
+# Stand-in for the variable parts of a template, e.g. ids, counts and addresses
+WILDCARD = "<*>"
+
+# Tokens with a digit are variable from the start; everything else becomes a wildcard
+# once two lines of the same template differ there
+PARAMETER = re.compile(r"\d")
+
+# Leading tokens that route a line through the prefix tree, after its token count
+PREFIX_TOKENS = 2
+
+# Share of a template's tokens a line must have in common to join it
+SIMILARITY = 0.5
+
+# Children per node of the prefix tree; further tokens share a wildcard child
+MAX_CHILDREN = 100
+
+# Tokens of a message that are mined; the rest of a very long message is ignored
+MAX_TOKENS = 40
+
+# Distinct templates tracked per run; lines of templates beyond are only counted
+MAX_TEMPLATES = 2000
+
+# Example lines kept per template
+EXEMPLAR_LINES = 3
+
+
+def is_error_line(lowered):
+    """Whether a lowercased line is mined, the str version of ERROR_LINE_BYTES."""
+    return " e " in lowered or " f " in lowered or "exception" in lowered or "error" in lowered or "fatal" in lowered
+
+
+class LogTemplate:
+    """One mined template: constant tokens with wildcards, how often it occurred and examples."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.count = 0
+        self.files = 0
+        self.last_file = None
+        self.exemplars = []  # (file label, line number, message)
+
+    def update(self, tokens):
+        """Turns the tokens where a new line differs from the template into wildcards."""
+        if tokens != self.tokens:
+            self.tokens = [token if token == new_token else WILDCARD for token, new_token in zip(self.tokens, tokens)]
+
+    def text(self):
+        return " ".join(self.tokens)
+
+    def keyword(self):
+        """The longest run of constant tokens, the part that would make a keywords.json entry."""
+        best, run = [], []
+        for token in self.tokens + [WILDCARD]:
+            if token != WILDCARD:
+                run.append(token)
+                continue
+            if len(" ".join(run)) > len(" ".join(best)):
+                best = run
+            run = []
+        return " ".join(best)
+
+
+class TemplateMiner:
+    """
+    Groups the error lines no keyword matched into log templates, Drain style.
+
+    A line's message (without the logcat columns) is split into tokens, tokens with
+    digits are masked as wildcards, and the line is routed through a prefix tree by its
+    token count and first tokens. At the leaf it joins the most similar template, which
+    turns the differing tokens into wildcards, or starts a new one. Each line costs a
+    walk of a few dictionary levels and a comparison with the templates of one leaf,
+    so mining runs inside the scan's single read of the log.
+
+    Memory only grows with the number of distinct templates, which is capped at
+    max_templates; lines of further new templates are counted as dropped.
+    """
+
+    def __init__(self, max_templates=MAX_TEMPLATES, similarity=SIMILARITY):
+        self.max_templates = max_templates
+        self.similarity = similarity
+        self.templates = []
+        self.total = 0
+        self.dropped = 0
+        self._tree = {}  # token count -> token -> ... -> [LogTemplate]
+
+    def feed(self, line_num, line, lowered):
+        """
+        Mines one line without keyword hits; used as the on_miss callback of the scan engines.
+
+        Args:
+            line_num (int): Line number of the line.
+            line (str): The line as read.
+            lowered (str): The lowercased line, already computed by the scan.
+        """
+        if not is_error_line(lowered):
+            return
+        message = split_logcat(line)[1]
+        if not message or FRAME.match(message) or MORE_FRAMES.match(message):
+            return  # Stack frames are grouped by --traces instead
+        tokens = message.split()[:MAX_TOKENS]
+        parameter = PARAMETER.search
+        if parameter(message) is not None:
+            tokens = [WILDCARD if parameter(token) else token for token in tokens]
+        self._add(tokens, 1, [(None, line_num, message)])
+
+    def _add(self, tokens, count, exemplars, label=None):
+        self.total += count
+        leaf = self._leaf(tokens)
+        template = self._match(leaf, tokens)
+        if template is None:
+            if len(self.templates) >= self.max_templates:
+                self.dropped += count
+                return
+            template = LogTemplate(tokens)
+            leaf.append(template)
+            self.templates.append(template)
+        else:
+            template.update(tokens)
+        template.count += count
+        if label is not None and template.last_file != label:
+            template.files += 1
+            template.last_file = label
+        for exemplar in exemplars[:EXEMPLAR_LINES - len(template.exemplars)]:
+            template.exemplars.append(exemplar)
+
+    def _leaf(self, tokens):
+        node = self._tree.setdefault(len(tokens), {})
+        for token in tokens[:PREFIX_TOKENS]:
+            child = node.get(token)
+            if child is None:
+                if len(node) >= MAX_CHILDREN:
+                    token = WILDCARD
+                child = node.setdefault(token, {})
+            node = child
+        return node.setdefault(None, [])
+
+    def _match(self, leaf, tokens):
+        """Returns the template of the leaf most similar to the tokens, or None when none is similar enough."""
+        best, best_similarity, best_wildcards = None, -1.0, -1
+        for template in leaf:
+            same = wildcards = 0
+            for token, new_token in zip(template.tokens, tokens):
+                if token == new_token:
+                    same += 1
+                elif token == WILDCARD:
+                    wildcards += 1
+            similarity = same / len(tokens) if tokens else 1.0
+            if similarity > best_similarity or (similarity == best_similarity and wildcards > best_wildcards):
+                best, best_similarity, best_wildcards = template, similarity, wildcards
+        return best if best_similarity >= self.similarity else None
+
+    def merge(self, other, label=None, line_offset=0):
+        """
+        Adds the templates mined from another log or another part of the same log.
+
+        Args:
+            other (TemplateMiner): Templates to add.
+            label (str): Name of the other log in the reports, stored with its examples;
+                None for a part of the same log.
+            line_offset (int): Lines in front of the part, added to its line numbers.
+        """
+        for template in other.templates:
+            exemplars = [(label if label is not None else file, line_num + line_offset, message)
+                         for file, line_num, message in template.exemplars]
+            self._add(list(template.tokens), template.count, exemplars, label)
+        self.total += other.dropped
+        self.dropped += other.dropped
+
+    def ranked(self):
+        """Returns the templates, most frequent first and first seen first on ties."""
+        return sorted(self.templates, key=lambda template: template.count, reverse=True)
@@ -1,70 +1,65 @@
 import os
 from datetime import datetime
 
-def rename_files_in_folder(folder_path, save_path):
+from FileCollection import DEFAULT_COLLECT_WORKERS, collect, plan_folder
+
+def rename_files_in_folder(folder_path, save_path, mode="move", workers=DEFAULT_COLLECT_WORKERS, dry_run=False):
     """
     Renames text files in the specified folder based on specific rules and saves them to the specified save_path.
+
+    The renames are planned first; when one would overwrite an existing file nothing is moved.
     
     Args:
         folder_path (str): Path to the folder containing the text files.
         save_path (str): Path to the folder where renamed files will be saved.
+        mode (str): 'move' the files, or 'copy'/'link' them and keep the originals.
+        workers (int): Files handled at the same time.
+        dry_run (bool): Only print the planned operations and bytes.
+
+    Returns:
+        bool: True when the files were processed, False when nothing was changed.
     """
     if not folder_path or not save_path:
         print("No folder or save path provided. Exiting...")
-        return
+        return False
 
     # Get the folder name
-    folder_name = os.path.basename(folder_path)
+    folder_name = os.path.basename(os.path.normpath(folder_path))
     print(f"Selected folder: {folder_name}")
 
     # Get today's date
     today_date = datetime.now().strftime("%Y-%m-%d")
     print(f"Today's date: {today_date}")
 
-    # Iterate over all files in the folder
-    for filename in os.listdir(folder_path):
-        old_path = os.path.join(folder_path, filename)
-        print(f"Processing file: {filename}")
-
-        if filename == "app.txt":
-            # Rename to "foldername.YYYY-MM-DD.txt"
-            new_filename = f"{folder_name}.{today_date}.txt"
-            print(f"Renaming 'app.txt' to: {new_filename}")
-
-        elif filename.startswith("app.") and filename.endswith(".txt"):
-            # Replace "app." with the folder name
-            new_filename = filename.replace("app.", f"{folder_name}.", 1)
-            print(f"Renaming 'app.*.txt' to: {new_filename}")
-
-        else:
-            print(f"Skipping file (does not match pattern): {filename}")
-            continue  # Skip files that don't match the pattern
-
-        # Construct the new file path in the save_path directory
-        new_path = os.path.join(save_path, new_filename)
+    operations = plan_folder(folder_path, save_path, today_date, folder_name)
+    if not collect(operations, mode, workers, dry_run):
+        return False
+    if not dry_run:
+        print("Renaming completed!")
+    return True
 
-        # Rename and move the file
-        os.rename(old_path, new_path)
-        print(f'Renamed and moved: "{filename}" → "{new_filename}"')
-
-    print("Renaming completed!")
-
-def main(folder_path=None, save_path=None):
+def main(folder_path=None, save_path=None, mode="move", workers=DEFAULT_COLLECT_WORKERS, dry_run=False):
     """
     Main function to call the rename process.
     
     Args:
         folder_path (str): Path to the folder containing the text files.
         save_path (str): Path to the folder where renamed files will be saved.
+        mode (str): How the files are collected: 'move', 'copy' or 'link'.
+        workers (int): Files handled at the same time.
+        dry_run (bool): Only print the planned operations and bytes.
+
+    Returns:
+        int: Exit code, 0 when the files were processed and 1 otherwise.
     """
     if not folder_path or not save_path:
         print("No folder or save path provided. Exiting...")
-        return
+        return 1
 
-    rename_files_in_folder(folder_path, save_path)
+    return 0 if rename_files_in_folder(folder_path, save_path, mode, workers, dry_run) else 1
 
-if __name__ == "__main__":
-    # For standalone execution, use the original tkinter folder selection
+def choose_folders():
+    """Asks for the source folder and the save folder with tkinter dialogs."""
     import tkinter as tk
     from tkinter import filedialog
 
@@ -72,8 +67,10 @@ if __name__ == "__main__":
     root.withdraw()  # Hide the root window
     folder_path = filedialog.askdirectory(title="Select Folder Containing Text Files")
     save_path = filedialog.askdirectory(title="Select Folder to Save Renamed Files")
+    return folder_path, save_path
+
+if __name__ == "__main__":
+    import sys
+    import cli
 
-    if folder_path and save_path:
-        main(folder_path, save_path)
-    else:
-        print("No folder or save path selected. Exiting...")
\ No newline at end of file
+    sys.exit(cli.main(["rename", *sys.argv[1:]]))
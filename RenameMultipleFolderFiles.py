@@ -1,74 +1,76 @@
 import os
-import shutil
 from datetime import datetime
 
-def rename_and_copy_files(master_folder, save_path):
+from FileCollection import DEFAULT_COLLECT_WORKERS, collect, mode_verb, plan_folder
+
+def rename_and_copy_files(master_folder, save_path, mode="copy", workers=DEFAULT_COLLECT_WORKERS, dry_run=False):
     """
     Renames files inside each subfolder and copies them to a new directory.
+
+    All subfolders are planned first and checked for files that would be overwritten,
+    e.g. by an earlier run on the same day; the files are then copied several at a time.
     
     Args:
         master_folder (str): Path to the master folder containing subfolders with files.
         save_path (str): Path to the folder where renamed files will be saved.
+        mode (str): 'copy' (cloned where the file system supports it), 'link' (hard links
+            where possible) or 'move', see FileCollection.COLLECT_MODES.
+        workers (int): Files copied at the same time.
+        dry_run (bool): Only print the planned operations and bytes.
+
+    Returns:
+        bool: True when the files were processed, False when nothing was changed.
     """
     if not master_folder or not save_path:
         print("No master folder or save path provided. Exiting...")
-        return
+        return False
 
     # Get the master folder's name
-    master_folder_name = os.path.basename(master_folder)
-    
-    # Create the output directory
+    master_folder_name = os.path.basename(os.path.normpath(master_folder))
     renamed_folder = os.path.join(save_path, f"{master_folder_name}_Renamed")
-    os.makedirs(renamed_folder, exist_ok=True)
 
     # Get today's date
     today_date = datetime.now().strftime("%Y-%m-%d")
 
-    # Iterate through each subfolder
+    # Plan every subfolder before anything is copied
+    operations = []
     for subfolder in os.listdir(master_folder):
         subfolder_path = os.path.join(master_folder, subfolder)
 
         if os.path.isdir(subfolder_path):  # Process only directories
             print(f"Processing subfolder: {subfolder}")
+            operations.extend(plan_folder(subfolder_path, renamed_folder, today_date, subfolder))
 
-            # Iterate over files in subfolder
-            for filename in os.listdir(subfolder_path):
-                old_file_path = os.path.join(subfolder_path, filename)
-
-                if filename == "app.txt":
-                    # Rename app.txt with today's date
-                    new_filename = f"{subfolder}.{today_date}.txt"
-                elif filename.startswith("app.") and filename.endswith(".txt"):
-                    # Rename other app.*.txt files
-                    new_filename = filename.replace("app.", f"{subfolder}.", 1)
-                else:
-                    print(f"Skipping file (does not match pattern): {filename}")
-                    continue
-
-                new_file_path = os.path.join(renamed_folder, new_filename)
+    if not dry_run:
+        os.makedirs(renamed_folder, exist_ok=True)
+    if not collect(operations, mode, workers, dry_run):
+        return False
+    if not dry_run:
+        print(f"Processing completed! All files are {mode_verb(mode)} to:", renamed_folder)
+    return True
 
-                # Copy the renamed file to the new directory
-                shutil.copy2(old_file_path, new_file_path)
-                print(f'Copied & Renamed: "{filename}" → "{new_filename}"')
-
-    print("Processing completed! All files are stored in:", renamed_folder)
-
-def main(master_folder=None, save_path=None):
+def main(master_folder=None, save_path=None, mode="copy", workers=DEFAULT_COLLECT_WORKERS, dry_run=False):
     """
     Main function to initiate file processing.
     
     Args:
         master_folder (str): Path to the master folder containing subfolders with files.
         save_path (str): Path to the folder where renamed files will be saved.
+        mode (str): How the files are collected: 'copy', 'link' or 'move'.
+        workers (int): Files copied at the same time.
+        dry_run (bool): Only print the planned operations and bytes.
+
+    Returns:
+        int: Exit code, 0 when the files were processed and 1 otherwise.
     """
     if not master_folder or not save_path:
         print("No master folder or save path provided. Exiting...")
-        return
+        return 1
 
-    rename_and_copy_files(master_folder, save_path)
+    return 0 if rename_and_copy_files(master_folder, save_path, mode, workers, dry_run) else 1
 
-if __name__ == "__main__":
-    # For standalone execution, use the original tkinter folder selection
+def choose_folders():
+    """Asks for the source folder and the save folder with tkinter dialogs."""
     import tkinter as tk
     from tkinter import filedialog
 
@@ -76,8 +78,10 @@ if __name__ == "__main__":
     root.withdraw()  # Hide the root window
     master_folder = filedialog.askdirectory(title="Select Master Folder")
     save_path = filedialog.askdirectory(title="Select Folder to Save Renamed Files")
+    return master_folder, save_path
+
+if __name__ == "__main__":
+    import sys
+    import cli
 
-    if master_folder and save_path:
-        main(master_folder, save_path)
-    else:
-        print("No master folder or save path selected. Exiting...")
\ No newline at end of file
+    sys.exit(cli.main(["rename-tree", *sys.argv[1:]]))
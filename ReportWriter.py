@@ -0,0 +1,292 @@
+import sys
+
+from HitTimeline import SPIKE_BASELINE_MINUTES, SPIKE_FACTOR, SPIKE_MIN_HITS, minute_label
+
+# Console verbosity levels, from least to most output
+SUMMARY = 0   # Only the final "Analysis complete" style messages
+PROGRESS = 1  # Plus one line per analyzed file
+FULL = 2      # The whole report mirrored to the console
+
+VERBOSITY_LEVELS = {"summary": SUMMARY, "progress": PROGRESS, "full": FULL}
+
+# Bytes collected in memory before a sink writes them out in one call
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+# Crash signatures whose example stack trace is written below the signature table
+DEFAULT_EXEMPLARS = 10
+
+# Templates listed as candidate new keywords, most frequent first
+DEFAULT_CANDIDATES = 50
+
+# Spikes listed in the hit timeline, earliest first
+DEFAULT_SPIKES = 50
+
+
+def parse_verbosity(verbosity):
+    """Accepts a level number or one of 'summary', 'progress' and 'full'."""
+    if isinstance(verbosity, int):
+        return verbosity
+    try:
+        return VERBOSITY_LEVELS[verbosity]
+    except KeyError:
+        raise ValueError(f"Unknown verbosity '{verbosity}'. Use 'summary', 'progress' or 'full'.")
+
+
+class BufferedSink:
+    """
+    Sink that collects text and writes it to a stream in large blocks.
+
+    Text is only forwarded when its level is at or below the sink's level, so the
+    same report can feed a complete file and a quieter console.
+    """
+
+    def __init__(self, stream, level=FULL, buffer_size=DEFAULT_BUFFER_SIZE, close_stream=False, flush_level=None):
+        """
+        Args:
+            stream: Text stream with write() and flush(), e.g. an open file or sys.stdout.
+            level (int): Most detailed level this sink receives.
+            buffer_size (int): Characters buffered before writing to the stream.
+            close_stream (bool): Close the stream together with the sink.
+            flush_level (int): Text at or below this level is written out right away, so
+                progress lines show up while the scan runs. None only flushes when full.
+        """
+        self.stream = stream
+        self.level = level
+        self.flush_level = flush_level
+        self.buffer_size = buffer_size
+        self.close_stream = close_stream
+        self._chunks = []
+        self._buffered = 0
+
+    def write(self, text, level=FULL):
+        if level > self.level:
+            return
+        self._chunks.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.buffer_size or (self.flush_level is not None and level <= self.flush_level):
+            self.flush()
+
+    def flush(self):
+        if self._chunks:
+            self.stream.write("".join(self._chunks))
+            self._chunks = []
+            self._buffered = 0
+        self.stream.flush()
+
+    def close(self):
+        self.flush()
+        if self.close_stream:
+            self.stream.close()
+
+
+class CallbackSink:
+    """
+    Sink that hands text to a function as it is produced, e.g. to show a report in the UI
+    while the scan is still running.
+    """
+
+    def __init__(self, callback, level=PROGRESS):
+        self.callback = callback
+        self.level = level
+
+    def write(self, text, level=FULL):
+        if level <= self.level:
+            self.callback(text)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class ReportWriter:
+    """
+    Writes report lines to any number of sinks.
+
+    Replaces the old write_and_print closures: instead of one print() and one
+    file.write() per line, every line goes to buffered sinks that each decide whether
+    they want it based on its level.
+    """
+
+    def __init__(self, sinks):
+        self.sinks = list(sinks)
+
+    @classmethod
+    def open(cls, report_path, verbosity="progress", extra_sinks=(), buffer_size=DEFAULT_BUFFER_SIZE):
+        """
+        Creates a writer for a report file with a console echo.
+
+        Args:
+            report_path (str): Path of the report file, always written in full.
+            verbosity (str): Console output, 'summary', 'progress' or 'full'.
+            extra_sinks (iterable): Additional sinks fed while the report is written.
+            buffer_size (int): Characters buffered before each bulk write.
+        """
+        report_file = open(report_path, 'w')
+        sinks = [
+            BufferedSink(report_file, FULL, buffer_size, close_stream=True),
+            BufferedSink(sys.stdout, parse_verbosity(verbosity), buffer_size, flush_level=PROGRESS),
+        ]
+        return cls(sinks + list(extra_sinks))
+
+    def line(self, text="", end='\n', level=FULL):
+        text += end
+        for sink in self.sinks:
+            sink.write(text, level)
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+
+def write_results(writer, found_errors_line, unique_lines_per_error, crashed_occurrences, crash_category=None):
+    """
+    Writes the per-category section of a report for one analyzed log.
+
+    Args:
+        writer (ReportWriter): Destination of the report.
+        found_errors_line (dict): Per category {"count", "lines"} from search_errors.
+        unique_lines_per_error (dict): Per category {keyword: first line seen}.
+        crashed_occurrences (list): (line_num, line) tuples for the crash category.
+        crash_category (str): Category listed line by line instead of by keyword, or None.
+    """
+    for error_type, data in found_errors_line.items():
+        writer.line(f"\n{error_type}:")
+        writer.line(f"  Total Occurrences: {data['count']}")
+        if data['lines']:
+            # Stream the line numbers in batches instead of building one huge string
+            writer.line("  Found on Lines: ", end='')
+            for text in data['lines'].iter_text():
+                writer.line(text, end='')
+            writer.line("\n")
+            if error_type == crash_category:
+                writer.line("  Errors Found:")
+                for line_num, line_content in crashed_occurrences:
+                    writer.line(f"    Line {line_num}: {line_content}")
+                if crashed_occurrences.truncated:
+                    writer.line(f"    ... {crashed_occurrences.truncated} more crash lines not listed")
+            else:
+                writer.line("  Known Errors:")
+                for keyword, line_content in unique_lines_per_error[error_type].items():
+                    writer.line(f"    - {keyword}: {line_content}")
+        else:
+            writer.line("  No occurrences found.\n")
+
+
+def write_signatures(writer, signatures, exemplars=DEFAULT_EXEMPLARS, per_file=False):
+    """
+    Writes the crash signature table: one row per distinct stack trace, most frequent
+    first, followed by an example trace of the top signatures.
+
+    Args:
+        writer (ReportWriter): Destination of the report.
+        signatures (TraceSignatures): Signatures from collect_traces.
+        exemplars (int): Number of top signatures whose example trace is written.
+        per_file (bool): Show in how many files each signature occurs and where the
+            example comes from, for folder reports.
+    """
+    ranked = signatures.ranked()
+    writer.line("\nCrash Signatures:")
+    writer.line(f"  Stack traces: {signatures.total}, unique signatures: {len(ranked)}")
+    if not ranked:
+        writer.line("  No stack traces found.\n")
+        return
+
+    files_header = f"{'Files':>6}  " if per_file else ""
+    writer.line(f"  {'Rank':>4}  {'Count':>7}  {files_header}{'Signature':<12}  Exception")
+    for rank, (fingerprint, entry) in enumerate(ranked, start=1):
+        files = f"{entry['files']:>6}  " if per_file else ""
+        writer.line(f"  {rank:>4}  {entry['count']:>7}  {files}{fingerprint:<12}  {entry['title']}")
+    if signatures.dropped:
+        writer.line(f"  ... {signatures.dropped} more stack traces with signatures beyond the first "
+                    f"{signatures.max_signatures} not listed")
+
+    for rank, (fingerprint, entry) in enumerate(ranked[:exemplars], start=1):
+        source = f"{entry['file']}, line {entry['line']}" if per_file else f"line {entry['line']}"
+        writer.line(f"\n  #{rank} {fingerprint} ({source}):")
+        for text in entry["lines"]:
+            writer.line(f"    {text}")
+    writer.line()
+
+
+def write_templates(writer, templates, candidates=DEFAULT_CANDIDATES, exemplars=DEFAULT_EXEMPLARS, per_file=False):
+    """
+    Writes the candidate new keywords: the templates mined from error lines no keyword
+    matched, most frequent first, followed by example lines of the top templates.
+
+    Args:
+        writer (ReportWriter): Destination of the report.
+        templates (TemplateMiner): Templates mined during the scans.
+        candidates (int): Number of templates listed.
+        exemplars (int): Number of top templates whose example lines are written.
+        per_file (bool): Show in how many files each template occurs and where the
+            examples come from, for folder reports.
+    """
+    ranked = templates.ranked()
+    writer.line("\nCandidate New Keywords:")
+    writer.line(f"  Error lines without a keyword: {templates.total}, templates: {len(ranked)}")
+    if not ranked:
+        writer.line("  No unmatched error lines found.\n")
+        return
+
+    files_header = f"{'Files':>6}  " if per_file else ""
+    writer.line(f"  {'Rank':>4}  {'Count':>7}  {files_header}Keyword | Template")
+    for rank, template in enumerate(ranked[:candidates], start=1):
+        files = f"{template.files:>6}  " if per_file else ""
+        writer.line(f"  {rank:>4}  {template.count:>7}  {files}{template.keyword()} | {template.text()}")
+    if len(ranked) > candidates:
+        writer.line(f"  ... {len(ranked) - candidates} less frequent templates not listed")
+    if templates.dropped:
+        writer.line(f"  ... {templates.dropped} more error lines of templates beyond the first "
+                    f"{templates.max_templates} not listed")
+
+    for rank, template in enumerate(ranked[:exemplars], start=1):
+        writer.line(f"\n  #{rank} {template.keyword()}:")
+        for file, line_num, message in template.exemplars:
+            source = f"{file}, line {line_num}" if per_file else f"Line {line_num}"
+            writer.line(f"    {source}: {message}")
+    writer.line()
+
+
+def write_timeline(writer, timeline, spikes=DEFAULT_SPIKES):
+    """
+    Writes the hit timeline: the minutes covered, the busiest minute and the minutes
+    whose hits spiked above the rolling baseline, see HitTimeline.spikes.
+
+    Args:
+        writer (ReportWriter): Destination of the report.
+        timeline (HitTimeline): Hits per category and minute of the analyzed logs.
+        spikes (int): Number of spikes listed.
+    """
+    total = timeline.total()
+    writer.line("\nHit Timeline:")
+    writer.line(f"  Hits with a timestamp: {sum(total)}, without: {timeline.untimed}")
+    if timeline.start is None:
+        writer.line("  No hits with a logcat timestamp found.\n")
+        return
+    busiest = max(range(len(total)), key=total.__getitem__)
+    writer.line(f"  From {minute_label(timeline.start)} to {minute_label(timeline.start + len(total) - 1)} "
+                f"({len(total)} minutes), busiest minute {minute_label(timeline.start + busiest)} "
+                f"with {total[busiest]} hits")
+
+    found = timeline.spikes()
+    writer.line(f"  Spikes (at least {SPIKE_MIN_HITS} hits and over {SPIKE_FACTOR:g}x the average of the "
+                f"previous {SPIKE_BASELINE_MINUTES} minutes): {len(found)}")
+    if found:
+        writer.line(f"  {'Minute':<11}  {'Hits':>7}  {'Baseline':>8}  Category")
+        for minute, name, count, baseline in found[:spikes]:
+            writer.line(f"  {minute_label(minute):<11}  {count:>7}  {baseline:>8.1f}  {name}")
+        if len(found) > spikes:
+            writer.line(f"  ... {len(found) - spikes} more spikes not listed")
+    writer.line()
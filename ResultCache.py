@@ -0,0 +1,271 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import time
+import zlib
+
+from CompressedInput import split_member
+from LineAccumulator import BoundedList
+
+# Bump when the scan semantics change so older cached results are never reused
+CACHE_VERSION = 2
+
+# Number of log files kept in the cache before the least recently used are evicted
+DEFAULT_MAX_FILES = 5000
+
+
+def category_hash(error_type, details, engine="text", max_lines=None):
+    """
+    Hashes everything that influences the results of one category.
+
+    Args:
+        error_type (str): Category name.
+        details (dict): The category entry from keywords.json.
+        engine (str): Scan engine the results come from.
+        max_lines (int): Line cap the results were collected with.
+
+    Returns:
+        str: Hex digest identifying the category's results.
+    """
+    key = json.dumps([CACHE_VERSION, error_type, details, engine, max_lines], sort_keys=True)
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def file_fingerprint(file_path):
+    """
+    Returns (size, mtime_ns) of a file, which changes whenever the log is rewritten.
+
+    A zip member is fingerprinted by its bundle; its cache rows are still per member.
+    """
+    stat = os.stat(split_member(file_path)[0])
+    return stat.st_size, stat.st_mtime_ns
+
+
+class ResultCache:
+    """
+    On-disk SQLite cache of search_errors results, one row per (log file, category).
+
+    A file's rows are only reused while its size and mtime are unchanged, and a
+    category's row only while its keywords hash the same, so after editing one
+    category in keywords.json only that category has to be rescanned. A cache may be
+    used by one thread at a time, not necessarily the one that opened it, as the
+    analysis daemon keeps it open between jobs.
+    """
+
+    def __init__(self, db_path, max_files=DEFAULT_MAX_FILES):
+        """
+        Args:
+            db_path (str): Path of the SQLite database file; created when missing.
+            max_files (int): Maximum number of log files kept in the cache.
+        """
+        self.db_path = db_path
+        self.max_files = max_files
+        self.reset_stats()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS categories (
+                path TEXT NOT NULL,
+                category_hash TEXT NOT NULL,
+                data BLOB NOT NULL,
+                PRIMARY KEY (path, category_hash)
+            );
+        """)
+
+    def reset_stats(self):
+        """Starts counting the hits and misses reported by summary() anew, e.g. for the next analysis."""
+        self.stats = {"category_hits": 0, "category_misses": 0, "file_hits": 0, "files_scanned": 0}
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.evict()
+        self.close()
+
+    def lookup(self, file_path, error_data, engine="text", max_lines=None):
+        """
+        Finds which categories of a log file are cached, without loading them yet.
+
+        Args:
+            file_path (str): Path to the log file.
+            error_data (dict): Parsed keywords.json.
+            engine (str): Scan engine in use.
+            max_lines (int): Line cap in use.
+
+        Returns:
+            tuple: (cached, missing, fingerprint) where cached and missing list category
+            names, and fingerprint is the file state to pass back to store().
+        """
+        path = os.path.abspath(file_path)
+        fingerprint = file_fingerprint(file_path)
+        row = self._connection.execute(
+            "SELECT size, mtime_ns FROM files WHERE path = ?", (path,)).fetchone()
+
+        found = set()
+        if row == fingerprint:
+            hashes = self._hashes(error_data, engine, max_lines)
+            placeholders = ", ".join("?" * len(hashes))
+            for (digest,) in self._connection.execute(
+                    f"SELECT category_hash FROM categories WHERE path = ? AND category_hash IN ({placeholders})",
+                    (path, *hashes)):
+                found.add(hashes[digest])
+
+        cached = [error_type for error_type in error_data if error_type in found]
+        missing = [error_type for error_type in error_data if error_type not in found]
+        self.stats["category_hits"] += len(cached)
+        self.stats["category_misses"] += len(missing)
+        if missing:
+            self.stats["files_scanned"] += 1
+        else:
+            self.stats["file_hits"] += 1
+            self._touch(path)
+        return cached, missing, fingerprint
+
+    def load(self, file_path, error_data, categories, engine="text", max_lines=None):
+        """
+        Loads cached categories of a log file.
+
+        Args:
+            file_path (str): Path to the log file.
+            error_data (dict): Parsed keywords.json.
+            categories (list): Category names reported as cached by lookup().
+            engine (str): Scan engine in use.
+            max_lines (int): Line cap in use.
+
+        Returns:
+            dict: category -> (result, unique_lines, crashed_occurrences)
+        """
+        path = os.path.abspath(file_path)
+        hashes = self._hashes({error_type: error_data[error_type] for error_type in categories}, engine, max_lines)
+        placeholders = ", ".join("?" * len(hashes))
+        return {
+            hashes[digest]: pickle.loads(zlib.decompress(data))
+            for digest, data in self._connection.execute(
+                f"SELECT category_hash, data FROM categories WHERE path = ? AND category_hash IN ({placeholders})",
+                (path, *hashes))
+        }
+
+    @staticmethod
+    def _hashes(error_data, engine, max_lines):
+        return {category_hash(error_type, details, engine, max_lines): error_type
+                for error_type, details in error_data.items()}
+
+    def store(self, file_path, fingerprint, error_data, scan, engine="text", max_lines=None):
+        """
+        Caches freshly scanned categories of a log file.
+
+        Rows of categories whose keywords changed since are dropped, so each file keeps
+        at most one row per category.
+
+        Args:
+            file_path (str): Path to the log file.
+            fingerprint (tuple): File state returned by lookup() before the scan, so a log
+                that changed during the scan is rescanned next time.
+            error_data (dict): Parsed keywords.json.
+            scan (tuple): search_errors results covering the scanned categories; the
+                other categories of error_data keep their cached rows.
+            engine (str): Scan engine in use.
+            max_lines (int): Line cap in use.
+        """
+        path = os.path.abspath(file_path)
+        size, mtime_ns = fingerprint
+        results, unique_lines_per_error, crashed_occurrences = scan
+        current = list(self._hashes(error_data, engine, max_lines))
+
+        with self._connection:
+            row = self._connection.execute(
+                "SELECT size, mtime_ns FROM files WHERE path = ?", (path,)).fetchone()
+            if row != (size, mtime_ns):
+                self._connection.execute("DELETE FROM categories WHERE path = ?", (path,))
+            else:
+                placeholders = ", ".join("?" * len(current))
+                self._connection.execute(
+                    f"DELETE FROM categories WHERE path = ? AND category_hash NOT IN ({placeholders})",
+                    (path, *current))
+            self._connection.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, last_used) VALUES (?, ?, ?, ?)",
+                (path, size, mtime_ns, time.time()))
+
+            for error_type, digest in zip(error_data, current):
+                if error_type not in results:
+                    continue
+                entry = (
+                    results[error_type],
+                    unique_lines_per_error[error_type],
+                    crashed_occurrences if error_data[error_type].get("crash") else None,
+                )
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO categories (path, category_hash, data) VALUES (?, ?, ?)",
+                    (path, digest, zlib.compress(pickle.dumps(entry, pickle.HIGHEST_PROTOCOL))))
+
+    def _touch(self, path):
+        with self._connection:
+            self._connection.execute("UPDATE files SET last_used = ? WHERE path = ?", (time.time(), path))
+
+    def evict(self):
+        """
+        Drops the least recently used files beyond max_files.
+
+        Returns:
+            int: Number of files evicted.
+        """
+        with self._connection:
+            stale = [path for (path,) in self._connection.execute(
+                "SELECT path FROM files ORDER BY last_used DESC LIMIT -1 OFFSET ?", (self.max_files,))]
+            for path in stale:
+                self._connection.execute("DELETE FROM categories WHERE path = ?", (path,))
+                self._connection.execute("DELETE FROM files WHERE path = ?", (path,))
+        return len(stale)
+
+    def summary(self):
+        """Returns a one-line description of the cache hits and misses so far."""
+        stats = self.stats
+        total = stats["category_hits"] + stats["category_misses"]
+        rate = 100.0 * stats["category_hits"] / total if total else 0.0
+        return (f"Cache: {stats['category_hits']}/{total} categories served from cache ({rate:.1f}%), "
+                f"{stats['file_hits']} files fully cached, {stats['files_scanned']} files scanned")
+
+
+def assemble_results(error_data, cached, scan):
+    """
+    Combines cached categories and freshly scanned ones into search_errors results.
+
+    Args:
+        error_data (dict): Parsed keywords.json, giving the category order.
+        cached (dict): category -> (result, unique_lines, crashed_occurrences) from lookup.
+        scan (tuple): search_errors results for the missing categories, or None.
+
+    Returns:
+        tuple: (results, unique_lines_per_error, crashed_occurrences)
+    """
+    results = {}
+    unique_lines_per_error = {}
+    crashed_occurrences = None
+
+    for error_type in error_data:
+        if error_type in cached:
+            result, unique_lines, crashed = cached[error_type]
+        else:
+            result = scan[0][error_type]
+            unique_lines = scan[1][error_type]
+            crashed = scan[2] if error_data[error_type].get("crash") else None
+        results[error_type] = result
+        unique_lines_per_error[error_type] = unique_lines
+        if crashed is not None:
+            crashed_occurrences = crashed
+
+    if crashed_occurrences is None:
+        crashed_occurrences = scan[2] if scan is not None else BoundedList()
+    return results, unique_lines_per_error, crashed_occurrences
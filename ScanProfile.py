@@ -0,0 +1,211 @@
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from itertools import islice
+
+from CompressedInput import is_compressed, log_size, open_log
+from KeywordMatcher import compile_keywords
+from LogScanner import new_results, record_hits
+
+# Lines of every log timed stage by stage and category by category
+PROFILE_LINES = 50000
+
+# Lines timed together, so the timer calls don't dominate what they measure
+PROFILE_BATCH = 2048
+
+# Keywords listed per category in the profile, most hits first
+TOP_KEYWORDS = 20
+
+# Bytes read at a time when counting the lines of a log
+COUNT_BLOCK = 1024 * 1024
+
+# Stages of the line loop timed on the sample
+SAMPLE_STAGES = ("read_decode", "lowercase", "match", "record")
+
+
+def count_lines(log_path):
+    """Returns the number of lines of a plain, compressed or zipped log."""
+    if is_compressed(log_path):
+        with open_log(log_path, errors='replace') as lines:
+            return sum(1 for _ in lines)
+    line_count = 0
+    last = b"\n"
+    with open(log_path, 'rb') as raw_file:
+        for block in iter(lambda: raw_file.read(COUNT_BLOCK), b""):
+            line_count += block.count(b"\n")
+            last = block[-1:]
+    return line_count + (last != b"\n")
+
+
+def stage(profile, name):
+    """Times a stage of the analysis when profiling, e.g. `with stage(profile, "report"):`."""
+    return profile.stage(name) if profile is not None else nullcontext()
+
+
+class ScanProfile:
+    """
+    Where the time of an analysis goes, collected with --profile.
+
+    The analysis itself is only timed per stage and per log. What a line costs is
+    measured on a sample of the first PROFILE_LINES lines of every log, which are read
+    again and timed while being decoded, lowercased, matched and recorded, and then
+    matched once per category on its own. The per-category times show which categories
+    of keywords.json are expensive to match, and the keyword hit counts which keywords
+    flood the report.
+    """
+
+    def __init__(self, error_data, matcher=None):
+        """
+        Args:
+            error_data (dict): Parsed keywords.json.
+            matcher (KeywordMatcher): error_data already compiled; compiled when omitted.
+        """
+        self.error_data = error_data
+        self.matcher = matcher or compile_keywords(error_data)
+        self.started = time.perf_counter()
+        self.stages = Counter()
+        self.files = []
+        self.sample_lines = 0
+        self.sample_bytes = 0
+        self.sample_stages = Counter()
+        self.hits = Counter()
+        self.category_seconds = Counter()
+        self.sample_hits = Counter()
+        self.keyword_hits = {error_type: Counter() for error_type in error_data}
+        self._category_matchers = {error_type: compile_keywords({error_type: details})
+                                   for error_type, details in error_data.items()}
+        self._paths = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] += time.perf_counter() - start
+
+    def track_files(self, files):
+        """Passes (label, path) pairs through, remembering the path of every label."""
+        for label, path in files:
+            self._paths[label] = path
+            yield label, path
+
+    def timed_scans(self, scans):
+        """
+        Passes scan_files results through, timing how long every log's results took.
+
+        With workers, that is the time the report waited for the log, not its scan time.
+        """
+        scans = iter(scans)
+        while True:
+            start = time.perf_counter()
+            try:
+                label, scan = next(scans)
+            except StopIteration:
+                return
+            seconds = time.perf_counter() - start
+            self.stages["scan"] += seconds
+            self.add_file(label, self._paths.get(label, label), seconds, scan)
+            yield label, scan
+
+    def add_file(self, label, log_path, seconds, scan):
+        """
+        Records a scanned log and samples what its lines cost.
+
+        Args:
+            label (str): Name of the log in the reports.
+            log_path (str): Path of the log.
+            seconds (float): Time its scan took.
+            scan (tuple): (results, unique_lines_per_error, crashed_occurrences) of the scan.
+        """
+        with self.stage("profile"):
+            size = log_size(log_path)
+            lines = count_lines(log_path)
+            for error_type, data in scan[0].items():
+                self.hits[error_type] += data["count"]
+            self.files.append({"file": label, "bytes": size, "lines": lines, "seconds": seconds,
+                               **_rates(size, lines, seconds)})
+            self._sample(log_path)
+
+    def _sample(self, log_path):
+        find = self.matcher.find
+        crash = self.matcher.crash_category
+        clock = time.perf_counter
+        with open_log(log_path, errors='replace') as lines:
+            remaining = PROFILE_LINES
+            while remaining > 0:
+                start = clock()
+                batch = list(islice(lines, min(PROFILE_BATCH, remaining)))
+                if not batch:
+                    break
+                decoded = clock()
+                lowered = [line.lower() for line in batch]
+                lowercased = clock()
+                hits = [find(line) for line in lowered]
+                matched = clock()
+                scratch = new_results(self.error_data)
+                for line_num, (line, line_hits) in enumerate(zip(batch, hits)):
+                    if line_hits:
+                        record_hits(line_hits, line_num, line.strip(), *scratch, crash)
+                recorded = clock()
+                for stage_name, seconds in zip(SAMPLE_STAGES, (decoded - start, lowercased - decoded,
+                                                               matched - lowercased, recorded - matched)):
+                    self.sample_stages[stage_name] += seconds
+
+                for error_type, category_matcher in self._category_matchers.items():
+                    category_find = category_matcher.find
+                    start = clock()
+                    for line in lowered:
+                        category_find(line)
+                    self.category_seconds[error_type] += clock() - start
+                for line_hits in hits:
+                    for error_type, keywords in line_hits.items():
+                        self.sample_hits[error_type] += 1
+                        self.keyword_hits[error_type].update(keywords)
+
+                remaining -= len(batch)
+                self.sample_lines += len(batch)
+                self.sample_bytes += sum(len(line) for line in batch)
+
+    def to_dict(self, pstats_path=None):
+        """Returns the profile as the JSON-ready dictionary written by save."""
+        total_bytes = sum(file["bytes"] for file in self.files)
+        total_lines = sum(file["lines"] for file in self.files)
+        scan_seconds = self.stages["scan"]
+        category_total = sum(self.category_seconds.values()) or 1e-9
+        categories = [{
+            "category": error_type,
+            "entries": len(details.get("keywords", ())) + len(details.get("patterns", ())),
+            "hits": self.hits[error_type],
+            "sample_seconds": self.category_seconds[error_type],
+            "sample_share": self.category_seconds[error_type] / category_total,
+            "sample_us_per_line": self.category_seconds[error_type] / (self.sample_lines or 1) * 1e6,
+            "sample_hits": self.sample_hits[error_type],
+            "top_keywords": self.keyword_hits[error_type].most_common(TOP_KEYWORDS),
+        } for error_type, details in self.error_data.items()]
+        categories.sort(key=lambda category: category["sample_seconds"], reverse=True)
+        return {
+            "total_seconds": time.perf_counter() - self.started,
+            "stages": dict(self.stages),
+            "scan": {"files": len(self.files), "bytes": total_bytes, "lines": total_lines, "seconds": scan_seconds,
+                     **_rates(total_bytes, total_lines, scan_seconds)},
+            "sample": {"lines": self.sample_lines, "bytes": self.sample_bytes,
+                       "stages": dict(self.sample_stages),
+                       "us_per_line": {name: seconds / (self.sample_lines or 1) * 1e6
+                                       for name, seconds in self.sample_stages.items()}},
+            "categories": categories,
+            "files": self.files,
+            "pstats": pstats_path,
+        }
+
+    def save(self, path, pstats_path=None):
+        """Writes the profile as JSON and prints where it went."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(pstats_path), f, indent=2)
+        print(f"Profile saved to {path}")
+
+
+def _rates(size, lines, seconds):
+    seconds = seconds or 1e-9
+    return {"mb_per_s": size / 1e6 / seconds, "lines_per_s": lines / seconds}
@@ -0,0 +1,191 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import TimeoutError
+
+from CompressedInput import is_compressed, log_size
+
+# Lines scanned between two progress updates and cancellation checks (about 1 MB of log)
+PROGRESS_LINES = 8192
+
+# Seconds between two calls of the on_update callback
+DEFAULT_INTERVAL = 0.25
+
+
+class ScanCancelled(Exception):
+    """Raised inside a scan once ScanProgress.cancel() was called."""
+
+
+class ScanProgress:
+    """
+    Progress and cancellation of an analysis, shared between the scan and the UI.
+
+    The scan reports bytes scanned (of the logs as stored on disk), finished files and
+    their hits per category; the UI reads snapshot() or gets it pushed through
+    on_update, at most every `interval` seconds. cancel() can be called from any thread
+    and stops the scan at its next check, in the middle of a file.
+
+    Scans in worker processes report through worker_channel(), a shared flag and byte
+    counter handed to the pool initializer.
+    """
+
+    def __init__(self, on_update=None, interval=DEFAULT_INTERVAL):
+        """
+        Args:
+            on_update (function): Called with snapshot() while the scan runs. It runs on the
+                scanning thread, so GUIs should only forward it, e.g. as a Qt signal.
+            interval (float): Minimum seconds between two on_update calls.
+        """
+        self.on_update = on_update
+        self.interval = interval
+        self.started = time.monotonic()
+        self.total_bytes = 0
+        self.files_total = 0
+        self.files_done = 0
+        self.discovery_done = False  # False while more files may still be added
+        self.current_file = None
+        self.hits = {}
+        self._bytes = 0
+        self._cancelled = threading.Event()
+        self._channel = None
+        self._last_update = 0.0
+
+    # Reported by the scan
+
+    def add_file(self, log_path):
+        """Adds a log to the total; returns its size in bytes."""
+        size = log_size(log_path)
+        self.total_bytes += size
+        self.files_total += 1
+        return size
+
+    def advance(self, scanned):
+        """Adds scanned bytes, stopping the scan with ScanCancelled when it was cancelled."""
+        self._bytes += scanned
+        self.check()
+        self._notify()
+
+    def file_done(self, label, scan):
+        """Records a finished log and its (results, unique_lines, crashed) hit counts."""
+        self.files_done += 1
+        self.current_file = label
+        for error_type, data in scan[0].items():
+            self.hits[error_type] = self.hits.get(error_type, 0) + data["count"]
+        self._notify(force=True)
+
+    def wait(self, future):
+        """
+        Waits for the result of a worker process, meanwhile passing on the progress the
+        workers report and stopping with ScanCancelled once cancelled.
+        """
+        while True:
+            try:
+                return future.result(timeout=self.interval)
+            except TimeoutError:
+                self.check()
+                self._notify()
+
+    def worker_channel(self):
+        """Returns the (cancel flag, byte counter) pair worker processes report through."""
+        if self._channel is None:
+            self._channel = (multiprocessing.Event(), multiprocessing.Value('q', 0))
+            if self.cancelled:
+                self._channel[0].set()
+        return self._channel
+
+    # Used by the UI
+
+    def cancel(self):
+        self._cancelled.set()
+        if self._channel is not None:
+            self._channel[0].set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def check(self):
+        if self._cancelled.is_set():
+            raise ScanCancelled("Analysis cancelled")
+
+    @property
+    def bytes_done(self):
+        shared = self._channel[1].value if self._channel is not None else 0
+        return self._bytes + shared
+
+    def eta(self):
+        """Seconds left at the current rate, or None while it can't be estimated yet."""
+        done = self.bytes_done
+        elapsed = time.monotonic() - self.started
+        if not done or not self.discovery_done or elapsed <= 0:
+            return None
+        return max(0.0, (self.total_bytes - done) * elapsed / done)
+
+    def snapshot(self):
+        """Returns the current progress as a plain dict, safe to pass between threads."""
+        return {
+            "bytes_done": min(self.bytes_done, self.total_bytes) if self.discovery_done else self.bytes_done,
+            "total_bytes": self.total_bytes,
+            "files_done": self.files_done,
+            "files_total": self.files_total,
+            "discovery_done": self.discovery_done,
+            "current_file": self.current_file,
+            "hits": dict(self.hits),
+            "elapsed": time.monotonic() - self.started,
+            "eta": self.eta(),
+        }
+
+    def _notify(self, force=False):
+        if self.on_update is None:
+            return
+        now = time.monotonic()
+        if force or now - self._last_update >= self.interval:
+            self._last_update = now
+            self.on_update(self.snapshot())
+
+
+class WorkerProgress:
+    """The advance() and check() side of a ScanProgress inside a worker process."""
+
+    def __init__(self, channel):
+        self._cancel_event, self._bytes = channel
+
+    def advance(self, scanned):
+        with self._bytes.get_lock():
+            self._bytes.value += scanned
+        self.check()
+
+    def check(self):
+        if self._cancel_event.is_set():
+            raise ScanCancelled("Analysis cancelled")
+
+
+class FileProgress:
+    """
+    Reports the progress of scanning one log to a ScanProgress or WorkerProgress.
+
+    Plain logs advance as their lines are scanned. Compressed logs only know their
+    size on disk, so they are credited in full once scanned; cancellation is still
+    checked while they are read.
+    """
+
+    def __init__(self, progress, log_path, size=None):
+        """
+        Args:
+            progress: ScanProgress or WorkerProgress receiving the bytes.
+            log_path (str): The log being scanned.
+            size (int): Bytes to credit for the log. Defaults to its size on disk.
+        """
+        self.progress = progress
+        self.size = log_size(log_path) if size is None else size
+        self.streamed = not is_compressed(log_path)
+        self.credited = 0
+
+    def advance(self, scanned):
+        credit = min(scanned, self.size - self.credited) if self.streamed else 0
+        self.credited += credit
+        self.progress.advance(credit)
+
+    def finish(self):
+        self.progress.advance(self.size - self.credited)
+        self.credited = self.size
@@ -0,0 +1,205 @@
+import hashlib
+import json
+import os
+import pickle
+import zlib
+
+# Bump when the contents of a partial result change, so older partials are refused
+SHARD_VERSION = 2
+
+# Extension of the partial result files written by analyze-folder --shard
+SHARD_EXTENSION = ".shard"
+
+
+def parse_shard(text):
+    """
+    Parses a '--shard i/N' argument, e.g. '2/4' for the second of four shards.
+
+    Returns:
+        tuple: (i, N) with 1 <= i <= N.
+
+    Raises:
+        ValueError: When the text is not of that form.
+    """
+    index, _, count = text.partition("/")
+    if not index.isdigit() or not count.isdigit() or not 1 <= int(index) <= int(count):
+        raise ValueError(f"'{text}' is not a shard like 2/4 (shard 2 of 4, counted from 1).")
+    return int(index), int(count)
+
+
+def shard_of(label, count):
+    """
+    Returns the shard, from 1 to count, a log belongs to.
+
+    The shard only depends on the log's path relative to the analyzed folder, so every
+    node picks its logs without talking to the others, on Windows and Linux alike, and
+    a log keeps its shard when logs are added to the folder.
+    """
+    return zlib.crc32(label.replace(os.sep, "/").encode("utf-8")) % count + 1
+
+
+def shard_settings(error_data, engine, max_lines, window, recursive, log_filter):
+    """
+    Returns a digest of everything that must be the same on all shards of an analysis.
+
+    Partials of differing keywords, engines, line caps, time windows or file filters
+    would merge into a report no single run produces, so merge_partials refuses them.
+    """
+    key = json.dumps([SHARD_VERSION, error_data, engine, max_lines, str(window) if window else None, recursive,
+                      log_filter.include, log_filter.exclude, log_filter.min_size, log_filter.max_size,
+                      log_filter.newer_than, log_filter.older_than], sort_keys=True)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+class ShardSelector:
+    """
+    Picks the logs of one shard from the stream of logs discovered in the folder.
+
+    Every node discovers the whole folder, so it also learns where each of its logs
+    comes in the complete list, how many logs there are and a fingerprint of the list;
+    merge_partials uses them to put the logs back in the order of a single-node run and
+    to check that all nodes saw the same logs in the same order and no shard is missing.
+    """
+
+    def __init__(self, index, count):
+        self.index = index
+        self.count = count
+        self.files_total = 0
+        self.positions = {}  # Label -> position in the complete list of logs
+        self._digest = hashlib.sha1()
+
+    @property
+    def fingerprint(self):
+        """Digest of the labels of all logs in the folder, in the order they were found."""
+        return self._digest.hexdigest()
+
+    def select(self, files):
+        """Passes the (label, path) pairs of the shard's logs through."""
+        for position, (label, path) in enumerate(files):
+            self.files_total = position + 1
+            self._digest.update(label.replace(os.sep, "/").encode("utf-8") + b"\0")
+            if shard_of(label, self.count) == self.index:
+                self.positions[label] = position
+                yield label, path
+
+
+class ShardPartial:
+    """
+    The results of one shard of a folder analysis, written by analyze-folder --shard.
+
+    It holds the search_errors results of the shard's logs as they are reported, i.e.
+    the counts and line numbers per category, the first line of every keyword and the
+    crash lines, from which merge rebuilds the consolidated and summary reports. The
+    file is a zlib-compressed pickle, like the ResultCache rows; only merge partials
+    written by your own nodes, as loading a pickle can run code.
+    """
+
+    def __init__(self, shard, folder_path, folder_name, settings, error_data, files_total=0, fingerprint="",
+                 files=None):
+        """
+        Args:
+            shard (tuple): (i, N) of the shard.
+            folder_path (str): Analyzed folder as the node saw it, shown in the merged report's header.
+            folder_name (str): Name of the analyzed folder, used to name the merged reports.
+            settings (str): shard_settings of the analysis.
+            error_data (dict): Parsed keywords.json the logs were scanned with.
+            files_total (int): Logs of the whole folder, across all shards.
+            fingerprint (str): ShardSelector.fingerprint of the folder's logs.
+            files (list): (position, label, scan) of every log of the shard.
+        """
+        self.shard = tuple(shard)
+        self.folder_path = folder_path
+        self.folder_name = folder_name
+        self.settings = settings
+        self.error_data = error_data
+        self.files_total = files_total
+        self.fingerprint = fingerprint
+        self.files = files if files is not None else []
+
+    def save(self, path):
+        # Labels are stored with '/', so partials of Windows and Linux nodes merge
+        state = {
+            "version": SHARD_VERSION,
+            "shard": self.shard,
+            "folder_path": self.folder_path,
+            "folder_name": self.folder_name,
+            "settings": self.settings,
+            "error_data": self.error_data,
+            "files_total": self.files_total,
+            "fingerprint": self.fingerprint,
+            "files": [(position, label.replace(os.sep, "/"), scan) for position, label, scan in self.files],
+        }
+        with open(path, 'wb') as f:
+            f.write(zlib.compress(pickle.dumps(state, pickle.HIGHEST_PROTOCOL)))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a partial written by save.
+
+        Raises:
+            ValueError: When the file is not a partial of this version.
+        """
+        with open(path, 'rb') as f:
+            try:
+                state = pickle.loads(zlib.decompress(f.read()))
+            except (zlib.error, pickle.UnpicklingError, EOFError) as e:
+                raise ValueError(f"'{path}' is not a partial result of analyze-folder --shard. {e}")
+        if not isinstance(state, dict) or state.get("version") != SHARD_VERSION:
+            raise ValueError(f"'{path}' was written by another version of the analyzer; run its shard again.")
+        files = [(position, label.replace("/", os.sep), scan) for position, label, scan in state["files"]]
+        return cls(state["shard"], state["folder_path"], state["folder_name"], state["settings"],
+                   state["error_data"], state["files_total"], state["fingerprint"], files)
+
+
+def merge_partials(partials):
+    """
+    Checks that partials are the complete set of shards of one analysis and combines them.
+
+    The nodes may reach the folder by different paths, e.g. a share on Windows and a
+    mount on Linux, so the folder is recognized by the fingerprint of its logs rather
+    than by its path; the merged report shows the path of the first partial.
+
+    Args:
+        partials (list): ShardPartial of every shard, in any order.
+
+    Returns:
+        ShardPartial: All logs in the order of a single-node run, as shard (1, 1).
+
+    Raises:
+        ValueError: Describing the first problem, e.g. a missing shard or partials
+            of different keywords.
+    """
+    first = partials[0]
+    count = first.shard[1]
+    for partial in partials:
+        if partial.settings != first.settings:
+            raise ValueError(f"Shard {partial.shard[0]}/{partial.shard[1]} was analyzed with other keywords "
+                             f"or options than shard {first.shard[0]}/{count}.")
+        if partial.shard[1] != count:
+            raise ValueError(f"Shard {partial.shard[0]}/{partial.shard[1]} belongs to a split into "
+                             f"{partial.shard[1]} shards, not {count}.")
+        if partial.files_total != first.files_total or partial.fingerprint != first.fingerprint:
+            raise ValueError(f"Shard {partial.shard[0]}/{count} found other logs in the folder than shard "
+                             f"{first.shard[0]}/{count} ({partial.files_total} and {first.files_total} logs); "
+                             f"it is another folder or the folder changed in between.")
+    shards = sorted(partial.shard[0] for partial in partials)
+    if shards != list(range(1, count + 1)):
+        missing = sorted(set(range(1, count + 1)) - set(shards))
+        duplicate = sorted({shard for shard in shards if shards.count(shard) > 1})
+        problem = f"missing shards {missing}" if missing else f"shards {duplicate} given twice"
+        raise ValueError(f"Merging needs each of the {count} shards once: {problem}.")
+
+    files = sorted((entry for partial in partials for entry in partial.files), key=lambda entry: entry[0])
+    labels = set()
+    for expected, (position, label, _) in enumerate(files):
+        if label in labels:
+            raise ValueError(f"The log '{label}' is in more than one shard.")
+        if position != expected:
+            raise ValueError(f"The shards hold {len(files)} of the {first.files_total} logs of the folder, "
+                             f"not numbered 0 to {first.files_total - 1}.")
+        labels.add(label)
+    if len(files) != first.files_total:
+        raise ValueError(f"The shards hold {len(files)} of the {first.files_total} logs of the folder.")
+    return ShardPartial((1, 1), first.folder_path, first.folder_name, first.settings, first.error_data,
+                        first.files_total, first.fingerprint, files)
@@ -0,0 +1,240 @@
+import hashlib
+import re
+from collections import deque
+
+from CompressedInput import open_log
+from ScanProgress import PROGRESS_LINES
+
+# Logcat columns in front of the message: date, time, PID, TID, level and tag
+LOGCAT_PREFIX = re.compile(r"\s*\d\d-\d\d\s+\d\d:\d\d:\d\d\.\d+\s+(\d+)\s+(\d+)\s+[VDIWEFAS]\s+[^:]*?\s*:\s?")
+
+# 'at com.foo.Bar.baz(Bar.java:42)'
+FRAME = re.compile(r"\s*at\s+([\w$.<>/~-]+)\(([^)]*)\)")
+
+# 'java.lang.IllegalStateException: message', optionally after 'Caused by: '
+EXCEPTION = re.compile(r"(?:Caused by:\s*)?((?:[A-Za-z_$][\w$]*\.)+[A-Z][\w$]*)(?::\s*(.*))?$")
+
+# '... 12 more' closing a cause whose remaining frames were already listed
+MORE_FRAMES = re.compile(r"\s*\.\.\.\s*\d+\s+more")
+
+# Message parts that differ between occurrences of the same crash
+ADDRESS = re.compile(r"0x[0-9a-fA-F]+|@[0-9a-fA-F]+|\b[0-9a-fA-F]{8,}\b")
+NUMBER = re.compile(r"\d+")
+
+# Earlier lines searched for the exception line in front of the first frame
+RECENT_LINES = 8
+
+# A trace with no new frame for this many lines is considered complete
+STALE_LINES = 200
+
+# Frames per exception that make up its signature; deeper frames rarely tell crashes apart
+SIGNATURE_FRAMES = 12
+
+# Lines of a trace kept as its exemplar
+EXEMPLAR_LINES = 25
+
+# Distinct signatures tracked per run; traces beyond are only counted
+MAX_SIGNATURES = 5000
+
+
+def split_logcat(line):
+    """
+    Splits a logcat line into its thread and its message.
+
+    Returns:
+        tuple: ((pid, tid), message) for logcat lines, (None, stripped line) otherwise.
+    """
+    prefix = LOGCAT_PREFIX.match(line)
+    if prefix is None:
+        return None, line.strip()
+    return prefix.groups(), line[prefix.end():].strip()
+
+
+def normalize_message(message):
+    """Replaces addresses and numbers, e.g. 'Index 5 out of bounds' -> 'Index <n> out of bounds'."""
+    return NUMBER.sub("<n>", ADDRESS.sub("<addr>", message))
+
+
+def normalize_frame(method, location):
+    """Drops line numbers and generated class indices, e.g. Bar$1.run(Bar.java:42) -> Bar$<n>.run(Bar.java)."""
+    return f"{NUMBER.sub('<n>', method)}({location.split(':')[0]})"
+
+
+class StackTrace:
+    """One exception with its frames and causes, as assembled from consecutive log lines."""
+
+    def __init__(self, line_num, message, exception):
+        self.line_num = line_num
+        self.last_line = line_num
+        self.sections = []  # [exception class, normalized message, normalized frames]
+        self.lines = []
+        self.add_cause(line_num, message, exception)
+
+    def add_cause(self, line_num, message, exception):
+        self.sections.append([exception.group(1), normalize_message(exception.group(2) or ""), []])
+        self.add_line(line_num, message)
+
+    def add_frame(self, line_num, message, frame):
+        frames = self.sections[-1][2]
+        if len(frames) < SIGNATURE_FRAMES:
+            frames.append(normalize_frame(*frame.groups()))
+        self.add_line(line_num, message)
+
+    def add_line(self, line_num, message):
+        self.last_line = line_num
+        if len(self.lines) < EXEMPLAR_LINES:
+            self.lines.append(message)
+
+    def fingerprint(self):
+        """Hash of the exception classes, normalized messages and top frames."""
+        text = "\n".join(f"{name}: {message}\n" + "\n".join(frames) for name, message, frames in self.sections)
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+    def title(self):
+        """One-line description: the exception, where it was thrown and its root cause."""
+        name, _, frames = self.sections[0]
+        title = f"{name} at {frames[0]}" if frames else name
+        if len(self.sections) > 1:
+            title += f" (caused by {self.sections[-1][0]})"
+        return title
+
+
+class TraceAssembler:
+    """
+    Collects Java stack traces from a stream of log lines.
+
+    A trace starts at the first 'at ...' frame whose thread logged an exception line
+    right before it, and grows with the frames, 'Caused by:' and '... n more' lines of
+    the same thread, so traces of threads logging in between are kept apart. Lines
+    without 'at ' are only looked at while a trace is open.
+    """
+
+    def __init__(self, on_trace):
+        """
+        Args:
+            on_trace (function): Called with every completed StackTrace.
+        """
+        self.on_trace = on_trace
+        self._open = {}  # thread -> StackTrace
+        self._recent = deque(maxlen=RECENT_LINES)
+
+    def feed(self, line_num, line):
+        if self._open or "at " in line:
+            self._process(line_num, line)
+        self._recent.append((line_num, line))
+
+    def _process(self, line_num, line):
+        thread, message = split_logcat(line)
+        trace = self._open.get(thread)
+        frame = FRAME.match(message)
+        if frame is not None:
+            if trace is None:
+                trace = self._start(thread)
+                if trace is None:
+                    return  # Frames without an exception line, e.g. a plain 'at' in a message
+            trace.add_frame(line_num, message, frame)
+        elif trace is not None:
+            exception = EXCEPTION.match(message) if message.startswith("Caused by:") else None
+            if exception is not None:
+                trace.add_cause(line_num, message, exception)
+            elif MORE_FRAMES.match(message):
+                trace.add_line(line_num, message)
+            else:
+                self._finish(thread)
+
+        for stale in [key for key, trace in self._open.items() if line_num - trace.last_line > STALE_LINES]:
+            self._finish(stale)
+
+    def _start(self, thread):
+        """Opens a trace when the thread's previous line is an exception line."""
+        for line_num, line in reversed(self._recent):
+            line_thread, message = split_logcat(line)
+            if line_thread != thread:
+                continue
+            exception = EXCEPTION.match(message)
+            if exception is None:
+                return None
+            trace = self._open[thread] = StackTrace(line_num, message, exception)
+            return trace
+        return None
+
+    def _finish(self, thread):
+        self.on_trace(self._open.pop(thread))
+
+    def close(self):
+        """Completes the traces still open at the end of the log."""
+        for thread in sorted(self._open, key=lambda key: self._open[key].line_num):
+            self.on_trace(self._open.pop(thread))
+
+
+class TraceSignatures:
+    """
+    Counts stack traces by signature, keeping one exemplar per signature.
+
+    Memory only grows with the number of distinct signatures, which is capped at
+    max_signatures; further new signatures are counted as dropped.
+    """
+
+    def __init__(self, max_signatures=MAX_SIGNATURES):
+        self.max_signatures = max_signatures
+        self.entries = {}  # fingerprint -> {"count", "files", "title", "file", "line", "lines"}
+        self.total = 0
+        self.dropped = 0
+
+    def add(self, trace):
+        """Counts one StackTrace of the log being collected."""
+        self._count(trace.fingerprint(), trace.title(), None, trace.line_num, trace.lines, 1)
+
+    def _count(self, fingerprint, title, label, line_num, lines, count):
+        self.total += count
+        entry = self.entries.get(fingerprint)
+        if entry is None:
+            if len(self.entries) >= self.max_signatures:
+                self.dropped += count
+                return None
+            entry = self.entries[fingerprint] = {"count": 0, "files": 0, "title": title, "file": label,
+                                                 "line": line_num, "lines": lines}
+        entry["count"] += count
+        return entry
+
+    def merge(self, other, label):
+        """
+        Adds the signatures collected from one log of a folder.
+
+        Args:
+            other (TraceSignatures): Signatures of the log.
+            label (str): Name of the log in the reports, stored with new exemplars.
+        """
+        for fingerprint, entry in other.entries.items():
+            merged = self._count(fingerprint, entry["title"], label, entry["line"], entry["lines"], entry["count"])
+            if merged is not None:
+                merged["files"] += 1
+        self.total += other.dropped
+        self.dropped += other.dropped
+
+    def ranked(self):
+        """Returns (fingerprint, entry) pairs, most frequent first and first seen first on ties."""
+        return sorted(self.entries.items(), key=lambda item: item[1]["count"], reverse=True)
+
+
+def collect_traces(log_path, progress=None):
+    """
+    Groups the Java stack traces of a log into signatures.
+
+    Args:
+        log_path (str): Path of a plain, compressed or zipped log.
+        progress: ScanProgress or WorkerProgress, checked for cancellation while reading.
+
+    Returns:
+        TraceSignatures: The signatures found in the log.
+    """
+    signatures = TraceSignatures()
+    assembler = TraceAssembler(signatures.add)
+    feed = assembler.feed
+    with open_log(log_path, errors='replace') as lines:
+        for line_num, line in enumerate(lines, start=1):
+            feed(line_num, line)
+            if progress is not None and not line_num % PROGRESS_LINES:
+                progress.check()
+    assembler.close()
+    return signatures
@@ -0,0 +1,125 @@
+import csv
+import json
+import os
+import shutil
+
+# Characters of JSON Lines collected in memory before they are written out in one call
+HIT_BUFFER_SIZE = 1024 * 1024
+
+# Summary columns written before the per-category hit counts
+SUMMARY_COLUMNS = ("file", "crashed", "new_errors", "known_errors")
+
+
+class HitWriter:
+    """
+    Streams keyword hits to a JSON Lines file, one record per hit.
+
+    Every record is a JSON object {"file", "line", "category", "keyword", "text"}; a line
+    matching several keywords gives one record per keyword. Instances are passed to the
+    scan engines as their on_hit callback. Records are appended, so several files can be
+    written to the same JSON Lines file one after another.
+    """
+
+    def __init__(self, hits_path, file_label, buffer_size=HIT_BUFFER_SIZE):
+        """
+        Args:
+            hits_path (str): JSON Lines file the records are appended to.
+            file_label (str): Value of the "file" field, e.g. the log file name.
+            buffer_size (int): Characters buffered before each bulk write.
+        """
+        self.file_label = file_label
+        self.buffer_size = buffer_size
+        self.count = 0
+        self._file = open(hits_path, 'a', encoding='utf-8')
+        self._chunks = []
+        self._buffered = 0
+
+    def __call__(self, line_num, hits, stripped):
+        for error_type, keywords in hits.items():
+            for keyword in keywords:
+                record = json.dumps({
+                    "file": self.file_label,
+                    "line": line_num,
+                    "category": error_type,
+                    "keyword": keyword,
+                    "text": stripped,
+                }, ensure_ascii=False)
+                self._chunks.append(record + "\n")
+                self._buffered += len(record) + 1
+                self.count += 1
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._chunks:
+            self._file.write("".join(self._chunks))
+            self._chunks = []
+            self._buffered = 0
+        self._file.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+
+def append_hits(hits_path, part_path):
+    """
+    Moves the records of a part file written by a worker to the end of a JSON Lines file.
+
+    Args:
+        hits_path (str): The combined JSON Lines file.
+        part_path (str): Part file with the hits of one log; deleted afterwards.
+    """
+    if not os.path.exists(part_path):
+        return
+    with open(hits_path, 'ab') as hits_file, open(part_path, 'rb') as part_file:
+        shutil.copyfileobj(part_file, hits_file, HIT_BUFFER_SIZE)
+    os.remove(part_path)
+
+
+class SummaryCsv:
+    """
+    Writes one CSV row per analyzed log as soon as its scan is done.
+
+    The columns are the file name, the crashed / new / known error counts of the
+    priority report and the number of matching lines of every category.
+    """
+
+    def __init__(self, csv_path, categories):
+        """
+        Args:
+            csv_path (str): Path of the CSV file.
+            categories (iterable): Category names, one count column each.
+        """
+        self.path = csv_path
+        self.categories = list(categories)
+        self._file = open(csv_path, 'w', newline='', encoding='utf-8', buffering=HIT_BUFFER_SIZE)
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(list(SUMMARY_COLUMNS) + self.categories)
+
+    def write_row(self, file_name, priority, found_errors_line):
+        """
+        Args:
+            file_name (str): Name of the analyzed log.
+            priority (dict): {"Crashed", "New Errors", "Known Errors"} counts of the log.
+            found_errors_line (dict): Per category {"count", "lines"} from search_errors.
+        """
+        counts = [found_errors_line[error_type]["count"] if error_type in found_errors_line else 0
+                  for error_type in self.categories]
+        self._writer.writerow([file_name, priority["Crashed"], priority["New Errors"], priority["Known Errors"]]
+                              + counts)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
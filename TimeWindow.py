@@ -0,0 +1,209 @@
+import os
+import re
+from datetime import datetime
+
+from CompressedInput import is_compressed
+
+# Logcat timestamp at the start of a line, e.g. '10-18 12:00:00.123', optionally with
+# the year of 'logcat -v year'
+TIMESTAMP = r"\s*(?:\d{4}-)?(\d\d-\d\d)\s+(\d\d:\d\d:\d\d)(?:\.(\d{1,6}))?"
+LINE_TIME = re.compile(TIMESTAMP)
+LINE_TIME_BYTES = re.compile(TIMESTAMP.encode("ascii"))
+
+# Timestamps at the start of any line of a block of lines, see in_order
+LINE_STARTS_BYTES = re.compile(rb"(?m)^" + TIMESTAMP.encode("ascii"))
+
+# --since/--until values: [[YYYY-]MM-DD ]HH:MM[:SS[.fff]]
+BOUND = re.compile(r"\s*(?:(?:\d{4}-)?(\d\d-\d\d)[ T]+)?(\d\d:\d\d(?::\d\d)?)(?:\.(\d{1,6}))?\s*$")
+
+# Lines read after a probe offset to find a timestamp before giving up on seeking
+PROBE_LINES = 64
+
+# Evenly spaced probes that must be in order before the file is trusted to be sorted
+ORDER_SAMPLES = 32
+
+
+def _time_key(date, clock, fraction):
+    """Returns a sortable 'MM-DD HH:MM:SS.ffffff' key; logcat timestamps carry no year."""
+    return f"{date} {clock}.{(fraction or '').ljust(6, '0')}"
+
+
+def line_time(line):
+    """Returns the time key of a logcat line, or None for lines without a timestamp."""
+    match = LINE_TIME.match(line)
+    return _time_key(*match.groups()) if match else None
+
+
+def _bytes_time(raw_line):
+    match = LINE_TIME_BYTES.match(raw_line)
+    if match is None:
+        return None
+    return _time_key(*(group.decode("ascii") if group else None for group in match.groups()))
+
+
+class TimeWindow:
+    """
+    A --since/--until range of logcat timestamps, both ends inclusive.
+
+    Bounds without a date apply to the date of the first timestamp of each log. Lines
+    without a timestamp, like the lines of a stack trace printed without the logcat
+    prefix, belong to the window of the timestamped line before them.
+    """
+
+    def __init__(self, since=None, until=None):
+        """
+        Args:
+            since (str): Earliest time, e.g. '10-18 12:00' or '12:00:30.5'. None is open-ended.
+            until (str): Latest time, same format. None is open-ended.
+
+        Raises:
+            ValueError: When a bound is not a valid time.
+        """
+        self.since = since
+        self.until = until
+        self._since = self._parse(since)
+        self._until = self._parse(until)
+
+    @staticmethod
+    def _parse(text):
+        if text is None:
+            return None
+        match = BOUND.match(text)
+        if match is not None:
+            date, clock, fraction = match.groups()
+            if len(clock) == 5:
+                clock += ":00"
+            try:
+                datetime.strptime(f"2000-{date or '01-01'} {clock}", "%Y-%m-%d %H:%M:%S")  # A leap year allows 02-29
+                return date, clock, fraction
+            except ValueError:
+                pass
+        raise ValueError(f"Invalid time '{text}'. Use [MM-DD ]HH:MM[:SS[.fff]], e.g. '10-18 12:05'.")
+
+    def __str__(self):
+        return f"{self.since or 'start'} to {self.until or 'end'}"
+
+    def bounds(self, first_time):
+        """
+        Returns the (since, until) time keys for a log, None for an open end.
+
+        Args:
+            first_time (str): Time key of the log's first timestamp, dating bounds given
+                as a time only. None when the log has no timestamp.
+        """
+        def key(bound):
+            if bound is None:
+                return None
+            date, clock, fraction = bound
+            if date is None:
+                date = first_time[:5] if first_time is not None else "00-00"
+            return _time_key(date, clock, fraction)
+
+        return key(self._since), key(self._until)
+
+
+def contains(since, until, time):
+    """Tells whether a time key lies between the bounds from TimeWindow.bounds."""
+    if time is None:
+        return since is None  # Lines before the first timestamp only belong to an open start
+    return (since is None or time >= since) and (until is None or time <= until)
+
+
+def in_order(data):
+    """
+    Tells whether the logcat timestamps at the line starts of a block of bytes never go back.
+
+    Used on the bytes find_window located before they are scanned: the binary search only
+    saw the timestamps of its probes, so a stretch out of order between them would put
+    lines outside the window into it, or leave lines of the window out.
+    """
+    previous = (b"",)
+    for match in LINE_STARTS_BYTES.finditer(data):
+        key = match.groups(b"")
+        if key < previous and _padded(key) < _padded(previous):  # Fractions of other lengths only compare padded
+            return False
+        previous = key
+    return True
+
+
+def _padded(key):
+    date, clock, fraction = key
+    return date, clock, fraction.ljust(6, b"0")
+
+
+def _probe(raw_file, offset):
+    """
+    Finds the first timestamped line starting at or after a byte offset.
+
+    Returns:
+        tuple: (offset of the line, its time key); (end of file, None) past the last line.
+
+    Raises:
+        ValueError: When no timestamp follows within PROBE_LINES lines.
+    """
+    if offset:
+        raw_file.seek(offset - 1)
+        raw_file.readline()  # Skip to the start of the next line, or stay on this one
+    else:
+        raw_file.seek(0)
+    for _ in range(PROBE_LINES):
+        position = raw_file.tell()
+        raw_line = raw_file.readline()
+        if not raw_line:
+            return position, None
+        time = _bytes_time(raw_line)
+        if time is not None:
+            return position, time
+    raise ValueError(f"No logcat timestamp within {PROBE_LINES} lines of offset {offset}")
+
+
+def _first_line_from(raw_file, size, probes, reached):
+    """Binary-searches the offset of the first timestamped line for which reached(time) holds."""
+    low, high = 0, size
+    while low < high:
+        middle = (low + high) // 2
+        position, time = _probe(raw_file, middle)
+        probes.append((position, time))
+        if time is None or reached(time):
+            high = middle
+        else:
+            low = middle + 1
+    position, time = _probe(raw_file, low)
+    probes.append((position, time))
+    return position
+
+
+def find_window(log_file, window):
+    """
+    Locates the bytes of a plain log that hold a time window, without reading the log.
+
+    Binary-searches the byte offsets, reading the timestamp of the first line after each
+    probe, which needs the timestamps to be in order. That is checked on ORDER_SAMPLES
+    evenly spaced probes and on every probe of the search; logs failing the check, logs
+    with stretches of PROBE_LINES lines without a timestamp and compressed logs return
+    None and have to be filtered line by line. The caller checks the located bytes with
+    in_order before scanning them; outside the window, order is only checked on the probes.
+
+    Args:
+        log_file (str): Path to the log file.
+        window (TimeWindow): Times to find.
+
+    Returns:
+        tuple: (start, end) byte offsets at line starts, or None.
+    """
+    if is_compressed(log_file):
+        return None
+    with open(log_file, 'rb') as raw_file:
+        size = os.fstat(raw_file.fileno()).st_size
+        try:
+            probes = [_probe(raw_file, size * sample // ORDER_SAMPLES) for sample in range(ORDER_SAMPLES)]
+            since, until = window.bounds(probes[0][1])
+            start = 0 if since is None else _first_line_from(raw_file, size, probes, lambda time: time >= since)
+            end = size if until is None else _first_line_from(raw_file, size, probes, lambda time: time > until)
+        except ValueError:
+            return None
+
+    times = [time for _, time in sorted(probes) if time is not None]
+    if any(later < earlier for earlier, later in zip(times, times[1:])):
+        return None  # Out of order, e.g. a reboot or a new year inside the log
+    return start, max(start, end)
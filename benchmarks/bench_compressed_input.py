@@ -0,0 +1,105 @@
+"""
+Benchmark: scanning compressed logs directly vs decompressing them to disk first.
+
+Writes a synthetic logcat file, compresses it as .gz, .bz2, .xz and .zip, then times
+for each format
+  - stream: search_errors on the compressed file, decompressing while scanning
+  - unpack: decompressing to a temporary .txt, then search_errors on that file
+Throughput is in MB/s of uncompressed log; "disk MB" is what unpack writes extra.
+
+Usage:
+    python benchmarks/bench_compressed_input.py [--size-mb 50] [--hit-rate 0.02]
+"""
+import argparse
+import bz2
+import gzip
+import json
+import lzma
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+
+from bench_mmap_scan import ROOT, make_log
+
+from CompressedInput import member_path, open_log
+from LogScanner import search_errors
+
+# Fast compression levels keep the setup short; decompression speed barely depends on them
+COMPRESSORS = {
+    "gz": lambda path: gzip.open(path, "wb", compresslevel=6),
+    "bz2": lambda path: bz2.open(path, "wb", compresslevel=1),
+    "xz": lambda path: lzma.open(path, "wb", preset=1),
+}
+
+
+def compress(log_path, temp_dir):
+    """Returns {format: path to scan} for every compressed copy of the log."""
+    paths = {}
+    for extension, opener in COMPRESSORS.items():
+        path = os.path.join(temp_dir, f"app.txt.{extension}")
+        with open(log_path, "rb") as source, opener(path) as target:
+            shutil.copyfileobj(source, target, 1024 * 1024)
+        paths[extension] = path
+    zip_path = os.path.join(temp_dir, "bundle.zip")
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as bundle:
+        bundle.write(log_path, "app.txt")
+    paths["zip"] = member_path(zip_path, "app.txt")
+    return paths
+
+
+def unpack_then_scan(path, error_data, temp_dir):
+    unpacked = os.path.join(temp_dir, "unpacked.txt")
+    with open_log(path) as source, open(unpacked, "w", encoding="utf-8") as target:
+        shutil.copyfileobj(source, target, 1024 * 1024)
+    results = search_errors(unpacked, error_data)
+    written = os.path.getsize(unpacked)
+    os.remove(unpacked)
+    return results, written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--hit-rate", type=float, default=0.02)
+    args = parser.parse_args()
+
+    with open(os.path.join(ROOT, "keywords.json"), "r") as f:
+        error_data = json.load(f)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_path = os.path.join(temp_dir, "app.txt")
+        make_log(log_path, args.size_mb, args.hit_rate)
+        size_mb = os.path.getsize(log_path) / (1024 * 1024)
+        paths = compress(log_path, temp_dir)
+
+        start = time.perf_counter()
+        expected = search_errors(log_path, error_data)
+        plain = time.perf_counter() - start
+        print(f"plain .txt: {plain:.2f} s, {size_mb / plain:.1f} MB/s\n")
+
+        print(f"{'format':>6} {'stream s':>9} {'MB/s':>7} {'unpack s':>9} {'MB/s':>7} {'disk MB':>8}")
+        failed = False
+        for name, path in paths.items():
+            start = time.perf_counter()
+            streamed = search_errors(path, error_data)
+            stream_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            unpacked, written = unpack_then_scan(path, error_data, temp_dir)
+            unpack_seconds = time.perf_counter() - start
+
+            failed |= streamed != expected or unpacked != expected
+            print(f"{name:>6} {stream_seconds:>9.2f} {size_mb / stream_seconds:>7.1f} "
+                  f"{unpack_seconds:>9.2f} {size_mb / unpack_seconds:>7.1f} {written / (1024 * 1024):>8.1f}")
+
+        if failed:
+            print("Compressed scans disagree with the plain scan!")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
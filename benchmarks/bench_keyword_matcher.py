@@ -0,0 +1,121 @@
+"""
+Benchmark: per-keyword substring loop vs the compiled KeywordMatcher.
+
+Generates a synthetic logcat file and a keyword dictionary of growing size, then times
+the legacy O(lines x keywords) loop against LogScanner.search_errors and checks both
+return exactly the same results.
+
+Usage:
+    python benchmarks/bench_keyword_matcher.py [--lines 20000] [--sizes 10,100,1000,10000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from LogScanner import search_errors  # noqa: E402
+
+
+def legacy_search_errors(log_file, error_data):
+    """The original search_errors loop, kept here as the baseline."""
+    results = {}
+    unique_lines_per_error = {}
+    crashed_occurrences = []
+
+    for error_type in error_data:
+        results[error_type] = {"count": 0, "lines": []}
+        unique_lines_per_error[error_type] = {}
+
+    with open(log_file, 'r', encoding='utf-8') as log_file:
+        for line_num, line in enumerate(log_file, start=1):
+            line_lower = line.lower()
+
+            for error_type, details in error_data.items():
+                if error_type == "Crashed":
+                    if "crashed" in line_lower:
+                        results[error_type]["count"] += 1
+                        results[error_type]["lines"].append(line_num)
+                        crashed_occurrences.append((line_num, line.strip()))
+                else:
+                    matched = False
+                    for keyword in details["keywords"]:
+                        if keyword.lower() in line_lower:
+                            if not matched:
+                                results[error_type]["count"] += 1
+                                results[error_type]["lines"].append(line_num)
+                                matched = True
+                            if keyword not in unique_lines_per_error[error_type]:
+                                unique_lines_per_error[error_type][keyword] = line.strip()
+
+    return results, unique_lines_per_error, crashed_occurrences
+
+
+def make_keywords(count, rnd):
+    """Builds a dictionary with `count` keywords spread over a few categories."""
+    packages = ["com.valet_manager.pointofsale", "com.couchbase.lite", "android.app", "com.zebra.sdk"]
+    names = ["Connection", "Printer", "Dialog", "Reader", "Document", "Reservation", "Handler"]
+    methods = ["close", "open", "dismiss", "getId", "receive", "send", "status", "connect"]
+    error_data = {
+        "Crashed": {"description": "Crashes", "crash": True, "keywords": ["crashed"]},
+        "Error": {"description": "Errors", "keywords": ["ERROR"]},
+    }
+    keywords = set()
+    while len(keywords) < count - 1:
+        keywords.add(f"{rnd.choice(packages)}.{rnd.choice(names)}{rnd.randint(0, 9999)}.{rnd.choice(methods)}")
+    keywords = sorted(keywords)
+    for index in range(4):
+        error_data[f"Category{index}"] = {"description": "Generated", "keywords": keywords[index::4]}
+    return error_data, keywords
+
+
+def make_log(path, lines, keywords, rnd):
+    levels = "VDIWEF"
+    with open(path, "w", encoding="utf-8") as log_file:
+        for line_num in range(lines):
+            message = f"ActivityManager: processing request {rnd.randint(0, 10 ** 6)} for session"
+            roll = rnd.random()
+            if roll < 0.02:
+                message += " thread has CRASHED"
+            elif roll < 0.07:
+                message += f" Exception at {rnd.choice(keywords)}(Unknown Source)"
+            elif roll < 0.10:
+                message = "ERROR " + message
+            log_file.write(f"10-18 12:{line_num % 60:02d}:{line_num % 60:02d}.000  1234  5678 "
+                           f"{levels[line_num % 6]} Tag: {message}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--sizes", default="10,100,1000,10000")
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    print(f"{'keywords':>9} {'legacy (s)':>11} {'matcher (s)':>12} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_path = os.path.join(temp_dir, "app.txt")
+        for size in (int(size) for size in args.sizes.split(",")):
+            error_data, keywords = make_keywords(size, rnd)
+            make_log(log_path, args.lines, keywords, rnd)
+
+            start = time.perf_counter()
+            expected = legacy_search_errors(log_path, error_data)
+            legacy_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            actual = search_errors(log_path, error_data)
+            matcher_time = time.perf_counter() - start
+
+            if actual != expected:
+                print(f"Mismatch between legacy and matcher results with {size} keywords!")
+                return 1
+            print(f"{size:>9} {legacy_time:>11.3f} {matcher_time:>12.3f} {legacy_time / matcher_time:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Benchmark: text-mode search_errors vs the memory-mapped bytes engine.
+
+Writes a synthetic logcat file, then scans it with each engine in a fresh child process
+and reports throughput (MB/s) and the child's peak RSS. Peak RSS is read with the
+`resource` module, so this benchmark runs on Linux/macOS only.
+
+Usage:
+    python benchmarks/bench_mmap_scan.py [--size-mb 200] [--hit-rate 0.02]
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+ENGINES = ("text", "mmap")
+
+
+def make_log(path, size_mb, hit_rate, seed=42):
+    """Writes roughly size_mb of logcat lines, hit_rate of them containing a keyword."""
+    with open(os.path.join(ROOT, "keywords.json"), "r") as f:
+        keywords = [keyword for details in json.load(f).values() for keyword in details["keywords"]]
+    rnd = random.Random(seed)
+    levels = "VDIWEF"
+    target = size_mb * 1024 * 1024
+    written = 0
+    line_num = 0
+    with open(path, "w", encoding="utf-8") as log_file:
+        while written < target:
+            message = f"ActivityManager: Start proc {rnd.randint(1000, 99999)} for activity com.example/.Main"
+            if rnd.random() < hit_rate:
+                message += " " + rnd.choice(keywords)
+            line = (f"10-18 12:{line_num // 3600 % 60:02d}:{line_num // 60 % 60:02d}.{line_num % 1000:03d}"
+                    f"  1234  5678 {levels[line_num % 6]} Tag: {message}\n")
+            log_file.write(line)
+            written += len(line)
+            line_num += 1
+
+
+def run_engine(engine, log_path):
+    """Runs one engine in this process and prints its timing as JSON."""
+    from LogScanner import search_errors, search_errors_mmap
+
+    with open(os.path.join(ROOT, "keywords.json"), "r") as f:
+        error_data = json.load(f)
+    scan = search_errors if engine == "text" else search_errors_mmap
+
+    start = time.perf_counter()
+    results, _, _ = scan(log_path, error_data)
+    elapsed = time.perf_counter() - start
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        peak_rss *= 1024  # ru_maxrss is in KiB on Linux and bytes on macOS
+    print(json.dumps({
+        "seconds": elapsed,
+        "peak_rss": peak_rss,
+        "counts": {error_type: data["count"] for error_type, data in results.items()},
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=int, default=200)
+    parser.add_argument("--hit-rate", type=float, default=0.02)
+    parser.add_argument("--engine", choices=ENGINES, help=argparse.SUPPRESS)
+    parser.add_argument("--log", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.engine:
+        run_engine(args.engine, args.log)
+        return 0
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_path = os.path.join(temp_dir, "app.txt")
+        make_log(log_path, args.size_mb, args.hit_rate)
+        size_mb = os.path.getsize(log_path) / (1024 * 1024)
+
+        print(f"{'engine':>7} {'seconds':>8} {'MB/s':>8} {'peak RSS (MB)':>14}")
+        counts = {}
+        for engine in ENGINES:
+            output = subprocess.run(
+                [sys.executable, __file__, "--engine", engine, "--log", log_path],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            stats = json.loads(output)
+            counts[engine] = stats["counts"]
+            print(f"{engine:>7} {stats['seconds']:>8.2f} {size_mb / stats['seconds']:>8.1f} "
+                  f"{stats['peak_rss'] / (1024 * 1024):>14.1f}")
+
+        if counts["text"] != counts["mmap"]:
+            print("Engines disagree on the hit counts!")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
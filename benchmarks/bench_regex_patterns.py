@@ -0,0 +1,79 @@
+"""
+Benchmark: one re.search per pattern per line vs the literal-gated KeywordMatcher.
+
+Generates a synthetic logcat file and a growing number of regex and logcat field
+patterns, then times running every pattern's regexes on every line against
+LogScanner.search_errors and checks both find exactly the same lines.
+
+Usage:
+    python benchmarks/bench_regex_patterns.py [--lines 20000] [--sizes 10,100,1000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bench_keyword_matcher import make_keywords, make_log  # noqa: E402
+from KeywordMatcher import _compile_pattern  # noqa: E402
+from LogScanner import search_errors  # noqa: E402
+
+
+def make_patterns(count, keywords, rnd):
+    """Builds `count` patterns: mostly regexes around known keywords, some field conditions."""
+    patterns = [{"level": "E", "tag": "Tag*"}, {"regex": r"request \d+ for session", "level": "F"}]
+    while len(patterns) < count:
+        package, _, method = rnd.choice(keywords).rpartition(".")
+        patterns.append(rf"{package.replace('.', '[.]')}\.{method}\(\w+ source\)")
+    return {"Patterns": {"description": "Generated", "patterns": patterns[:count]}}
+
+
+def naive_lines(log_file, error_data):
+    """Line numbers matched by any pattern, running every pattern on every line."""
+    checks = [_compile_pattern(pattern)[2] for pattern in error_data["Patterns"]["patterns"]]
+    matched = []
+    with open(log_file, 'r', encoding='utf-8') as log_file:
+        for line_num, line in enumerate(log_file, start=1):
+            line_lower = line.lower()
+            for pattern_checks in checks:
+                if all(check.search(line_lower) for check in pattern_checks):
+                    matched.append(line_num)
+                    break
+    return matched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--sizes", default="10,100,1000")
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    print(f"{'patterns':>9} {'per-pattern (s)':>16} {'matcher (s)':>12} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_path = os.path.join(temp_dir, "app.txt")
+        for size in (int(size) for size in args.sizes.split(",")):
+            _, keywords = make_keywords(size, rnd)
+            make_log(log_path, args.lines, keywords, rnd)
+            error_data = make_patterns(size, keywords, rnd)
+
+            start = time.perf_counter()
+            expected = naive_lines(log_path, error_data)
+            naive_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            actual = search_errors(log_path, error_data)[0]["Patterns"]["lines"]
+            matcher_time = time.perf_counter() - start
+
+            if list(actual) != expected:
+                print(f"Mismatch between per-pattern and matcher results with {size} patterns!")
+                return 1
+            print(f"{size:>9} {naive_time:>16.3f} {matcher_time:>12.3f} {naive_time / matcher_time:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Benchmark: cold start of the headless CLI.
+
+Runs `python -X importtime cli.py <args>` in fresh processes and reports how much
+import time the CLI adds on top of the bare interpreter, the slowest imports, and the
+wall-clock time of the whole command. Fails (exit code 1) when the added import time
+goes over the target or when a GUI toolkit or analysis module gets imported just to
+parse the command line, so it can run as a CI check.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10] [--target-ms 40] [-- analyze-file --help]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CLI = os.path.join(ROOT, "cli.py")
+
+# Import time the CLI may add to the interpreter's own startup before the check fails
+DEFAULT_TARGET_MS = 40.0
+
+# Modules that must only be imported once a subcommand actually runs
+FORBIDDEN = ("tkinter", "PyQt5", "multiprocessing", "LogScanner", "LogAutomation", "LogFolderAutomation")
+
+
+def parse_importtime(stderr):
+    """
+    Parses `-X importtime` output.
+
+    Returns:
+        dict: module -> (self_us, cumulative_us, depth)
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return modules
+
+
+def run_importtime(args):
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=ROOT, env=env,
+                            capture_output=True, text=True)
+    return parse_importtime(result.stderr)
+
+
+def wall_time(args):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True)
+    return time.perf_counter() - start
+
+
+def added_import_us(modules, baseline):
+    """Cumulative time of the top-level imports the interpreter doesn't do by itself."""
+    return sum(cumulative for name, (_, cumulative, depth) in modules.items()
+               if depth == 0 and name not in baseline)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--target-ms", type=float, default=DEFAULT_TARGET_MS,
+                        help="Maximum median import time added by the CLI")
+    parser.add_argument("cli_args", nargs="*", default=["--help"], help="Arguments passed to cli.py")
+    args = parser.parse_args()
+
+    baseline = run_importtime(["-c", "pass"])
+    runs = [run_importtime([CLI, *args.cli_args]) for _ in range(args.runs)]
+    added_ms = statistics.median(added_import_us(modules, baseline) for modules in runs) / 1000
+    bare_ms = statistics.median(wall_time(["-c", "pass"]) for _ in range(args.runs)) * 1000
+    cli_ms = statistics.median(wall_time([CLI, *args.cli_args]) for _ in range(args.runs)) * 1000
+
+    print(f"cli.py {' '.join(args.cli_args)}  ({args.runs} runs, median)")
+    print(f"  bare interpreter      {bare_ms:8.1f} ms")
+    print(f"  cli.py wall clock     {cli_ms:8.1f} ms")
+    print(f"  import time added     {added_ms:8.1f} ms   (target {args.target_ms:.0f} ms)")
+    print("  slowest imports (self time):")
+    slowest = sorted(((self_us, name) for name, (self_us, _, _) in runs[-1].items() if name not in baseline),
+                     reverse=True)[:8]
+    for self_us, name in slowest:
+        print(f"    {self_us / 1000:7.2f} ms  {name}")
+
+    failures = []
+    if added_ms > args.target_ms:
+        failures.append(f"import time {added_ms:.1f} ms is over the {args.target_ms:.0f} ms target")
+    imported = set(runs[-1])
+    for name in FORBIDDEN:
+        if name in imported:
+            failures.append(f"{name} is imported at startup")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,330 @@
+"""
+Benchmark suite: scanning, folder analysis, report writing, renaming and CLI startup.
+
+Generates (or reuses) a deterministic logcat corpus with logcat_corpus.py and runs
+every benchmark in a fresh process, so each one's peak RSS is its own. Reports MB/s,
+lines/s (or files/s) and peak RSS, and saves the results with the commit, Python
+version and corpus parameters as JSON. --compare checks a run against an earlier
+results file and fails (exit code 1) when a benchmark got slower than the tolerance.
+
+Usage:
+    python benchmarks/bench_suite.py [--corpus DIR] [--size 64M ...] [--repeat 3] [--workers 2]
+        [--only scan_text,analyze_folder] [--output bench_results.json] [--compare old.json]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from logcat_corpus import add_corpus_arguments, corpus_from_args, load_corpus  # noqa: E402
+
+# Times a benchmark runs in its process; the fastest run is reported
+DEFAULT_REPEAT = 3
+
+# Slowdown against the --compare results that counts as a regression
+DEFAULT_TOLERANCE = 0.10
+
+# CLI runs timed by the startup benchmark
+STARTUP_RUNS = 10
+
+
+def peak_rss_mb():
+    """
+    Peak resident memory of this process and its finished children, in MB.
+
+    Returns:
+        float: The peak, or None where it can't be read.
+    """
+    try:
+        import resource
+    except ImportError:  # Windows
+        return _windows_peak_rss_mb()
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)  # Bytes on macOS, KB elsewhere
+
+
+def _windows_peak_rss_mb():
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+            (name, ctypes.c_size_t) for name in (
+                "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    kernel32 = ctypes.windll.kernel32
+    if not kernel32.K32GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+        return None
+    return counters.PeakWorkingSetSize / (1024 * 1024)
+
+
+def _largest_log(corpus):
+    return max(corpus["logs"], key=lambda log: log["bytes"])
+
+
+def _timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def _scan(corpus_dir, corpus, work_dir, workers, engine):
+    from LogScanner import get_engine
+
+    log = _largest_log(corpus)
+    with open(os.path.join(corpus_dir, "keywords.json"), encoding="utf-8") as f:
+        error_data = json.load(f)
+    seconds, _ = _timed(get_engine(engine), os.path.join(corpus_dir, log["path"]), error_data)
+    return {"seconds": seconds, "bytes": log["bytes"], "lines": log["lines"]}
+
+
+def bench_scan_text(corpus_dir, corpus, work_dir, workers):
+    """search_errors on the largest log."""
+    return _scan(corpus_dir, corpus, work_dir, workers, "text")
+
+
+def bench_scan_mmap(corpus_dir, corpus, work_dir, workers):
+    """search_errors_mmap on the largest log."""
+    return _scan(corpus_dir, corpus, work_dir, workers, "mmap")
+
+
+def bench_analyze_folder(corpus_dir, corpus, work_dir, workers):
+    """LogFolderAutomation.main over every device folder, with --workers."""
+    import LogFolderAutomation
+
+    save_path = tempfile.mkdtemp(dir=work_dir)
+    seconds, exit_code = _timed(LogFolderAutomation.main, os.path.join(corpus_dir, "logs"), save_path,
+                                workers=workers, verbosity="summary", recursive=True)
+    if exit_code:
+        raise RuntimeError("analyze-folder failed")
+    return {"seconds": seconds, "bytes": corpus["bytes"], "lines": corpus["lines"]}
+
+
+def bench_write_report(corpus_dir, corpus, work_dir, workers):
+    """LogAutomation.write_report for the hits of the largest log."""
+    from KeywordConfig import load_keywords
+    from LogAutomation import write_report
+    from LogScanner import search_errors
+
+    log_path = os.path.join(corpus_dir, _largest_log(corpus)["path"])
+    config = load_keywords(os.path.join(corpus_dir, "keywords.json"))
+    scan = search_errors(log_path, config.error_data, config.matcher)
+    save_path = os.path.join(tempfile.mkdtemp(dir=work_dir), "report.txt")
+    seconds, _ = _timed(write_report, save_path, log_path, *scan, verbosity="summary",
+                        crash_category=config.matcher.crash_category)
+    with open(save_path, encoding="utf-8") as report:
+        lines = sum(1 for _ in report)
+    return {"seconds": seconds, "bytes": os.path.getsize(save_path), "lines": lines}
+
+
+def bench_rename(corpus_dir, corpus, work_dir, workers):
+    """Rename.main moving the logs of one device folder."""
+    import Rename
+
+    source = tempfile.mkdtemp(dir=work_dir)
+    target = tempfile.mkdtemp(dir=work_dir)
+    device = os.path.join(corpus_dir, "logs", "device0")
+    for name in os.listdir(device):
+        shutil.copy(os.path.join(device, name), source)
+    seconds, _ = _timed(Rename.main, source, target)
+    return {"seconds": seconds, "files": len(os.listdir(target))}
+
+
+def bench_rename_tree(corpus_dir, corpus, work_dir, workers):
+    """RenameMultipleFolderFiles.main copying and renaming every device folder."""
+    import RenameMultipleFolderFiles
+
+    target = tempfile.mkdtemp(dir=work_dir)
+    seconds, _ = _timed(RenameMultipleFolderFiles.main, os.path.join(corpus_dir, "logs"), target)
+    return {"seconds": seconds, "bytes": corpus["bytes"], "files": corpus["files"]}
+
+
+def bench_rename_tree_link(corpus_dir, corpus, work_dir, workers):
+    """RenameMultipleFolderFiles.main hard-linking the logs instead of copying them."""
+    import RenameMultipleFolderFiles
+
+    target = tempfile.mkdtemp(dir=work_dir)
+    seconds, _ = _timed(RenameMultipleFolderFiles.main, os.path.join(corpus_dir, "logs"), target, mode="link")
+    return {"seconds": seconds, "bytes": corpus["bytes"], "files": corpus["files"]}
+
+
+# Benchmarks run in child processes, by name
+BENCHMARKS = {
+    "scan_text": bench_scan_text,
+    "scan_mmap": bench_scan_mmap,
+    "analyze_folder": bench_analyze_folder,
+    "write_report": bench_write_report,
+    "rename": bench_rename,
+    "rename_tree": bench_rename_tree,
+    "rename_tree_link": bench_rename_tree_link,
+}
+
+
+def run_child(name, corpus_dir, repeat, workers, result_path):
+    """Runs one benchmark `repeat` times in this process and saves its fastest run."""
+    os.chdir(corpus_dir)  # Entry points read keywords.json from the working directory
+    corpus = load_corpus(corpus_dir)
+    with tempfile.TemporaryDirectory() as work_dir:
+        runs = [BENCHMARKS[name](corpus_dir, corpus, work_dir, workers) for _ in range(repeat)]
+    result = min(runs, key=lambda run: run["seconds"])
+    result["peak_rss_mb"] = peak_rss_mb()
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+def run_benchmark(name, corpus_dir, repeat, workers):
+    """Runs a benchmark in a fresh process; its console output is discarded."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        result_path = os.path.join(temp_dir, "result.json")
+        completed = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", name, "--corpus",
+                                    corpus_dir, "--repeat", str(repeat), "--workers", str(workers or 0),
+                                    "--result", result_path],
+                                   cwd=corpus_dir, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if completed.returncode:
+            raise RuntimeError(f"{name} failed:\n{completed.stderr}")
+        with open(result_path, encoding="utf-8") as f:
+            return json.load(f)
+
+
+def bench_startup():
+    """Median wall clock of `cli.py --help` and of the bare interpreter, in fresh processes."""
+    def median_seconds(args):
+        times = []
+        for _ in range(STARTUP_RUNS):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True)
+            times.append(time.perf_counter() - start)
+        return statistics.median(times)
+
+    return {"seconds": median_seconds([os.path.join(ROOT, "cli.py"), "--help"]),
+            "interpreter_seconds": median_seconds(["-c", "pass"]), "peak_rss_mb": None}
+
+
+def add_rates(result):
+    """Adds mb_per_s, lines_per_s and files_per_s for the sizes a benchmark reported."""
+    seconds = result["seconds"] or 1e-9
+    for size, rate, scale in (("bytes", "mb_per_s", 1e6), ("lines", "lines_per_s", 1), ("files", "files_per_s", 1)):
+        if size in result:
+            result[rate] = result[size] / scale / seconds
+    return result
+
+
+def git_commit():
+    """Returns (commit, has uncommitted changes) of the repository, or (None, None)."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                                check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(status.strip())
+
+
+def compare(results, baseline, tolerance):
+    """
+    Prints the change of every benchmark against a baseline results file.
+
+    Returns:
+        list: Names of the benchmarks that got slower by more than the tolerance.
+    """
+    print(f"\nCompared with {baseline['meta'].get('commit') or 'baseline'}:")
+    regressions = []
+    for name, result in results.items():
+        old = baseline["results"].get(name)
+        if old is None:
+            print(f"  {name:<15} new")
+            continue
+        change = result["seconds"] / old["seconds"] - 1 if old["seconds"] else 0.0
+        flag = ""
+        if change > tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"  {name:<15} {old['seconds']:9.3f} s -> {result['seconds']:9.3f} s  {change:+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", help="Corpus folder; generated there when it has no corpus.json "
+                                         "(default: a temporary folder)")
+    add_corpus_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--workers", type=int, default=None, help="Workers of the analyze_folder benchmark")
+    parser.add_argument("--only", help=f"Comma-separated benchmarks out of {', '.join(BENCHMARKS)}, startup")
+    parser.add_argument("--output", default="bench_results.json", help="Results file (default: bench_results.json)")
+    parser.add_argument("--compare", metavar="RESULTS", help="Earlier results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Slowdown counted as a regression (default: 0.10)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.corpus, args.repeat, args.workers or None, args.result)
+        return 0
+
+    names = args.only.split(",") if args.only else [*BENCHMARKS, "startup"]
+    unknown = [name for name in names if name not in BENCHMARKS and name != "startup"]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        corpus_dir = os.path.abspath(args.corpus or temp_dir)
+        try:
+            corpus = load_corpus(corpus_dir)
+            print(f"Using the corpus in {corpus_dir}")
+        except FileNotFoundError:
+            print(f"Generating the corpus in {corpus_dir}...")
+            corpus = corpus_from_args(corpus_dir, args)
+        print(f"{corpus['files']} logs, {corpus['bytes'] / 1e6:.1f} MB, {corpus['lines']} lines\n")
+
+        print(f"{'benchmark':<16} {'seconds':>9} {'MB/s':>8} {'lines/s':>11} {'files/s':>8} {'peak RSS':>9}")
+        results = {}
+        for name in names:
+            result = bench_startup() if name == "startup" else run_benchmark(name, corpus_dir, args.repeat,
+                                                                             args.workers)
+            results[name] = add_rates(result)
+            columns = [f"{result[key]:{width}.{digits}f}" if key in result else " " * width
+                       for key, width, digits in (("mb_per_s", 8, 1), ("lines_per_s", 11, 0), ("files_per_s", 8, 1))]
+            rss = f"{result['peak_rss_mb']:6.0f} MB" if result.get("peak_rss_mb") is not None else ""
+            print(f"{name:<15} {result['seconds']:9.3f} {' '.join(columns)} {rss:>9}")
+
+    commit, dirty = git_commit()
+    corpus.pop("logs", None)
+    output = {
+        "meta": {"commit": commit, "dirty": dirty, "date": datetime.now().isoformat(timespec="seconds"),
+                 "python": platform.python_version(), "platform": platform.platform(),
+                 "cpus": os.cpu_count(), "repeat": args.repeat, "workers": args.workers, "corpus": corpus},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["meta"].get("corpus") != corpus:
+            print("Warning: the baseline was measured on a different corpus.")
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Benchmark: scanning a whole log vs seeking to a --since/--until window.
+
+Generates a synthetic logcat file spanning a day, then times a full search_errors
+against search_errors_window for windows of growing length. Each windowed result is
+checked against a full scan of a copy whose lines outside the window are blanked, so
+hits and line numbers must be identical.
+
+Usage:
+    python benchmarks/bench_time_window.py [--lines 1000000] [--minutes 10,60,600]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bench_keyword_matcher import make_keywords  # noqa: E402
+from LogScanner import search_errors, search_errors_window  # noqa: E402
+from TimeWindow import TimeWindow, contains, line_time  # noqa: E402
+
+# Seconds covered by the generated log
+DAY = 24 * 3600
+
+
+def make_log(path, lines, keywords, rnd):
+    """Writes `lines` logcat lines with timestamps spread evenly over one day."""
+    levels = "VDIWEF"
+    with open(path, "w", encoding="utf-8") as log_file:
+        for line_num in range(lines):
+            seconds = line_num * DAY / lines
+            stamp = f"10-18 {int(seconds // 3600):02d}:{int(seconds % 3600 // 60):02d}:{seconds % 60:06.3f}"
+            message = f"ActivityManager: processing request {rnd.randint(0, 10 ** 6)} for session"
+            roll = rnd.random()
+            if roll < 0.02:
+                message += " thread has CRASHED"
+            elif roll < 0.07:
+                message += f" Exception at {rnd.choice(keywords)}(Unknown Source)"
+            log_file.write(f"{stamp}  1234  5678 {levels[line_num % 6]} Tag: {message}\n")
+
+
+def blank_outside(log_path, blanked_path, window):
+    """Copies a log with the lines outside the window replaced by empty lines."""
+    since, until = window.bounds("10-18")
+    with open(log_path, encoding="utf-8") as log_file, open(blanked_path, "w", encoding="utf-8") as blanked:
+        for line in log_file:
+            blanked.write(line if contains(since, until, line_time(line)) else "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=1000000)
+    parser.add_argument("--minutes", default="10,60,600")
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    error_data, keywords = make_keywords(100, rnd)
+    print(f"{'minutes':>8} {'full scan (s)':>14} {'window (s)':>11} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_path = os.path.join(temp_dir, "app.txt")
+        blanked_path = os.path.join(temp_dir, "blanked.txt")
+        make_log(log_path, args.lines, keywords, rnd)
+
+        start = time.perf_counter()
+        search_errors(log_path, error_data)
+        full_time = time.perf_counter() - start
+
+        for minutes in (int(minutes) for minutes in args.minutes.split(",")):
+            window = TimeWindow("12:00", f"{12 + minutes // 60:02d}:{minutes % 60:02d}")
+            start = time.perf_counter()
+            actual = search_errors_window(log_path, error_data, window=window)
+            window_time = time.perf_counter() - start
+
+            blank_outside(log_path, blanked_path, window)
+            if actual != search_errors(blanked_path, error_data):
+                print(f"Mismatch between the windowed and the full scan for {minutes} minutes!")
+                return 1
+            print(f"{minutes:>8} {full_time:>14.3f} {window_time:>11.3f} {full_time / window_time:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
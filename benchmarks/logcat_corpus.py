@@ -0,0 +1,219 @@
+"""
+Deterministic synthetic Android logcat corpus for the benchmarks.
+
+Writes a keywords.json and one folder per device with app.txt, app.1.txt, ... logs in
+threadtime format. The same arguments always produce byte-identical files, so results
+of different commits are comparable.
+
+Usage:
+    python benchmarks/logcat_corpus.py OUTPUT_DIR [--size 64M] [--devices 2] [--files 2]
+        [--hit-density 0.05] [--keywords 200] [--line-length 120] [--traces 2] [--seed 42]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from LogDiscovery import parse_size  # noqa: E402
+
+# Default corpus parameters
+DEFAULT_SIZE = 64 * 1024 * 1024
+DEFAULT_DEVICES = 2
+DEFAULT_FILES = 2
+DEFAULT_HIT_DENSITY = 0.05
+DEFAULT_KEYWORDS = 200
+DEFAULT_LINE_LENGTH = 120
+DEFAULT_TRACES = 2  # Crash traces per 10,000 lines
+DEFAULT_SEED = 42
+
+# Description of a generated corpus, next to its keywords.json
+CORPUS_FILE = "corpus.json"
+
+# Keyword categories of the generated keywords.json, next to the crash category
+CATEGORIES = 4
+
+# Filler for messages without a hit
+WORDS = ("processing", "request", "session", "handler", "state", "update", "queue", "received", "sent", "view",
+         "layout", "binder", "network", "socket", "cache", "sync", "done", "started", "user", "token")
+TAGS = ("ActivityManager", "Volley", "Couchbase", "PrinterService", "OkHttp", "SyncAdapter", "InputReader",
+        "Choreographer")
+PACKAGES = ("com.valet_manager.pointofsale", "com.couchbase.lite", "android.app", "com.zebra.sdk")
+NAMES = ("Connection", "Printer", "Dialog", "Reader", "Document", "Reservation", "Handler")
+METHODS = ("close", "open", "dismiss", "getId", "receive", "send", "status", "connect")
+EXCEPTIONS = ("java.lang.NullPointerException", "java.lang.IllegalStateException",
+              "java.lang.IndexOutOfBoundsException", "android.database.sqlite.SQLiteException")
+
+
+def make_keywords(count, seed=DEFAULT_SEED):
+    """
+    Builds a keywords.json dictionary with `count` keywords.
+
+    Returns:
+        tuple: (error_data, keywords) where keywords are the plain keywords to plant.
+    """
+    rnd = random.Random(seed)
+    keywords = set()
+    while len(keywords) < count:
+        keywords.add(f"{rnd.choice(PACKAGES)}.{rnd.choice(NAMES)}{rnd.randint(0, 9999)}.{rnd.choice(METHODS)}")
+    keywords = sorted(keywords)
+    error_data = {"Crashed": {"description": "App crashes", "crash": True, "keywords": ["FATAL EXCEPTION"]}}
+    for index in range(CATEGORIES):
+        error_data[f"Category{index}"] = {"description": "Generated", "keywords": keywords[index::CATEGORIES]}
+    return error_data, keywords
+
+
+class LogcatWriter:
+    """Writes threadtime logcat lines with a clock that advances a little per line."""
+
+    def __init__(self, log_file, rnd, line_length):
+        self.log_file = log_file
+        self.rnd = rnd
+        self.line_length = line_length
+        self.seconds = rnd.randint(0, 12 * 3600)
+        self.bytes = 0
+        self.lines = 0
+
+    def write(self, level, tag, message, pid=1234, tid=None):
+        self.seconds += self.rnd.random() * 0.05
+        seconds = self.seconds % (24 * 3600)
+        stamp = f"10-18 {int(seconds // 3600):02d}:{int(seconds % 3600 // 60):02d}:{seconds % 60:06.3f}"
+        line = f"{stamp}  {pid:5d} {tid or pid:5d} {level} {tag}: {message}\n"
+        self.log_file.write(line)
+        self.bytes += len(line)
+        self.lines += 1
+
+    def filler(self, prefix=""):
+        """Pads a message with filler words to about the configured line length."""
+        words = [prefix] if prefix else []
+        length = 32 + len(prefix)  # Timestamp, ids, level and tag
+        while length < self.line_length:
+            word = self.rnd.choice(WORDS)
+            words.append(word)
+            length += len(word) + 1
+        return " ".join(words)
+
+    def crash_trace(self):
+        """Writes an AndroidRuntime crash with its frames and a cause."""
+        tid = self.rnd.randint(2000, 9000)
+        exception = self.rnd.choice(EXCEPTIONS)
+        self.write("E", "AndroidRuntime", "FATAL EXCEPTION: main", tid=tid)
+        self.write("E", "AndroidRuntime", "Process: com.valet_manager.pointofsale, PID: 1234", tid=tid)
+        self.write("E", "AndroidRuntime", f"{exception}: Attempt to read index {self.rnd.randint(0, 99)}", tid=tid)
+        for _ in range(self.rnd.randint(5, 15)):
+            name = f"{self.rnd.choice(PACKAGES)}.{self.rnd.choice(NAMES)}"
+            self.write("E", "AndroidRuntime", f"\tat {name}.{self.rnd.choice(METHODS)}"
+                                              f"({name.rsplit('.', 1)[1]}.java:{self.rnd.randint(10, 900)})", tid=tid)
+        self.write("E", "AndroidRuntime", f"Caused by: {self.rnd.choice(EXCEPTIONS)}", tid=tid)
+        self.write("E", "AndroidRuntime", f"\t... {self.rnd.randint(3, 20)} more", tid=tid)
+
+
+def write_log(path, size, keywords, rnd, hit_density=DEFAULT_HIT_DENSITY, line_length=DEFAULT_LINE_LENGTH,
+              traces=DEFAULT_TRACES):
+    """
+    Writes one log of about `size` bytes.
+
+    Args:
+        path (str): Log file to write.
+        size (int): Bytes to write; the last line may go a little over.
+        keywords (list): Keywords planted in the hit lines.
+        rnd (random.Random): Source of all randomness, for reproducible files.
+        hit_density (float): Share of lines containing a keyword.
+        line_length (int): Average line length in characters.
+        traces (float): Crash traces per 10,000 lines.
+
+    Returns:
+        tuple: (bytes written, lines written)
+    """
+    levels = "VDIWE"
+    with open(path, "w", encoding="utf-8", newline="\n") as log_file:
+        writer = LogcatWriter(log_file, rnd, line_length)
+        while writer.bytes < size:
+            roll = rnd.random()
+            if roll < traces / 10000:
+                writer.crash_trace()
+            elif roll < traces / 10000 + hit_density:
+                hit = f"Exception at {rnd.choice(keywords)}(Unknown Source)"
+                writer.write("E", rnd.choice(TAGS), writer.filler(hit))
+            else:
+                writer.write(rnd.choice(levels), rnd.choice(TAGS), writer.filler())
+    return writer.bytes, writer.lines
+
+
+def make_corpus(output_dir, size=DEFAULT_SIZE, devices=DEFAULT_DEVICES, files=DEFAULT_FILES,
+                hit_density=DEFAULT_HIT_DENSITY, keyword_count=DEFAULT_KEYWORDS, line_length=DEFAULT_LINE_LENGTH,
+                traces=DEFAULT_TRACES, seed=DEFAULT_SEED):
+    """
+    Writes keywords.json and devices x files logs of about size / (devices x files) bytes.
+
+    Layout: OUTPUT_DIR/keywords.json, OUTPUT_DIR/logs/device<N>/app.txt, app.1.txt, ...
+    and OUTPUT_DIR/corpus.json with the returned description.
+
+    Returns:
+        dict: The parameters, the totals ("bytes", "lines", "files") and every log's
+        relative path, bytes and lines under "logs".
+    """
+    error_data, keywords = make_keywords(keyword_count, seed)
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "keywords.json"), "w", encoding="utf-8") as f:
+        json.dump(error_data, f, indent=2)
+
+    rnd = random.Random(seed)
+    file_size = max(1, size // (devices * files))
+    logs = []
+    for device in range(devices):
+        device_dir = os.path.join(output_dir, "logs", f"device{device}")
+        os.makedirs(device_dir, exist_ok=True)
+        for index in range(files):
+            name = "app.txt" if index == 0 else f"app.{index}.txt"
+            written, lines = write_log(os.path.join(device_dir, name), file_size, keywords, rnd, hit_density,
+                                       line_length, traces)
+            logs.append({"path": f"logs/device{device}/{name}", "bytes": written, "lines": lines})
+    corpus = {"size": size, "devices": devices, "files_per_device": files, "hit_density": hit_density,
+              "keywords": keyword_count, "line_length": line_length, "traces": traces, "seed": seed,
+              "bytes": sum(log["bytes"] for log in logs), "lines": sum(log["lines"] for log in logs),
+              "files": len(logs), "logs": logs}
+    with open(os.path.join(output_dir, CORPUS_FILE), "w", encoding="utf-8") as f:
+        json.dump(corpus, f, indent=2)
+    return corpus
+
+
+def load_corpus(corpus_dir):
+    """Returns the description make_corpus stored in a corpus folder."""
+    with open(os.path.join(corpus_dir, CORPUS_FILE), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def add_corpus_arguments(parser):
+    """Adds the corpus parameters to an argparse parser."""
+    parser.add_argument("--size", type=parse_size, default=DEFAULT_SIZE, help="Total size, e.g. 64M (default: 64M)")
+    parser.add_argument("--devices", type=int, default=DEFAULT_DEVICES, help="Device folders")
+    parser.add_argument("--files", type=int, default=DEFAULT_FILES, help="Logs per device folder")
+    parser.add_argument("--hit-density", type=float, default=DEFAULT_HIT_DENSITY,
+                        help="Share of lines containing a keyword (default: 0.05)")
+    parser.add_argument("--keywords", type=int, default=DEFAULT_KEYWORDS, help="Keywords in keywords.json")
+    parser.add_argument("--line-length", type=int, default=DEFAULT_LINE_LENGTH, help="Average line length")
+    parser.add_argument("--traces", type=float, default=DEFAULT_TRACES, help="Crash traces per 10,000 lines")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+
+
+def corpus_from_args(output_dir, args):
+    return make_corpus(output_dir, args.size, args.devices, args.files, args.hit_density, args.keywords,
+                       args.line_length, args.traces, args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("output_dir")
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+    corpus = corpus_from_args(args.output_dir, args)
+    print(f"Wrote {corpus['files']} logs, {corpus['bytes'] / 1e6:.1f} MB, {corpus['lines']} lines "
+          f"to {args.output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,450 @@
+"""
+Command line entry point for headless use, e.g. on CI workers without a display.
+
+    python cli.py analyze-file app.txt report.txt
+    python cli.py analyze-folder logs/ reports/ --workers 4
+    python cli.py analyze-folder logs/ reports/ --shard 1/2
+    python cli.py merge reports/*/*.shard reports/
+    python cli.py index logs/ logs.db
+    python cli.py query logs.db -k NullPointerException
+    python cli.py rename device1/ renamed/
+    python cli.py rename-tree devices/ renamed/ --mode link --dry-run
+    python cli.py serve
+    python cli.py submit --wait analyze-file app.txt report.txt
+
+Only argparse is imported at startup; the analysis modules are imported by the
+subcommand that needs them, and tkinter only when a path is left out and has to be
+picked in a dialog. benchmarks/bench_startup.py keeps an eye on the startup time.
+"""
+import argparse
+import sys
+
+# Exit codes
+EXIT_OK = 0
+EXIT_FAILURE = 1       # The command ran but could not complete, e.g. a missing file
+EXIT_USAGE = 2         # Invalid arguments (argparse uses the same code)
+EXIT_INTERRUPTED = 130  # Stopped with Ctrl+C
+
+
+def analyze_file(args):
+    import LogAutomation
+
+    return LogAutomation.main(args.file_path, args.save_path, workers=args.workers, engine=args.engine,
+                              max_lines=args.max_lines, incremental=args.incremental, follow=args.follow,
+                              interval=args.interval, verbosity=args.verbosity, traces=args.traces,
+                              window=time_window(args), profile=args.profile, discover=args.discover,
+                              progress=args.progress, pstats_path=args.pstats)
+
+
+def analyze_folder(args):
+    import LogFolderAutomation
+    from LogDiscovery import DEFAULT_INCLUDE, LogFilter
+
+    log_filter = LogFilter(args.include or DEFAULT_INCLUDE, args.exclude, args.min_size, args.max_size,
+                           args.newer_than, args.older_than)
+    return LogFolderAutomation.main(args.folder_path, args.save_path, workers=args.workers, engine=args.engine,
+                                    max_lines=args.max_lines, cache_path=args.cache_path,
+                                    verbosity=args.verbosity, jsonl=args.jsonl, csv_summary=args.csv_summary,
+                                    recursive=args.recursive, log_filter=log_filter, traces=args.traces,
+                                    window=time_window(args), profile=args.profile, discover=args.discover,
+                                    timeline=args.timeline, progress=args.progress, shard=args.shard,
+                                    cache=args.cache, pstats_path=args.pstats)
+
+
+def merge(args):
+    import LogFolderAutomation
+
+    return LogFolderAutomation.merge_main(args.partial_paths, args.save_path, verbosity=args.verbosity,
+                                          csv_summary=args.csv_summary)
+
+
+def index(args):
+    import LogIndex
+    from LogDiscovery import DEFAULT_INCLUDE, LogFilter
+
+    log_filter = LogFilter(args.include or DEFAULT_INCLUDE, args.exclude, args.min_size, args.max_size,
+                           args.newer_than, args.older_than)
+    return LogIndex.index_main(args.folder_path, args.index_path, log_filter=log_filter,
+                               recursive=args.recursive, verbosity=args.verbosity)
+
+
+def query(args):
+    import LogIndex
+
+    error_data = None
+    if args.keyword or args.pattern:
+        error_data = LogIndex.query_keywords(args.keyword, args.pattern)
+    return LogIndex.query_main(args.index_path, error_data, save_path=args.save_path, max_lines=args.max_lines,
+                               verbosity=args.verbosity)
+
+
+def rename(args):
+    import Rename
+
+    folder_path, save_path = args.folder_path, args.save_path
+    if folder_path is None or save_path is None:
+        folder_path, save_path = Rename.choose_folders()
+    return Rename.main(folder_path, save_path, mode=args.mode, workers=args.workers, dry_run=args.dry_run)
+
+
+def rename_tree(args):
+    import RenameMultipleFolderFiles
+
+    master_folder, save_path = args.master_folder, args.save_path
+    if master_folder is None or save_path is None:
+        master_folder, save_path = RenameMultipleFolderFiles.choose_folders()
+    return RenameMultipleFolderFiles.main(master_folder, save_path, mode=args.mode, workers=args.workers,
+                                          dry_run=args.dry_run)
+
+
+def serve(args):
+    import AnalysisDaemon
+
+    return AnalysisDaemon.serve_main(args.host, args.port, args.jobs, args.allow_host)
+
+
+def submit(args):
+    from AnalysisDaemon import FINISHED, DaemonClient, describe_job
+
+    client = DaemonClient(args.host, args.port)
+    job = client.submit(args.job)
+    print(describe_job(job))
+    if not args.wait:
+        return EXIT_OK
+    try:
+        job = client.wait(job["id"], sys.stdout)
+    except KeyboardInterrupt:
+        job = client.cancel(job["id"])
+        if job["status"] not in FINISHED:
+            job = client.wait(job["id"], sys.stdout)
+    print(describe_job(job))
+    return job["exit_code"]
+
+
+def jobs(args):
+    from AnalysisDaemon import DaemonClient, describe_job
+
+    client = DaemonClient(args.host, args.port)
+    if args.job_id is None:
+        for job in client.jobs():
+            print(describe_job(job))
+        return EXIT_OK
+    job = client.job(args.job_id)
+    print(job["output"], end="")
+    print(describe_job(job))
+    return EXIT_OK
+
+
+def cancel(args):
+    from AnalysisDaemon import DaemonClient, describe_job
+
+    print(describe_job(DaemonClient(args.host, args.port).cancel(args.job_id)))
+    return EXIT_OK
+
+
+def stop(args):
+    from AnalysisDaemon import DaemonClient
+
+    DaemonClient(args.host, args.port).shutdown()
+    print("The analysis daemon is stopping; running jobs are cancelled.")
+    return EXIT_OK
+
+
+def positive_int(text):
+    """Parses a count like --workers or --max-lines, which must be at least 1."""
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{text}' is not a whole number.")
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not allowed; use a number of 1 or more.")
+    return value
+
+
+def size_argument(text):
+    from LogDiscovery import parse_size
+
+    try:
+        return parse_size(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def time_argument(text):
+    from LogDiscovery import parse_time
+
+    try:
+        return parse_time(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def window_argument(text):
+    from TimeWindow import TimeWindow
+
+    try:
+        TimeWindow(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return text
+
+
+def shard_argument(text):
+    from ShardResults import parse_shard
+
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def time_window(args):
+    """Returns the TimeWindow of --since/--until, or None to scan whole logs."""
+    if args.since is None and args.until is None:
+        return None
+    from TimeWindow import TimeWindow
+
+    return TimeWindow(args.since, args.until)
+
+
+def add_scan_arguments(parser):
+    """Adds the options shared by the analysis subcommands."""
+    parser.add_argument("--engine", choices=("text", "mmap"), default="text",
+                        help="'mmap' scans raw bytes and tolerates invalid UTF-8 (default: text)")
+    parser.add_argument("--max-lines", type=positive_int, default=None,
+                        help="Line numbers listed per category; further matches are only counted (default: all)")
+    parser.add_argument("--verbosity", choices=("summary", "progress", "full"), default="progress",
+                        help="How much of the report is echoed to the console (default: progress)")
+    parser.add_argument("--traces", action="store_true",
+                        help="Group Java stack traces into crash signatures, ranked at the end of the report")
+    parser.add_argument("--discover", action="store_true",
+                        help="Mine the error lines no keyword matched into templates, ranked at the end of the "
+                             "report as candidate new keywords")
+    parser.add_argument("--profile", action="store_true",
+                        help="Save where the time goes (stages, lines/s, cost and hits per category) as JSON")
+    parser.add_argument("--pstats", metavar="PATH", default=None,
+                        help="Run under cProfile and save the stats to PATH, e.g. for snakeviz (workers are not "
+                             "profiled)")
+    parser.add_argument("--since", type=window_argument, default=None, metavar="TIME",
+                        help="Only analyze lines logged at or after this logcat time, e.g. '10-18 14:05' or 14:05:30. "
+                             "Plain logs are seeked by binary search; logs found out of order are filtered line by "
+                             "line, but outside the window the order is only checked on samples")
+    parser.add_argument("--until", type=window_argument, default=None, metavar="TIME",
+                        help="Only analyze lines logged up to this logcat time")
+
+
+def add_filter_arguments(parser):
+    """Adds the options choosing which logs of a folder are read."""
+    parser.add_argument("--include", action="append", metavar="GLOB",
+                        help="File names to analyze, repeatable, e.g. --include '*.log' (default: *.txt)")
+    parser.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                        help="Files or folders to skip, matched on the name or the relative path")
+    parser.add_argument("--min-size", type=size_argument, default=None, metavar="SIZE",
+                        help="Skip smaller files, e.g. 1K")
+    parser.add_argument("--max-size", type=size_argument, default=None, metavar="SIZE",
+                        help="Skip larger files, e.g. 500M")
+    parser.add_argument("--newer-than", type=time_argument, default=None, metavar="DATE",
+                        help="Only files modified on or after this date, e.g. 2024-05-01")
+    parser.add_argument("--older-than", type=time_argument, default=None, metavar="DATE",
+                        help="Only files modified before this date")
+
+
+def add_collect_arguments(parser, default_mode):
+    """Adds the options of the rename commands, which share FileCollection."""
+    parser.add_argument("--mode", choices=("copy", "link", "move"), default=default_mode,
+                        help="'copy' clones files where the file system supports it, 'link' hard-links them when "
+                             f"source and destination share a file system, 'move' moves them (default: {default_mode})")
+    parser.add_argument("--workers", type=positive_int, default=4, help="Files copied at the same time (default: 4)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only print the planned operations and the bytes they would copy")
+
+
+def add_daemon_arguments(parser):
+    """Adds the address of the analysis daemon, shared by serve and its client commands."""
+    parser.add_argument("--host", default="127.0.0.1", help="Address of the daemon (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port of the daemon (default: 8765)")
+
+
+def run_profiled(args):
+    """Runs a subcommand under cProfile and saves the stats to args.pstats."""
+    import cProfile
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(args.handler, args)
+    finally:
+        profiler.dump_stats(args.pstats)
+        print(f"cProfile stats saved to {args.pstats}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Analyze and rename Android log files.")
+    subparsers = parser.add_subparsers(dest="command", metavar="command", required=True)
+
+    file_parser = subparsers.add_parser("analyze-file", help="Analyze a single log file")
+    file_parser.add_argument("file_path", nargs="?", help="Log file to analyze (default: pick in a dialog)")
+    file_parser.add_argument("save_path", nargs="?", help="Path of the analysis report (default: pick in a dialog)")
+    file_parser.add_argument("--workers", type=positive_int, default=None,
+                             help="Number of processes scanning parts of the file in parallel (default: serial)")
+    add_scan_arguments(file_parser)
+    file_parser.add_argument("--incremental", action="store_true",
+                             help="Only scan what was appended since the last --incremental or --follow run")
+    file_parser.add_argument("--follow", action="store_true",
+                             help="Keep scanning new lines as they are appended, like tail -f")
+    file_parser.add_argument("--interval", type=float, default=1.0,
+                             help="Seconds between checks for new lines with --follow (default: 1)")
+    file_parser.set_defaults(handler=analyze_file, progress=None)
+
+    folder_parser = subparsers.add_parser("analyze-folder", help="Analyze every .txt log file in a folder")
+    folder_parser.add_argument("folder_path", nargs="?",
+                               help="Folder containing the log files (default: pick in a dialog)")
+    folder_parser.add_argument("save_path", nargs="?",
+                               help="Folder where the analysis folder is created (default: pick in a dialog)")
+    folder_parser.add_argument("--workers", type=positive_int, default=None,
+                               help="Number of processes scanning files in parallel (default: serial)")
+    add_scan_arguments(folder_parser)
+    folder_parser.add_argument("--cache", dest="cache_path", default=None,
+                               help="SQLite file caching results of unchanged files and keyword categories")
+    folder_parser.add_argument("--jsonl", action="store_true",
+                               help="Also write every hit as a JSON Lines record (file, line, category, keyword, text)")
+    folder_parser.add_argument("--csv", dest="csv_summary", action="store_true",
+                               help="Also write a CSV with the error counts of every file")
+    folder_parser.add_argument("--timeline", action="store_true",
+                               help="Count the hits per logcat minute, list the spikes and save the series as CSV")
+    folder_parser.add_argument("-r", "--recursive", action="store_true",
+                               help="Also analyze subfolders; the summary groups files per top-level subfolder")
+    folder_parser.add_argument("--shard", type=shard_argument, default=None, metavar="I/N",
+                               help="Only analyze the I-th of N deterministic shards of the logs, e.g. 2/4, and save "
+                                    "their results for the merge command instead of writing the reports")
+    add_filter_arguments(folder_parser)
+    folder_parser.set_defaults(handler=analyze_folder, progress=None, cache=None)
+
+    merge_parser = subparsers.add_parser("merge", help="Merge the partial results of all shards of analyze-folder "
+                                                       "--shard into its reports")
+    merge_parser.add_argument("partial_paths", nargs="+", metavar="partial", help="The .shard file of every shard")
+    merge_parser.add_argument("save_path", help="Folder where the analysis folder is created")
+    merge_parser.add_argument("--csv", dest="csv_summary", action="store_true",
+                              help="Also write a CSV with the error counts of every file")
+    merge_parser.add_argument("--verbosity", choices=("summary", "progress", "full"), default="progress",
+                              help="How much of the report is echoed to the console (default: progress)")
+    merge_parser.set_defaults(handler=merge)
+
+    index_parser = subparsers.add_parser("index", help="Build or update a searchable index of a log folder")
+    index_parser.add_argument("folder_path", help="Folder containing the log files")
+    index_parser.add_argument("index_path", help="SQLite file holding the index; only new lines are added to it")
+    index_parser.add_argument("-r", "--recursive", action="store_true", help="Also index the logs in subfolders")
+    add_filter_arguments(index_parser)
+    index_parser.add_argument("--verbosity", choices=("summary", "progress", "full"), default="progress",
+                              help="'summary' only prints the totals (default: progress)")
+    index_parser.set_defaults(handler=index)
+
+    query_parser = subparsers.add_parser("query", help="Look up keywords in an index without reading the logs")
+    query_parser.add_argument("index_path", help="Index built with the index command")
+    query_parser.add_argument("save_path", nargs="?", help="Path of a report of the matching lines (default: none)")
+    query_parser.add_argument("-k", "--keyword", action="append", default=[],
+                              help="Keyword to look up, repeatable (default: all categories of keywords.json)")
+    query_parser.add_argument("-e", "--pattern", action="append", default=[],
+                              help="Regex or JSON field pattern to look up, repeatable")
+    query_parser.add_argument("--max-lines", type=positive_int, default=None,
+                              help="Line numbers listed per category; further matches are only counted (default: all)")
+    query_parser.add_argument("--verbosity", choices=("summary", "progress", "full"), default="progress",
+                              help="How much of the report is echoed to the console (default: progress)")
+    query_parser.set_defaults(handler=query)
+
+    rename_parser = subparsers.add_parser("rename", help="Rename the app*.txt logs of one folder")
+    rename_parser.add_argument("folder_path", nargs="?", help="Folder containing the logs (default: pick in a dialog)")
+    rename_parser.add_argument("save_path", nargs="?", help="Folder the renamed logs are moved to")
+    add_collect_arguments(rename_parser, "move")
+    rename_parser.set_defaults(handler=rename)
+
+    tree_parser = subparsers.add_parser("rename-tree", help="Copy and rename the app*.txt logs of every subfolder")
+    tree_parser.add_argument("master_folder", nargs="?",
+                             help="Folder with one subfolder per device (default: pick in a dialog)")
+    tree_parser.add_argument("save_path", nargs="?", help="Folder where the <master>_Renamed folder is created")
+    add_collect_arguments(tree_parser, "copy")
+    tree_parser.set_defaults(handler=rename_tree)
+
+    serve_parser = subparsers.add_parser("serve", help="Run the analysis daemon, which keeps the keywords compiled "
+                                                       "and runs submitted jobs")
+    add_daemon_arguments(serve_parser)
+    serve_parser.add_argument("--jobs", type=positive_int, default=2, help="Jobs running at the same time (default: 2)")
+    serve_parser.add_argument("--allow-host", action="append", default=[], metavar="NAME",
+                              help="Name or address of this machine clients on other machines connect to, besides "
+                                   "--host; repeat for several, required with --host 0.0.0.0")
+    serve_parser.set_defaults(handler=serve)
+
+    submit_parser = subparsers.add_parser("submit", help="Queue an analyze-file, analyze-folder, index or query "
+                                                         "command line on the daemon")
+    add_daemon_arguments(submit_parser)
+    submit_parser.add_argument("--wait", action="store_true",
+                               help="Print the job's output as it runs and exit with its exit code; Ctrl+C cancels it")
+    submit_parser.add_argument("job", nargs=argparse.REMAINDER, metavar="command ...",
+                               help="The command line, e.g. analyze-file app.txt report.txt")
+    submit_parser.set_defaults(handler=submit)
+
+    jobs_parser = subparsers.add_parser("jobs", help="List the daemon's jobs, or show one with its output")
+    add_daemon_arguments(jobs_parser)
+    jobs_parser.add_argument("job_id", nargs="?", type=int, help="Job to show (default: list all)")
+    jobs_parser.set_defaults(handler=jobs)
+
+    cancel_parser = subparsers.add_parser("cancel", help="Cancel a queued job or stop a running analysis")
+    add_daemon_arguments(cancel_parser)
+    cancel_parser.add_argument("job_id", type=int, help="Job to cancel")
+    cancel_parser.set_defaults(handler=cancel)
+
+    stop_parser = subparsers.add_parser("stop", help="Stop the daemon, cancelling its jobs")
+    add_daemon_arguments(stop_parser)
+    stop_parser.set_defaults(handler=stop)
+
+    return parser
+
+
+def main(argv=None):
+    """
+    Runs one subcommand.
+
+    Args:
+        argv (list): Command line arguments without the program name. None uses sys.argv.
+
+    Returns:
+        int: Exit code, one of the EXIT_* constants.
+    """
+    parser = build_parser()
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit as e:
+        return EXIT_OK if e.code in (0, None) else EXIT_USAGE
+    return run(args)
+
+
+def run(args):
+    """
+    Runs the handler of a parsed command line; the analysis daemon runs its jobs with it.
+
+    Returns:
+        int: Exit code, one of the EXIT_* constants.
+    """
+    try:
+        if getattr(args, "pstats", None):
+            code = run_profiled(args)
+        else:
+            code = args.handler(args)
+    except KeyboardInterrupt:
+        print("Interrupted.")
+        return EXIT_INTERRUPTED
+    except Exception as e:
+        # E.g. a dialog was needed but there is no display, a rename failed half way or
+        # no analysis daemon is running
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_FAILURE
+    return EXIT_OK if not code else code
+
+
+if __name__ == "__main__":
+    if getattr(sys, 'frozen', False):
+        # Needed for the worker pool in the PyInstaller build; skipped otherwise as
+        # importing multiprocessing alone costs more than the rest of the startup
+        import multiprocessing
+
+        multiprocessing.freeze_support()
+    sys.exit(main())
@@ -1,34 +1,142 @@
 import sys
 import os
+import multiprocessing
 from datetime import datetime
 from PyQt5 import QtCore
 from PyQt5.QtWidgets import (
-    QApplication, QWidget, QVBoxLayout, QLabel, QPushButton, QMessageBox, QFileDialog
+    QApplication, QWidget, QVBoxLayout, QLabel, QPushButton, QMessageBox, QFileDialog, QProgressDialog, QCheckBox
 )
 from PyQt5.QtCore import QThread, pyqtSignal
-from LogFolderAutomation import main as log_folder_automation_main
-from LogAutomation import main as log_automation_main
-import Rename  # Import Rename.py module
-import RenameMultipleFolderFiles  # Import RenameMultipleFolderFiles.py module
+
+from ScanProgress import ScanProgress
+
+# The analysis and rename modules are imported by the actions that use them, so the
+# window shows up without loading them first
+
+# Seconds between two progress updates of the progress dialog
+PROGRESS_INTERVAL = 0.2
+
+# Steps of the progress bar
+PROGRESS_STEPS = 1000
 
 
 class AnalysisWorker(QThread):
-    finished = pyqtSignal(str)  # Signal when the analysis is complete
-    error = pyqtSignal(str)     # Signal when an error occurs
+    """Analyzes a folder of logs in the background, reporting progress until it finishes or is cancelled."""
+    progress = pyqtSignal(dict)  # Signal with a ScanProgress snapshot while the analysis runs
+    finished = pyqtSignal(str)   # Signal when the analysis is complete
+    error = pyqtSignal(str)      # Signal when an error occurs
+    cancelled = pyqtSignal()     # Signal when the analysis stopped after cancel()
 
     def __init__(self, folder_path, save_path):
         super().__init__()
         self.folder_path = folder_path
         self.save_path = save_path
+        self.scan_progress = ScanProgress(on_update=self.progress.emit, interval=PROGRESS_INTERVAL)
+
+    def cancel(self):
+        """Stops the analysis at its next check; safe to call from the GUI thread."""
+        self.scan_progress.cancel()
+
+    def analyze(self):
+        """Runs the analysis; returns its exit code and the path of the report."""
+        from LogFolderAutomation import main as log_folder_automation_main
+
+        exit_code = log_folder_automation_main(folder_path=self.folder_path, save_path=self.save_path,
+                                               workers=os.cpu_count(), verbosity="summary",
+                                               progress=self.scan_progress)
+        return exit_code, analysis_folder_path(self.folder_path, self.save_path)
 
     def run(self):
         try:
-            log_folder_automation_main(folder_path=self.folder_path, save_path=self.save_path)
-            analysis_folder_name = os.path.basename(self.folder_path) + f"_ConsolidatedReport_{datetime.now().strftime('%Y-%m-%d')}"
-            full_analysis_path = os.path.join(self.save_path, analysis_folder_name)
-            self.finished.emit(full_analysis_path)
+            exit_code, report_path = self.analyze()
         except Exception as e:
             self.error.emit(str(e))
+            return
+        if exit_code == 0:
+            self.finished.emit(report_path)
+        elif self.scan_progress.cancelled:
+            self.cancelled.emit()
+        else:
+            self.error.emit("The analysis failed. See the console output for details.")
+
+
+class LogAnalysisWorker(AnalysisWorker):
+    """Analyzes a single log file in the background."""
+
+    def __init__(self, file_path, save_path):
+        super().__init__(os.path.dirname(file_path), save_path)
+        self.file_path = file_path
+
+    def analyze(self):
+        from LogAutomation import main as log_automation_main
+
+        exit_code = log_automation_main(self.file_path, self.save_path, verbosity="summary",
+                                        progress=self.scan_progress)
+        return exit_code, self.save_path
+
+
+class DaemonJobWorker(AnalysisWorker):
+    """
+    Runs an analysis as a job of the analysis daemon started with 'cli.py serve', which
+    has the analysis imported and keywords.json compiled already, reporting the job's
+    progress like the in-process workers.
+    """
+
+    def __init__(self, argv, report_path):
+        """
+        Args:
+            argv (list): The cli.py command line of the analysis, with absolute paths.
+            report_path (str): Report or analysis folder the command line writes.
+        """
+        super().__init__(None, None)
+        self.argv = argv
+        self.report_path = report_path
+
+    def analyze(self):
+        from AnalysisDaemon import FINISHED, WAIT_INTERVAL, DaemonClient
+
+        client = DaemonClient()
+        job = client.submit(self.argv)
+        cancel_sent = False
+        while job["status"] not in FINISHED:
+            if self.scan_progress.cancelled and not cancel_sent:
+                cancel_sent = True
+                try:
+                    client.cancel(job["id"])
+                except ValueError:
+                    pass  # Finished in the meantime
+            job = client.job(job["id"], job.get("output_size", 0), wait=WAIT_INTERVAL)
+            if job["progress"] is not None:
+                self.progress.emit(job["progress"])
+        return job["exit_code"], self.report_path
+
+
+def analysis_folder_path(folder_path, save_path):
+    """Returns the analysis folder the folder analysis of today creates in save_path."""
+    analysis_folder_name = os.path.basename(folder_path) + f"_ConsolidatedReport_{datetime.now().strftime('%Y-%m-%d')}"
+    return os.path.join(save_path, analysis_folder_name)
+
+
+def format_duration(seconds):
+    """Formats seconds as e.g. '42 s' or '3 min 05 s'."""
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes} min {seconds:02d} s" if minutes else f"{seconds} s"
+
+
+def format_progress(snapshot):
+    """Describes a ScanProgress snapshot for the progress dialog."""
+    files_total = f"{snapshot['files_total']}" + ("" if snapshot["discovery_done"] else "+")
+    lines = [
+        f"Files: {snapshot['files_done']} of {files_total}",
+        f"Scanned: {snapshot['bytes_done'] / (1024 * 1024):.1f} of {snapshot['total_bytes'] / (1024 * 1024):.1f} MB",
+    ]
+    if snapshot["current_file"]:
+        lines.append(f"Last file: {os.path.basename(snapshot['current_file'])}")
+    for error_type, count in snapshot["hits"].items():
+        lines.append(f"{error_type}: {count}")
+    eta = snapshot["eta"]
+    lines.append(f"Time left: {format_duration(eta)}" if eta is not None else "Time left: estimating...")
+    return "\n".join(lines)
 
 
 class LogAutomationUI(QWidget):
@@ -63,6 +171,10 @@ class LogAutomationUI(QWidget):
         btn_rename_multiple.clicked.connect(self.rename_multiple_folder_files)
         layout.addWidget(btn_rename_multiple)
 
+        # Opt-in, as the daemon must have been started with 'cli.py serve' beforehand
+        self.use_daemon = QCheckBox("Run analyses on the analysis daemon (cli.py serve)")
+        layout.addWidget(self.use_daemon)
+
         btn_exit = QPushButton("Exit")
         btn_exit.clicked.connect(self.exit_program)
         layout.addWidget(btn_exit)
@@ -91,11 +203,11 @@ class LogAutomationUI(QWidget):
             QMessageBox.warning(self, "No Save Location", "No save location specified. Please try again.")
             return
 
-        try:
-            log_automation_main(file_path, save_path)
-            QMessageBox.information(self, "Success", f"The log file was analyzed successfully.\n\nAnalysis report saved to:\n{save_path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"An error occurred: {e}")
+        if self.use_daemon.isChecked():
+            worker = DaemonJobWorker(["analyze-file", file_path, save_path, "--verbosity", "summary"], save_path)
+        else:
+            worker = LogAnalysisWorker(file_path, save_path)
+        self.start_analysis(worker, "Analyzing File", self.on_log_analysis_finished)
 
     def analyze_multiple_logs(self):
         folder_path = QFileDialog.getExistingDirectory(self, "Select a Folder Containing Log Files")
@@ -108,16 +220,29 @@ class LogAutomationUI(QWidget):
             QMessageBox.warning(self, "No Location Selected", "No location specified to save the analysis. Returning to the menu.")
             return
 
-        self.processing_dialog = QMessageBox(self)
-        self.processing_dialog.setWindowTitle("Analyzing Files")
-        self.processing_dialog.setText("Analyzing files: Please wait...")
-        self.processing_dialog.setStandardButtons(QMessageBox.NoButton)
-        self.processing_dialog.show()
-
-        self.worker = AnalysisWorker(folder_path, save_path)
-        self.worker.finished.connect(self.on_analysis_finished)
+        if self.use_daemon.isChecked():
+            worker = DaemonJobWorker(["analyze-folder", folder_path, save_path, "--workers", str(os.cpu_count() or 1),
+                                      "--verbosity", "summary"], analysis_folder_path(folder_path, save_path))
+        else:
+            worker = AnalysisWorker(folder_path, save_path)
+        self.start_analysis(worker, "Analyzing Files", self.on_analysis_finished)
+
+    def start_analysis(self, worker, title, on_finished):
+        """Runs an analysis worker behind a progress dialog whose Cancel button stops it."""
+        self.processing_dialog = QProgressDialog("Analyzing files: Please wait...", "Cancel", 0, PROGRESS_STEPS, self)
+        self.processing_dialog.setWindowTitle(title)
+        self.processing_dialog.setWindowModality(QtCore.Qt.WindowModal)
+        self.processing_dialog.setMinimumDuration(0)
+        self.processing_dialog.setAutoReset(False)
+        self.processing_dialog.setAutoClose(False)
+        self.processing_dialog.setValue(0)
+
+        self.worker = worker
+        self.worker.progress.connect(self.on_analysis_progress)
+        self.worker.finished.connect(on_finished)
         self.worker.error.connect(self.on_analysis_error)
-        self.worker.error.connect(self.processing_dialog.close)
+        self.worker.cancelled.connect(self.on_analysis_cancelled)
+        self.processing_dialog.canceled.connect(self.on_cancel_requested)
         self.worker.start()
 
     def rename_files(self):
@@ -131,8 +256,13 @@ class LogAutomationUI(QWidget):
             QMessageBox.warning(self, "No Location Selected", "No location specified to save the renamed files. Returning to the menu.")
             return
 
+        import Rename
+
         try:
-            Rename.main(folder_path, save_path)  # Pass folder_path and save_path
+            if Rename.main(folder_path, save_path) != 0:  # Pass folder_path and save_path
+                QMessageBox.warning(self, "Nothing Renamed", "Files in the save location would have been overwritten. "
+                                                             "Nothing was renamed; see the console for the files.")
+                return
             QMessageBox.information(self, "Success", "Files have been renamed successfully!")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"An error occurred while renaming files: {e}")
@@ -148,17 +278,43 @@ class LogAutomationUI(QWidget):
             QMessageBox.warning(self, "No Location Selected", "No location specified to save the renamed files. Returning to the menu.")
             return
 
+        import RenameMultipleFolderFiles
+
         try:
-            RenameMultipleFolderFiles.main(folder_path, save_path)  # Pass folder_path and save_path
+            if RenameMultipleFolderFiles.main(folder_path, save_path) != 0:  # Pass folder_path and save_path
+                QMessageBox.warning(self, "Nothing Renamed", "Files in the save location would have been overwritten. "
+                                                             "Nothing was copied; see the console for the files.")
+                return
             QMessageBox.information(self, "Success", "Files from multiple folders have been renamed successfully!")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"An error occurred while renaming multiple folder files: {e}")
 
+    def on_analysis_progress(self, snapshot):
+        if self.processing_dialog.wasCanceled():
+            return
+        if snapshot["discovery_done"] and snapshot["total_bytes"]:
+            self.processing_dialog.setMaximum(PROGRESS_STEPS)
+            self.processing_dialog.setValue(snapshot["bytes_done"] * PROGRESS_STEPS // snapshot["total_bytes"])
+        else:
+            self.processing_dialog.setMaximum(0)  # Busy indicator until all files are known
+        self.processing_dialog.setLabelText(format_progress(snapshot))
+
+    def on_cancel_requested(self):
+        self.processing_dialog.setLabelText("Cancelling the analysis...")
+        self.processing_dialog.setCancelButton(None)
+        self.worker.cancel()
+
+    def on_log_analysis_finished(self, save_path):
+        self.processing_dialog.close()
+        QMessageBox.information(self, "Success", f"The log file was analyzed successfully.\n\nAnalysis report saved to:\n{save_path}")
+
     def on_analysis_finished(self, analysis_path):
+        self.processing_dialog.close()
         QMessageBox.information(self, "Success", f"The log files were analyzed successfully.\n\nConsolidated report saved to: {analysis_path}")
-        self.processing_dialog.setStandardButtons(QMessageBox.Close)
-        self.processing_dialog.button(QMessageBox.Close).clicked.connect(self.processing_dialog.close)
-        self.processing_dialog.setText("Analysis Complete! Click Close to exit.")
+
+    def on_analysis_cancelled(self):
+        self.processing_dialog.close()
+        QMessageBox.information(self, "Cancelled", "The analysis was cancelled before it finished.")
 
     def on_analysis_error(self, error_message):
         self.processing_dialog.close()
@@ -171,6 +327,7 @@ class LogAutomationUI(QWidget):
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # The folder analysis starts worker processes
     app = QApplication(sys.argv)
     window = LogAutomationUI()
     window.show()
@@ -5,7 +5,7 @@ a = Analysis(
     ['menu.py'],
     pathex=[],
     binaries=[],
-    datas=[('keywords.json', '.'), ('LogFolderAutomation.py', '.'), ('LogAutomation.py', '.'), ('Rename.py', '.'), ('RenameMultipleFolderFiles.py', '.')],
+    datas=[('keywords.json', '.'), ('KeywordMatcher.py', '.'), ('KeywordConfig.py', '.'), ('LogScanner.py', '.'), ('LineAccumulator.py', '.'), ('ResultCache.py', '.'), ('LogFollower.py', '.'), ('ReportWriter.py', '.'), ('StructuredOutput.py', '.'), ('LogDiscovery.py', '.'), ('CompressedInput.py', '.'), ('ScanProgress.py', '.'), ('AnalysisDaemon.py', '.'), ('ScanProfile.py', '.'), ('StackTraces.py', '.'), ('LogTemplates.py', '.'), ('HitTimeline.py', '.'), ('TimeWindow.py', '.'), ('LogIndex.py', '.'), ('ShardResults.py', '.'), ('LogFolderAutomation.py', '.'), ('LogAutomation.py', '.'), ('Rename.py', '.'), ('FileCollection.py', '.'), ('RenameMultipleFolderFiles.py', '.')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
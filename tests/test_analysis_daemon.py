@@ -0,0 +1,136 @@
+import http.client
+import json
+import os
+import stat
+import sys
+import threading
+
+import pytest
+
+import AnalysisDaemon
+from AnalysisDaemon import TOKEN_HEADER, AnalysisDaemon as Daemon, DaemonClient, create_server, token_path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setattr(AnalysisDaemon, "TOKEN_FOLDER", str(tmp_path / "daemon"))
+    daemon = Daemon(1)
+    server = create_server(daemon, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    daemon.close()
+
+
+def send(server, method, path, headers, body=None):
+    """Sends a request with exactly these headers and returns the status and decoded reply."""
+    connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+    try:
+        connection.putrequest(method, path, skip_host=True, skip_accept_encoding=True)
+        for name, value in headers.items():
+            connection.putheader(name, value)
+        data = body.encode("utf-8") if body is not None else b""
+        connection.putheader("Content-Length", str(len(data)))
+        connection.endheaders(data)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read() or b"{}")
+    finally:
+        connection.close()
+
+
+def headers(server):
+    """Returns the headers DaemonClient sends."""
+    return {"Host": f"127.0.0.1:{server.server_address[1]}", "Content-Type": "application/json",
+            TOKEN_HEADER: server.token}
+
+
+def test_token_file_is_private(server):
+    path = token_path(server.server_address[1])
+    with open(path) as f:
+        assert f.read() == server.token
+    if sys.platform != "win32":
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_client_reads_the_token(server):
+    client = DaemonClient(port=server.server_address[1])
+    assert client.status()["jobs"]["running"] == 0
+    assert client.jobs() == []
+
+
+@pytest.mark.parametrize("change", [
+    {"Content-Type": "text/plain"},
+    {"Origin": "http://example.com"},
+    {"Host": "attacker.example:8765"},
+    {TOKEN_HEADER: "0" * 64},
+])
+def test_requests_from_web_pages_or_without_token_are_refused(server, change):
+    request = headers(server)
+    request.update(change)
+    for path in ("/jobs", "/shutdown"):
+        status, reply = send(server, "POST", path, request, '{"argv": ["analyze-file"]}')
+        assert status == 403, reply
+    if "Content-Type" not in change:
+        assert send(server, "GET", "/jobs", request)[0] == 403
+    assert send(server, "GET", "/jobs", headers(server))[0] == 200  # Still running
+
+
+def test_missing_token_and_content_type_are_refused(server):
+    request = headers(server)
+    del request[TOKEN_HEADER]
+    assert send(server, "GET", "/status", request)[0] == 403
+    request = headers(server)
+    del request["Content-Type"]
+    assert send(server, "POST", "/shutdown", request)[0] == 403
+
+
+def test_allowed_host_names_are_accepted(tmp_path, monkeypatch):
+    monkeypatch.setattr(AnalysisDaemon, "TOKEN_FOLDER", str(tmp_path / "daemon"))
+    daemon = Daemon(1)
+    server = create_server(daemon, "0.0.0.0", 0, allowed_hosts=("Logs.Example",))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        request = headers(server)
+        assert send(server, "GET", "/jobs", request)[0] == 200
+        request["Host"] = f"logs.example:{server.server_address[1]}"
+        assert send(server, "GET", "/jobs", request)[0] == 200
+        request["Host"] = f"0.0.0.0:{server.server_address[1]}"
+        assert send(server, "GET", "/jobs", request)[0] == 403
+    finally:
+        server.shutdown()
+        server.server_close()
+        daemon.close()
+
+
+def test_wildcard_bind_needs_allowed_hosts(capsys):
+    assert AnalysisDaemon.serve_main("0.0.0.0", 0) == 1
+    assert "--allow-host" in capsys.readouterr().out
+
+
+def test_jobs_share_the_open_result_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(ROOT)  # keywords.json is found next to the program
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    (logs / "app.txt").write_text("10-18 14:00:00.000 E Tag: com.android.volley.TimeoutError in request\n")
+    daemon = Daemon(1)
+    monkeypatch.setattr(sys, "stdout", daemon.stdout)  # As serve_main does, so jobs keep their output
+    try:
+        outputs = []
+        for run in range(2):
+            (tmp_path / f"out{run}").mkdir()
+            job = daemon.submit(["analyze-folder", "logs", f"out{run}", "--cache", "cache.db", "--verbosity",
+                                 "summary"], str(tmp_path))
+            job.future.result()
+            assert job.exit_code == 0, job.output.text()
+            outputs.append(job.output.text())
+        assert "1 files scanned" in outputs[0]
+        assert "1 files fully cached, 0 files scanned" in outputs[1]
+        assert daemon.status()["caches"] == [str(tmp_path / "cache.db")]
+    finally:
+        daemon.close()
+    assert daemon.status()["caches"] == []
@@ -0,0 +1,40 @@
+import json
+import os
+
+import pytest
+
+import cli
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("argv", [
+    ["analyze-file", "app.txt", "report.txt", "--workers", "0"],
+    ["analyze-file", "app.txt", "report.txt", "--max-lines", "-5"],
+    ["analyze-folder", "logs", "reports", "--workers", "-3"],
+    ["analyze-folder", "logs", "reports", "--max-lines", "0"],
+    ["query", "logs.db", "--max-lines", "-1"],
+    ["rename-tree", "devices", "renamed", "--workers", "0"],
+    ["serve", "--jobs", "0"],
+    ["analyze-folder", "logs", "reports", "--workers", "two"],
+])
+def test_counts_below_one_are_rejected(argv, capsys):
+    assert cli.main(argv) == cli.EXIT_USAGE
+    assert "--" in capsys.readouterr().err
+
+
+def test_positive_counts_are_accepted():
+    args = cli.build_parser().parse_args(["analyze-folder", "logs", "reports", "--workers", "2", "--max-lines", "1"])
+    assert (args.workers, args.max_lines) == (2, 1)
+
+
+def test_profile_names_the_pstats_dump(tmp_path, monkeypatch):
+    monkeypatch.chdir(ROOT)  # keywords.json is found next to the program
+    log = tmp_path / "app.txt"
+    log.write_text("10-18 14:00:00.000 E Tag: app crashed\n")
+    pstats = tmp_path / "run.prof"
+    assert cli.main(["analyze-file", str(log), str(tmp_path / "report.txt"), "--verbosity", "summary", "--profile",
+                     "--pstats", str(pstats)]) == cli.EXIT_OK
+    with open(tmp_path / "report_profile.json") as f:
+        assert json.load(f)["pstats"] == str(pstats)
+    assert pstats.exists()
@@ -0,0 +1,99 @@
+import gzip
+import os
+import zipfile
+
+import pytest
+
+import LogAutomation
+import LogFolderAutomation
+from CompressedInput import expand_archives, member_path, open_log, split_member
+from LogDiscovery import LogFilter, discover_logs
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Start of a PNG file: a NUL in its first bytes and 0x80 further on
+PNG = b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR" + bytes(range(256)) * 4
+
+LOG = "10-18 14:00:00.000 E Tag: com.android.volley.TimeoutError in request\n"
+OLDER_LOG = "10-18 13:00:00.000 E Tag: app crashed while starting\n"
+
+
+@pytest.fixture
+def bug_report(tmp_path):
+    folder = tmp_path / "reports"
+    folder.mkdir()
+    with zipfile.ZipFile(folder / "bugreport.zip", "w") as bundle:
+        bundle.writestr("app.txt", LOG * 3)
+        bundle.writestr("screenshot.png", PNG)
+        bundle.writestr("logs/app.1.txt.gz", gzip.compress(OLDER_LOG.encode("utf-8") * 2))
+        bundle.writestr("old/app.2.txt", LOG)
+    (folder / "loose.txt").write_text(LOG)
+    return str(folder)
+
+
+def expanded(folder, log_filter):
+    return sorted(label for label, _ in expand_archives(discover_logs(folder, log_filter), log_filter))
+
+
+def test_members_are_filtered_like_loose_files(bug_report, capsys):
+    log_filter = LogFilter(("*.zip", "*.txt", "*.gz"), exclude=("old",))
+    assert expanded(bug_report, log_filter) == [
+        os.path.join("bugreport.zip", "app.txt"),
+        os.path.join("bugreport.zip", "logs", "app.1.txt.gz"),
+        "loose.txt",
+    ]
+    assert capsys.readouterr().out == ""  # The screenshot doesn't match the include globs
+
+    # Globs of the bundles aren't asked of their members, which fall back to *.txt
+    assert expanded(bug_report, LogFilter(("*.zip",))) == [
+        os.path.join("bugreport.zip", "app.txt"),
+        os.path.join("bugreport.zip", "old", "app.2.txt"),
+    ]
+
+
+def test_binary_members_are_skipped_with_a_warning(bug_report, capsys):
+    labels = expanded(bug_report, LogFilter(("*.zip", "*.png")))
+    assert labels == []
+    assert "screenshot.png' as it is a binary file" in capsys.readouterr().out
+
+
+def test_compressed_members_are_decompressed(bug_report):
+    path = os.path.join(bug_report, "bugreport.zip") + "::logs/app.1.txt.gz"
+    with open_log(path) as lines:
+        assert list(lines) == [OLDER_LOG, OLDER_LOG]
+
+
+def test_folder_with_binary_and_compressed_members_is_analyzed(bug_report, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(ROOT)  # keywords.json is found next to the program
+    save_path = tmp_path / "out"
+    save_path.mkdir()
+    code = LogFolderAutomation.main(bug_report, str(save_path), verbosity="summary",
+                                    log_filter=LogFilter(("*.zip", "*.txt", "*.gz", "*.png")))
+    assert code == 0
+    assert "screenshot.png' as it is a binary file" in capsys.readouterr().out
+    (report_folder,) = os.listdir(save_path)
+    (report,) = [name for name in os.listdir(save_path / report_folder) if "ExceptionAnalysis" in name]
+    text = (save_path / report_folder / report).read_text()
+    assert f"Analyzing File: {os.path.join('bugreport.zip', 'logs', 'app.1.txt.gz')}" in text
+    assert "app crashed while starting" in text
+    assert "screenshot.png" not in text
+
+
+def test_uppercase_bundles_are_analyzed(tmp_path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    folder = tmp_path / "reports"
+    folder.mkdir()
+    with zipfile.ZipFile(folder / "BUGREPORT.ZIP", "w") as bundle:
+        bundle.writestr("app.txt", LOG)
+    path = member_path(str(folder / "BUGREPORT.ZIP"), "app.txt")
+    assert split_member(path) == (str(folder / "BUGREPORT.ZIP"), "app.txt")
+    with open_log(path) as lines:
+        assert list(lines) == [LOG]
+
+    save_path = tmp_path / "out"
+    save_path.mkdir()
+    assert LogFolderAutomation.main(str(folder), str(save_path), verbosity="summary",
+                                    log_filter=LogFilter(("*.ZIP",))) == 0
+    report = tmp_path / "app.txt"
+    assert LogAutomation.main(str(folder / "BUGREPORT.ZIP"), str(report), verbosity="summary") == 0
+    assert "TimeoutError" in report.read_text()
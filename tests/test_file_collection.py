@@ -0,0 +1,53 @@
+import os
+import shutil
+
+import pytest
+
+import FileCollection
+from FileCollection import collect, plan_folder
+
+
+@pytest.fixture
+def device_folder(tmp_path):
+    folder = tmp_path / "device1"
+    folder.mkdir()
+    (folder / "app.txt").write_text("current log\n" * 1000)
+    (folder / "app.1.txt").write_text("older log\n" * 1000)
+    save_path = tmp_path / "renamed"
+    save_path.mkdir()
+    return str(folder), str(save_path)
+
+
+def test_failed_copy_leaves_nothing_behind_and_the_plan_can_be_rerun(device_folder, monkeypatch):
+    folder, save_path = device_folder
+
+    def failing_copy(src, dst, length=0):
+        dst.write(src.read(100))
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(FileCollection, "_reflink", lambda src, dst: False)
+    monkeypatch.setattr(shutil, "copyfileobj", failing_copy)
+    operations = plan_folder(folder, save_path, "2024-05-01")
+    with pytest.raises(OSError):
+        collect(operations, "copy", workers=1)
+    assert os.listdir(save_path) == []
+
+    monkeypatch.undo()
+    operations = plan_folder(folder, save_path, "2024-05-01")
+    assert collect(operations, "copy", workers=1)
+    assert sorted(os.listdir(save_path)) == ["device1.1.txt", "device1.2024-05-01.txt"]
+    assert sorted(os.listdir(folder)) == ["app.1.txt", "app.txt"]  # Copies leave the sources in place
+    with open(os.path.join(save_path, "device1.1.txt")) as f:
+        assert f.read() == "older log\n" * 1000
+
+
+def test_existing_destination_is_never_removed(device_folder, monkeypatch):
+    folder, save_path = device_folder
+    existing = os.path.join(save_path, "device1.1.txt")
+    with open(existing, "w") as f:
+        f.write("keep me")
+    operation = [op for op in plan_folder(folder, save_path, "2024-05-01") if op.destination == existing][0]
+    with pytest.raises(FileExistsError):
+        FileCollection.apply_operation(operation, "copy")
+    with open(existing) as f:
+        assert f.read() == "keep me"
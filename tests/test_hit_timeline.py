@@ -0,0 +1,73 @@
+import pytest
+
+from HitTimeline import TOTAL, HitTimeline, minute_label, minute_of
+
+CATEGORIES = ["Crashed", "Error"]
+
+
+def hit(timeline, stamp, *categories):
+    timeline(1, list(categories or ["Error"]), f"{stamp}.000  1234  1234 E Tag: error")
+
+
+@pytest.mark.parametrize("date, clock", [
+    ("01-00", "10:00:00"), ("02-30", "10:00:00"), ("04-31", "10:00:00"), ("13-01", "10:00:00"),
+    ("00-10", "10:00:00"), ("01-01", "24:00:00"), ("01-01", "10:60:00"),
+])
+def test_invalid_timestamps_have_no_minute(date, clock):
+    assert minute_of(date, clock) is None
+
+
+def test_minute_labels_round_trip():
+    for date in ("01-01", "02-29", "03-01", "12-31"):
+        assert minute_label(minute_of(date, "23:59:00")) == f"{date} 23:59"
+
+
+def test_invalid_dates_are_counted_as_untimed():
+    timeline = HitTimeline(CATEGORIES)
+    hit(timeline, "01-00 10:00:00")
+    assert timeline.start is None and timeline.untimed == 1
+
+
+def test_hits_are_counted_per_minute_and_category():
+    timeline = HitTimeline(CATEGORIES)
+    hit(timeline, "10-18 14:00:05", "Error", "Crashed")
+    hit(timeline, "10-18 14:00:59")
+    hit(timeline, "10-18 14:03:00")
+    hit(timeline, "10-18 13:59:00")  # Before the first hit, grows the arrays at the front
+    timeline(1, ["Error"], "\tat com.example.Main.run(Main.java:10)")
+    assert minute_label(timeline.start) == "10-18 13:59"
+    assert list(timeline.counts["Error"]) == [1, 2, 0, 0, 1]
+    assert list(timeline.counts["Crashed"]) == [0, 1, 0, 0, 0]
+    assert list(timeline.total()) == [1, 3, 0, 0, 1]
+    assert timeline.untimed == 1
+
+
+def test_log_crossing_new_year_stays_in_order():
+    timeline = HitTimeline(CATEGORIES)
+    hit(timeline, "12-31 23:58:00")
+    hit(timeline, "01-01 00:01:00")
+    assert len(timeline) == 4
+    assert [minute_label(timeline.start + index) for index in (0, 3)] == ["12-31 23:58", "01-01 00:01"]
+
+    # The January log of a folder merged first, the December log after it
+    january = HitTimeline(CATEGORIES)
+    hit(january, "01-01 00:01:00")
+    december = HitTimeline(CATEGORIES)
+    hit(december, "12-31 23:58:00")
+    january.merge(december)
+    assert list(january.total()) == [1, 0, 0, 1]
+    assert minute_label(january.start) == "12-31 23:58"
+
+
+def test_spikes_are_found_against_the_rolling_baseline():
+    timeline = HitTimeline(CATEGORIES)
+    for minute in range(40):
+        for _ in range(20 if minute == 35 else 2):
+            hit(timeline, f"10-18 14:{minute:02d}:00")
+    hit(timeline, "10-18 14:36:00", "Crashed")  # A single hit is never a spike
+
+    spikes = timeline.spikes(window=30, factor=3.0, min_hits=10)
+    start = minute_of("10-18", "14:00:00")
+    assert [(minute - start, name, count) for minute, name, count, _ in spikes] == [
+        (35, TOTAL, 20), (35, "Error", 20)]
+    assert spikes[0][3] == 2.0
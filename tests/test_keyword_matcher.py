@@ -0,0 +1,114 @@
+import random
+import re
+
+import pytest
+
+from KeywordMatcher import SMALL_DICTIONARY, compile_keywords
+
+# A small alphabet, so random keywords overlap and share prefixes and suffixes
+ALPHABET = "abcé "
+
+# Regexes with a literal to gate them, without one, and with a group reference
+REGEXES = [r"time+out \d+", r"fail(ed|ure)", r"(\w)\1x", r"[a-c]é?", r"^b", r"ca$", r"Error \d"]
+
+
+def random_text(rng, length):
+    return "".join(rng.choice(ALPHABET) for _ in range(length))
+
+
+def dictionary(rng, size):
+    """Spreads random keywords, duplicates and regexes over three categories."""
+    keywords = [random_text(rng, rng.randint(1, 6)).strip() or "a" for _ in range(size)]
+    keywords += [keyword.upper() for keyword in rng.sample(keywords, 3)] + ["AbC", ""]
+    rng.shuffle(keywords)
+    error_data = {"Crashed": {"crash": True}, "Error": {}, "Warning": {}}
+    for index, keyword in enumerate(keywords):
+        error_data[list(error_data)[index % 3]].setdefault("keywords", []).append(keyword)
+    for index, regex in enumerate(REGEXES):
+        error_data[list(error_data)[index % 3]].setdefault("patterns", []).append(regex)
+    error_data["Warning"]["patterns"].append({"keyword": "Bé"})
+    return error_data
+
+
+def naive_find(error_data, line_lower):
+    """Checks every keyword and pattern on its own."""
+    hits = {}
+    for error_type, details in error_data.items():
+        found = [keyword for keyword in details.get("keywords", ()) if keyword.lower() in line_lower]
+        for pattern in details.get("patterns", ()):
+            if isinstance(pattern, dict):
+                if pattern["keyword"].lower() in line_lower:
+                    found.append(f"keyword={pattern['keyword']}")
+            elif re.search(pattern, line_lower, re.IGNORECASE | re.MULTILINE):
+                found.append(pattern)
+        if found:
+            hits[error_type] = found
+    return hits
+
+
+def corpus(rng, error_data, count):
+    """Random lines, most of them built around keywords of the dictionary in random case."""
+    keywords = [keyword for details in error_data.values() for keyword in details.get("keywords", ())]
+    extras = ["timeout 42", "timeeeout 7", "failure", "failed", "aax", "ééx", "error 5", "ERROR 5"]
+    lines = []
+    for _ in range(count):
+        parts = [random_text(rng, rng.randint(0, 8))]
+        for _ in range(rng.randint(0, 3)):
+            parts.append(rng.choice(keywords + extras) if rng.random() < 0.8 else random_text(rng, 3))
+            parts.append(random_text(rng, rng.randint(0, 4)))
+        line = "".join(parts)
+        lines.append("".join(ch.upper() if rng.random() < 0.3 else ch for ch in line))
+    return lines
+
+
+@pytest.mark.parametrize("size", [10, SMALL_DICTIONARY * 2])
+def test_find_matches_a_naive_loop(size):
+    rng = random.Random(size)
+    error_data = dictionary(rng, size)
+    matcher = compile_keywords(error_data)
+    assert (matcher._small is None) == (size >= SMALL_DICTIONARY)
+    for line in corpus(rng, error_data, 2000):
+        line_lower = line.lower()
+        assert matcher.find(line_lower) == naive_find(error_data, line_lower), line
+
+
+@pytest.mark.parametrize("size", [10, SMALL_DICTIONARY * 2])
+def test_prefilters_keep_every_matching_line(size):
+    rng = random.Random(size)
+    error_data = dictionary(rng, size)
+    # Without short keywords and ungated regexes the prefilters can narrow the lines down
+    for details in error_data.values():
+        details["keywords"] = [keyword for keyword in details.get("keywords", ()) if len(keyword) >= 4]
+        details["patterns"] = [pattern for pattern in details.get("patterns", ())
+                               if pattern not in (r"(\w)\1x", r"[a-c]é?", r"^b", r"ca$")]
+    matcher = compile_keywords(error_data)
+    literals = matcher.literals()
+    prefilter = matcher.bytes_prefilter()
+    assert literals is not None
+    skipped = 0
+    for line in corpus(rng, error_data, 2000):
+        line_lower = line.lower()
+        if matcher.find(line_lower):
+            assert any(literal in line_lower for literal in literals), line
+            assert prefilter.search(line.encode("utf-8").lower()), line
+        elif prefilter.search(line.encode("utf-8").lower()) is None:
+            skipped += 1
+    assert skipped  # The prefilter isn't matching every line
+
+
+def test_patterns_match_regardless_of_case():
+    line = "10-18 14:00:00.000  1000  1001 E ActivityManager: ANR in com.Example\n"
+    error_data = {"Error": {"patterns": [
+        "ANR in", r"[A-Z]{3} in com\.E",
+        {"regex": r"[A-Z]+ in", "level": "E", "tag": "ActivityManager"},
+        {"regex": r"ANR", "tag": "Activity*", "name": "ANR"},
+    ]}}
+    assert compile_keywords(error_data).find(line.lower()) == {"Error": [
+        "ANR in", r"[A-Z]{3} in com\.E", "[A-Z]+ in level=E tag=ActivityManager", "ANR"]}
+
+
+@pytest.mark.parametrize("pattern", ["(?-i:ANR)", {"regex": "ANR (?:in (?-i:[A-Z]))", "level": "E"}])
+def test_case_sensitive_regexes_are_rejected(pattern):
+    # The line is lowercased before matching, so these could never match uppercase text
+    with pytest.raises(ValueError, match="case-insensitively"):
+        compile_keywords({"Error": {"patterns": [pattern]}})
@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+from KeywordMatcher import compile_keywords
+from LogFollower import LogFollower
+from LogScanner import get_engine, scan_byte_range
+
+ERROR_DATA = {
+    "Crashed": {"crash": True, "keywords": ["crashed"]},
+    "Error": {"keywords": ["error"]},
+}
+
+
+def lines(first, count):
+    return "".join(f"10-18 14:00:00.000 E Tag: {'error' if number % 3 else 'app crashed'} {number}\n"
+                   for number in range(first, first + count))
+
+
+def plain(scan):
+    """Turns search_errors results into plain values that compare by content."""
+    results, unique_lines_per_error, crashed_occurrences = scan
+    return ({error_type: (data["count"], list(data["lines"])) for error_type, data in results.items()},
+            unique_lines_per_error, list(crashed_occurrences))
+
+
+@pytest.fixture
+def log(tmp_path):
+    path = tmp_path / "app.txt"
+    path.write_text(lines(0, 10))
+    return path
+
+
+@pytest.mark.parametrize("engine", ["text", "mmap"])
+def test_appended_lines_are_scanned_once_across_runs(log, engine):
+    follower = LogFollower(str(log), ERROR_DATA, engine=engine)
+    assert follower.update() == 10
+    with open(log, "a") as f:
+        f.write(lines(10, 5) + "10-18 14:00:00.000 E Tag: error still being wri")
+    assert follower.update() == 5  # The unfinished line waits for its newline
+
+    with open(log, "a") as f:
+        f.write("tten\n")
+    resumed = LogFollower(str(log), ERROR_DATA, engine=engine)  # A later run reads the saved state
+    assert resumed.update() == 1
+    assert resumed.update() == 0
+    assert plain(resumed.results) == plain(get_engine(engine)(str(log), ERROR_DATA))
+
+
+def test_rotated_log_is_finished_from_its_copy(log):
+    follower = LogFollower(str(log), ERROR_DATA)
+    follower.update()
+    with open(log, "a") as f:
+        f.write(lines(10, 4))
+    os.rename(log, log.with_name("app.1.txt"))
+    log.write_text(lines(100, 2))
+
+    assert follower.update() == 6
+    rotated_path, rotated_results = follower.rotated
+    assert rotated_path == str(log.with_name("app.1.txt"))
+    assert plain(rotated_results) == plain(get_engine("text")(rotated_path, ERROR_DATA))
+    assert plain(follower.results) == plain(get_engine("text")(str(log), ERROR_DATA))
+
+
+def test_truncated_log_is_analyzed_from_the_start(log):
+    follower = LogFollower(str(log), ERROR_DATA)
+    follower.update()
+    with open(log, "w") as f:  # Truncated in place, keeping the inode
+        f.write(lines(50, 3))
+
+    assert follower.update() == 3
+    assert follower.rotated[0] is None
+    assert plain(follower.results) == plain(get_engine("text")(str(log), ERROR_DATA))
+
+
+def test_mmap_engine_follows_a_log_with_invalid_utf8(log):
+    with open(log, "ab") as f:
+        f.write(b"10-18 14:00:00.000 E Tag: error \xff in a corrupted line\n")
+    with pytest.raises(UnicodeDecodeError):
+        LogFollower(str(log), ERROR_DATA, state_path=str(log) + ".text").update()
+    follower = LogFollower(str(log), ERROR_DATA, engine="mmap")
+    assert follower.update() == 11
+    assert follower.results[0]["Error"]["count"] == 7
+
+
+def test_engines_agree_on_a_range(log):
+    data = log.read_bytes()
+    matcher = compile_keywords(ERROR_DATA)
+    start = data.index(b"\n", 100) + 1
+    end = data.index(b"\n", 250) + 1
+    line_count, *scan = scan_byte_range(str(log), start, end, ERROR_DATA, matcher, engine="text")
+    mmap_count, *mmap_scan = scan_byte_range(str(log), start, end, ERROR_DATA, matcher, engine="mmap")
+    assert line_count == mmap_count == data[start:end].count(b"\n")
+    assert plain(scan) == plain(mmap_scan)
@@ -0,0 +1,43 @@
+import pytest
+
+from LogScanner import get_engine, search_errors_chunked
+
+ERROR_DATA = {
+    "Crashed": {"crash": True, "keywords": ["crashed"]},
+    "Error": {"keywords": ["error"]},
+}
+
+
+def plain(scan):
+    """Turns search_errors results into plain values that compare by content."""
+    results, unique_lines_per_error, crashed_occurrences = scan
+    return ({error_type: (data["count"], list(data["lines"])) for error_type, data in results.items()},
+            unique_lines_per_error, list(crashed_occurrences))
+
+
+@pytest.fixture
+def log_with_lone_cr(tmp_path):
+    path = tmp_path / "app.txt"
+    lines = []
+    for number in range(400):
+        if number % 7 == 0:
+            lines.append(f"10-18 14:00:00.000 E Tag: error {number}\rcontinued crashed {number}\n")
+        elif number % 5 == 0:
+            lines.append(f"10-18 14:00:01.000 I Tag: app crashed {number}\n")
+        else:
+            lines.append(f"10-18 14:00:02.000 D Tag: line {number}\n")
+    path.write_bytes("".join(lines).encode("utf-8"))
+    return str(path)
+
+
+@pytest.mark.parametrize("engine", ["text", "mmap"])
+def test_chunked_scan_uses_the_requested_engine(log_with_lone_cr, engine):
+    serial = get_engine(engine)(log_with_lone_cr, ERROR_DATA)
+    chunked = search_errors_chunked(log_with_lone_cr, ERROR_DATA, workers=2, chunk_size=1024, engine=engine)
+    assert plain(chunked) == plain(serial)
+
+
+def test_engines_differ_on_lone_cr(log_with_lone_cr):
+    # Guards the test above: it only proves anything while the engines disagree on this log
+    assert plain(get_engine("text")(log_with_lone_cr, ERROR_DATA)) != \
+        plain(get_engine("mmap")(log_with_lone_cr, ERROR_DATA))
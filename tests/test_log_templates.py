@@ -0,0 +1,86 @@
+from itertools import product
+
+from LogTemplates import MAX_CHILDREN, WILDCARD, TemplateMiner
+
+
+def logcat(message, level="E"):
+    return f"10-18 14:00:00.123  1000  1001 {level} Tag: {message}\n"
+
+
+def feed(miner, lines, first_line=1):
+    for line_num, line in enumerate(lines, start=first_line):
+        miner.feed(line_num, line, line.lower())
+
+
+def summary(miner):
+    return [(template.text(), template.count, template.exemplars) for template in miner.ranked()]
+
+
+SAMPLE = [logcat(message) for message in (
+    "Failed to connect to server alpha",
+    "Failed to connect to server beta",
+    "Request 42 timed out after 3000 ms",
+    "Failed to connect to server gamma",
+    "Request 7 timed out after 15 ms",
+    "Cache miss for key user",
+)] + [
+    logcat("Connected to server alpha", level="I"),  # Not an error line
+    logcat("\tat com.example.Main.run(Main.java:1)"),  # Frames are left to --traces
+]
+
+
+def test_differing_tokens_become_wildcards():
+    miner = TemplateMiner()
+    feed(miner, SAMPLE)
+    templates = miner.ranked()
+    assert [(template.text(), template.count) for template in templates] == [
+        (f"Failed to connect to server {WILDCARD}", 3),
+        (f"Request {WILDCARD} timed out after {WILDCARD} ms", 2),
+        ("Cache miss for key user", 1),
+    ]
+    assert templates[0].keyword() == "Failed to connect to server"
+    assert templates[1].keyword() == "timed out after"
+    assert [line_num for _, line_num, _ in templates[0].exemplars] == [1, 2, 4]
+    assert miner.total == 6
+
+
+def test_crowded_prefix_nodes_share_a_wildcard_child():
+    miner = TemplateMiner()
+    names = ["".join(letters) for letters in product("abcdefghijklm", repeat=2)][:MAX_CHILDREN + 20]
+    feed(miner, [logcat(f"{name} service failed to start") for name in names])
+    node = miner._tree[5]
+    assert len(node) == MAX_CHILDREN + 1 and WILDCARD in node
+    # The lines beyond the limit all joined one template below the wildcard child
+    assert [(template.text(), template.count) for template in miner.ranked()[:1]] == [
+        (f"{WILDCARD} service failed to start", 20)]
+    assert miner.total == len(names)
+
+
+def test_templates_beyond_the_cap_are_only_counted():
+    miner = TemplateMiner(max_templates=2)
+    feed(miner, [logcat("disk full error"), logcat("network down error now"), logcat("gps lost error a b"),
+                 logcat("disk full error")])
+    assert len(miner.templates) == 2
+    assert (miner.total, miner.dropped) == (4, 1)
+
+
+def test_merged_parts_match_a_single_pass():
+    lines = SAMPLE * 3
+    serial = TemplateMiner()
+    feed(serial, lines)
+
+    merged = TemplateMiner()
+    for start in range(0, len(lines), 5):
+        part = TemplateMiner()
+        feed(part, lines[start:start + 5])  # Numbered from 1 like a chunk of the log
+        merged.merge(part, line_offset=start)
+    assert summary(merged) == summary(serial)
+
+    folder = TemplateMiner()
+    folder.merge(serial, "app.txt")
+    folder.merge(serial, "app.1.txt")
+    top = folder.ranked()[0]
+    assert (top.count, top.files) == (18, 2)
+    assert top.exemplars == [("app.txt", 1, "Failed to connect to server alpha"),
+                             ("app.txt", 2, "Failed to connect to server beta"),
+                             ("app.txt", 4, "Failed to connect to server gamma")]
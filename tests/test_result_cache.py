@@ -0,0 +1,93 @@
+import os
+
+import pytest
+
+from LogFolderAutomation import scan_files
+from ResultCache import ResultCache
+
+ERROR_DATA = {
+    "Crashed": {"crash": True, "keywords": ["crashed"]},
+    "Error": {"keywords": ["error"]},
+}
+
+
+def lines(first, count):
+    return "".join(f"10-18 14:00:00.000 E Tag: {'error' if number % 3 else 'app crashed'} {number}\n"
+                   for number in range(first, first + count))
+
+
+def plain(scan):
+    """Turns search_errors results into plain values that compare by content."""
+    results, unique_lines_per_error, crashed_occurrences = scan
+    return ({error_type: (data["count"], list(data["lines"])) for error_type, data in results.items()},
+            unique_lines_per_error, list(crashed_occurrences))
+
+
+@pytest.fixture
+def logs(tmp_path):
+    folder = tmp_path / "logs"
+    folder.mkdir()
+    for name, first in (("app.txt", 0), ("app.1.txt", 100)):
+        (folder / name).write_text(lines(first, 10))
+    return folder
+
+
+def analyze(logs, error_data, cache=None):
+    files = [(name, str(logs / name)) for name in sorted(os.listdir(logs))]
+    return [(label, plain(scan)) for label, scan in scan_files(files, error_data, cache=cache)]
+
+
+def test_second_run_is_served_from_the_cache(logs, tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    with ResultCache(db_path) as cache:
+        first = analyze(logs, ERROR_DATA, cache)
+        assert cache.stats == {"category_hits": 0, "category_misses": 4, "file_hits": 0, "files_scanned": 2}
+
+    with ResultCache(db_path) as cache:  # Reopened, as by the next analysis
+        assert analyze(logs, ERROR_DATA, cache) == first == analyze(logs, ERROR_DATA)
+        assert cache.stats == {"category_hits": 4, "category_misses": 0, "file_hits": 2, "files_scanned": 0}
+        assert cache.summary() == ("Cache: 4/4 categories served from cache (100.0%), 2 files fully cached, "
+                                   "0 files scanned")
+
+
+def test_only_the_edited_category_is_rescanned(logs, tmp_path):
+    with ResultCache(str(tmp_path / "cache.db")) as cache:
+        analyze(logs, ERROR_DATA, cache)
+        edited = dict(ERROR_DATA, Error={"keywords": ["error 1"]})
+        cache.reset_stats()
+        assert analyze(logs, edited, cache) == analyze(logs, edited)
+        assert cache.stats == {"category_hits": 2, "category_misses": 2, "file_hits": 0, "files_scanned": 2}
+
+        cache.reset_stats()
+        assert cache.lookup(str(logs / "app.txt"), edited)[:2] == (["Crashed", "Error"], [])
+        # The results of the old keywords were replaced, not kept next to the new ones
+        assert cache.lookup(str(logs / "app.txt"), ERROR_DATA)[:2] == (["Crashed"], ["Error"])
+
+
+@pytest.mark.parametrize("change", ["append", "rewrite"])
+def test_changed_logs_are_rescanned(logs, tmp_path, change):
+    log = logs / "app.txt"
+    with ResultCache(str(tmp_path / "cache.db")) as cache:
+        analyze(logs, ERROR_DATA, cache)
+        if change == "append":
+            with open(log, "a") as f:
+                f.write(lines(10, 3))
+        else:
+            # Same size, so only the modification time tells the logs apart
+            stat = os.stat(log)
+            log.write_text(log.read_text().replace("error", "fault"))
+            os.utime(log, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+            assert os.stat(log).st_size == stat.st_size
+
+        cache.reset_stats()
+        assert analyze(logs, ERROR_DATA, cache) == analyze(logs, ERROR_DATA)
+        assert cache.stats == {"category_hits": 2, "category_misses": 2, "file_hits": 1, "files_scanned": 1}
+
+
+def test_least_recently_used_logs_are_evicted(logs, tmp_path):
+    with ResultCache(str(tmp_path / "cache.db"), max_files=1) as cache:
+        analyze(logs, ERROR_DATA, cache)
+        assert cache.evict() == 1
+        cache.reset_stats()
+        analyze(logs, ERROR_DATA, cache)
+        assert cache.stats["file_hits"] == 1
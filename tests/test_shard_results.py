@@ -0,0 +1,92 @@
+import os
+import shutil
+
+import pytest
+
+import LogFolderAutomation
+from LogDiscovery import discover_logs
+from ShardResults import ShardPartial, ShardSelector, merge_partials
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LOG = "10-18 14:00:00.000 E Tag: com.android.volley.TimeoutError in request\n"
+
+# Created out of name order, as a directory listing may return them
+NAMES = ["m.txt", "c.txt", "x.txt", "a.txt", "k.txt", "b.txt"]
+
+
+@pytest.fixture
+def logs(tmp_path):
+    folder = tmp_path / "logs"
+    (folder / "dev2").mkdir(parents=True)
+    (folder / "dev1").mkdir()
+    for index, name in enumerate(NAMES):
+        (folder / name).write_text(LOG * (index + 1))
+        (folder / "dev2" / name).write_text(LOG)
+    (folder / "dev1" / "z.txt").write_text(LOG)
+    return str(folder)
+
+
+def partials(files, count):
+    """Returns the partials the shards of a node seeing files in this order would save."""
+    result = []
+    for index in range(1, count + 1):
+        selector = ShardSelector(index, count)
+        picked = [(selector.positions[label], label, None) for label, _ in selector.select(files)]
+        result.append(ShardPartial((index, count), "logs", "logs", "settings", {}, selector.files_total,
+                                   selector.fingerprint, picked))
+    return result
+
+
+def test_discovery_is_in_name_order(logs):
+    labels = [label for label, _ in discover_logs(logs, recursive=True)]
+    assert labels == sorted(NAMES) + [os.path.join("dev1", "z.txt")] + [os.path.join("dev2", name)
+                                                                         for name in sorted(NAMES)]
+
+
+def test_partials_listing_the_files_in_another_order_are_refused():
+    files = [(name, name) for name in sorted(NAMES)]
+    first, _ = partials(files, 2)
+    _, second = partials(list(reversed(files)), 2)
+    with pytest.raises(ValueError, match="found other logs"):
+        merge_partials([first, second])
+
+    merged = merge_partials(partials(files, 2))
+    assert [label for _, label, _ in merged.files] == sorted(NAMES)
+
+
+def test_a_log_in_two_shards_is_refused():
+    files = [(name, name) for name in sorted(NAMES)]
+    first, second = partials(files, 2)
+    second.files.append(first.files[0])
+    with pytest.raises(ValueError, match="more than one shard"):
+        merge_partials([first, second])
+
+
+def test_merged_shards_match_one_run_from_another_mount(logs, tmp_path, monkeypatch):
+    monkeypatch.chdir(ROOT)  # keywords.json is found next to the program
+    mirror = str(tmp_path / "mount" / "logs")
+    shutil.copytree(logs, mirror)
+    shard_paths = []
+    for index, folder in ((1, logs), (2, mirror)):
+        save_path = tmp_path / f"shard{index}"
+        save_path.mkdir()
+        assert LogFolderAutomation.main(folder, str(save_path), verbosity="summary", recursive=True,
+                                        shard=(index, 2)) == 0
+        (analysis_folder,) = os.listdir(save_path)
+        (partial,) = os.listdir(save_path / analysis_folder)
+        shard_paths.append(str(save_path / analysis_folder / partial))
+
+    def report(save_path):
+        (analysis_folder,) = os.listdir(save_path)
+        (name,) = [name for name in os.listdir(save_path / analysis_folder) if "ExceptionAnalysis" in name]
+        lines = (save_path / analysis_folder / name).read_text().splitlines()
+        return [line for line in lines if not line.startswith(("Date", "Folder"))]
+
+    single = tmp_path / "single"
+    merged = tmp_path / "merged"
+    single.mkdir()
+    merged.mkdir()
+    assert LogFolderAutomation.main(logs, str(single), verbosity="summary", recursive=True) == 0
+    assert LogFolderAutomation.merge_main(list(reversed(shard_paths)), str(merged), verbosity="summary") == 0
+    assert report(merged) == report(single)
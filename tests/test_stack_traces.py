@@ -0,0 +1,98 @@
+from StackTraces import EXCEPTION, StackTrace, TraceAssembler, TraceSignatures, collect_traces
+
+
+def logcat(tid, message):
+    return f"10-18 14:00:00.123  1000  {tid} E AndroidRuntime: {message}\n"
+
+
+def crash(tid, index, line, address):
+    """A crash of thread tid whose message, address and line numbers differ per occurrence."""
+    return [
+        logcat(tid, f"java.lang.IndexOutOfBoundsException: Index {index} out of bounds for {address}"),
+        logcat(tid, f"\tat com.example.List.get(List.java:{line})"),
+        logcat(tid, f"\tat com.example.Main$1.run(Main.java:{line + 10})"),
+    ]
+
+
+# Two threads logging their traces line by line in between each other; the worker's
+# trace has a cause whose remaining frames are elided
+SAMPLE = [
+    logcat(100, "FATAL EXCEPTION: main"),
+    logcat(100, "java.lang.NullPointerException: Attempt to invoke virtual method on a null object"),
+    logcat(200, "java.lang.IllegalStateException: Worker 7 failed"),
+    logcat(100, "\tat com.example.Main.onCreate(Main.java:42)"),
+    logcat(200, "\tat com.example.Worker.run(Worker.java:10)"),
+    logcat(100, "\tat android.app.Activity.performCreate(Activity.java:8000)"),
+    logcat(200, "Caused by: java.io.IOException: read failed at 0x7fff1234"),
+    logcat(200, "\tat com.example.Io.read(Io.java:5)"),
+    logcat(200, "\t... 3 more"),
+    logcat(100, "Process: com.example, PID: 1000"),
+    logcat(200, "Worker finished"),
+]
+
+
+def assemble(lines):
+    traces = []
+    assembler = TraceAssembler(traces.append)
+    for line_num, line in enumerate(lines, start=1):
+        assembler.feed(line_num, line)
+    assembler.close()
+    return traces
+
+
+def test_interleaved_threads_are_kept_apart():
+    main, worker = sorted(assemble(SAMPLE), key=lambda trace: trace.line_num)
+    assert main.line_num == 2
+    assert main.sections == [["java.lang.NullPointerException",
+                              "Attempt to invoke virtual method on a null object",
+                              ["com.example.Main.onCreate(Main.java)",
+                               "android.app.Activity.performCreate(Activity.java)"]]]
+    assert main.title() == "java.lang.NullPointerException at com.example.Main.onCreate(Main.java)"
+    assert worker.line_num == 3
+    assert len(worker.lines) == 5
+
+
+def test_causes_and_elided_frames_belong_to_the_trace():
+    worker = [trace for trace in assemble(SAMPLE) if trace.line_num == 3][0]
+    assert [name for name, _, _ in worker.sections] == ["java.lang.IllegalStateException", "java.io.IOException"]
+    assert worker.sections[1] == ["java.io.IOException", "read failed at <addr>", ["com.example.Io.read(Io.java)"]]
+    assert worker.lines[-1] == "... 3 more"
+    assert worker.last_line == 9
+    assert worker.title() == ("java.lang.IllegalStateException at com.example.Worker.run(Worker.java) "
+                              "(caused by java.io.IOException)")
+
+
+def test_frames_without_an_exception_line_are_ignored():
+    assert assemble([logcat(100, "Looking at com.example.Main(Main.java:1)"),
+                     logcat(100, "\tat com.example.Main.run(Main.java:1)")]) == []
+
+
+def test_fingerprint_ignores_line_numbers_addresses_and_counts(tmp_path):
+    first, second, other = assemble(crash(100, 5, 42, "0x7f00aa") + [logcat(100, "done")]
+                                    + crash(100, 9, 77, "@1a2b3c4d") + [logcat(100, "done")]
+                                    + crash(300, 5, 42, "0x7f00aa")[:2])
+    assert first.fingerprint() == second.fingerprint()
+    assert first.fingerprint() != other.fingerprint()  # Fewer frames
+
+    log = tmp_path / "app.txt"
+    log.write_text("".join(crash(100, 1, 1, "0x1") + [logcat(100, "done")] + crash(100, 2, 2, "0x2") + SAMPLE))
+    signatures = collect_traces(str(log))
+    assert signatures.total == 4
+    (fingerprint, entry), *rest = signatures.ranked()
+    assert fingerprint == first.fingerprint() and entry["count"] == 2 and entry["line"] == 1
+    assert len(rest) == 2
+
+
+def test_signatures_beyond_the_cap_are_only_counted():
+    signatures = TraceSignatures(max_signatures=2)
+    for name in ("First", "Second", "Third", "First"):
+        message = f"com.example.{name}Exception"
+        signatures.add(StackTrace(1, message, EXCEPTION.match(message)))
+    assert len(signatures.entries) == 2
+    assert (signatures.total, signatures.dropped) == (4, 1)
+
+    folder = TraceSignatures(max_signatures=1)
+    folder.merge(signatures, "app.txt")
+    assert len(folder.entries) == 1
+    assert (folder.total, folder.dropped) == (4, 2)
+    assert folder.ranked()[0][1]["count"] == 2 and folder.ranked()[0][1]["file"] == "app.txt"
@@ -0,0 +1,44 @@
+import pytest
+
+import LogScanner
+from LogScanner import search_errors_window
+from TimeWindow import TimeWindow, find_window, in_order
+
+ERROR_DATA = {"Error": {"keywords": ["error"]}}
+
+
+def plain(scan):
+    results, unique_lines_per_error, crashed_occurrences = scan
+    return ({error_type: (data["count"], list(data["lines"])) for error_type, data in results.items()},
+            unique_lines_per_error, list(crashed_occurrences))
+
+
+def logcat_line(seconds, message):
+    return f"10-18 {10 + seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}.000 I Tag: {message}\n"
+
+
+@pytest.fixture
+def log_with_unordered_line(tmp_path):
+    """Two hours of one line per second, with one line from 12:30 logged at about 11:15."""
+    lines = [logcat_line(seconds, f"error {seconds}" if seconds % 10 == 0 else "ok") for seconds in range(7200)]
+    lines[4500] = logcat_line(9000, "error logged out of order")
+    path = tmp_path / "app.txt"
+    path.write_text("".join(lines))
+    return str(path)
+
+
+def test_in_order():
+    assert in_order(b"10-18 10:00:00.000 a\nno timestamp\n10-18 10:00:00.5 b\n10-18 10:00:01 c\n")
+    assert not in_order(b"10-18 10:00:01.000 a\n10-18 10:00:00.999 b\n")
+
+
+@pytest.mark.parametrize("engine", ["text", "mmap"])
+def test_unordered_lines_missed_by_the_probes_fall_back_to_filtering(log_with_unordered_line, engine, monkeypatch):
+    window = TimeWindow("11:00", "11:30")
+    assert find_window(log_with_unordered_line, window) is not None  # The probes don't see the bad line
+    seeked = search_errors_window(log_with_unordered_line, ERROR_DATA, window=window, engine=engine)
+
+    monkeypatch.setattr(LogScanner, "find_window", lambda log_file, window: None)
+    filtered = search_errors_window(log_with_unordered_line, ERROR_DATA, window=window, engine=engine)
+    assert plain(seeked) == plain(filtered)
+    assert 4501 not in list(filtered[0]["Error"]["lines"])